@@ -0,0 +1,105 @@
+# ./benchmarks/bench_extrator.py
+"""
+Conformidade e vazão dos extratores de HTML da SNPedia.
+
+Confere, página a página, que cada extrator produz exatamente o mesmo
+resultado que o de referência (BeautifulSoup) e mede páginas por segundo.
+
+    python -m benchmarks.bench_extrator                  # páginas determinísticas
+    python -m benchmarks.bench_extrator --cache          # páginas do cache HTTP
+    python -m benchmarks.bench_extrator --html-dir pags  # arquivos *.html
+
+Sem --cache nem --html-dir, as páginas vêm do gerador do stub_fontes mais
+alguns casos de borda fixos, então o teste roda igual num checkout novo.
+"""
+import argparse
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+from benchmarks.stub_fontes import pagina_sintetica
+from tools.snpedia_extractor import EXTRATORES, extrair_bs4
+
+# Estruturas que o gerador não produz e que já aparecem em páginas reais
+CASOS_DE_BORDA = [
+    "",
+    "<html><body><p>Sem conteúdo da wiki.</p></body></html>",
+    # rótulos dentro de <nobr>, GMAF vazio, vários genes, entidades
+    "<div id='mw-content-text'><div class='mw-parser-output'>"
+    "<table><tr><td><nobr>Gene</nobr></td><td><a href='/a'>APOE</a>, <a href='/b'>TOMM40</a></td></tr>"
+    "<tr><td><nobr>GMAF</nobr></td><td></td></tr></table>"
+    "<p> </p><p>Alzheimer&#39;s &amp; <b>LDL</b> risk.</p>"
+    "<table class='smwtable sortable wikitable'><tbody><tr><th>Geno</th></tr>"
+    "<tr><td><a href='/g'>(C;T)</a></td><td><!-- sem mag --></td><td>carrier &lt;1%</td></tr>"
+    "<tr><td></td><td></td><td></td></tr><tr><td>(T;T)</td><td>2</td></tr></tbody></table>"
+    "</div></div>",
+    # rótulo com texto extra não conta; script dentro do parágrafo é ignorado
+    "<div id='mw-content-text'><div class='mw-parser-output'>"
+    "<table><tr><td>Gene symbol</td><td><a>X</a></td></tr><tr><td>Gene</td><td>sem link</td></tr></table>"
+    "<p><script>var x = 1;</script>Texto após script.</p></div></div>",
+    "<?xml version='1.0' encoding='utf-8'?><html><body><div id='mw-content-text'>"
+    "<div class='mw-parser-output'><p>ação</p></div></div></body></html>",
+]
+
+
+def carregar_paginas(html_dir: str | None, do_cache: bool, limite: int) -> list[str]:
+    if html_dir:
+        arquivos = islice(sorted(Path(html_dir).glob("*.html")), limite)
+        return [a.read_text(encoding="utf-8") for a in arquivos]
+    if do_cache:
+        from utils.http_cache import CacheHTTP
+
+        return list(islice(CacheHTTP().iterar("snpedia"), limite))
+    sinteticas = [pagina_sintetica(f"rs{i}") for i in range(1, max(limite - len(CASOS_DE_BORDA), 0) + 1)]
+    return CASOS_DE_BORDA + sinteticas
+
+
+def verificar_conformidade(paginas: list[str]) -> dict[str, int]:
+    """Número de páginas em que cada extrator diverge da referência."""
+    divergencias = {nome: 0 for nome in EXTRATORES}
+    for i, html in enumerate(paginas):
+        referencia = extrair_bs4(html)
+        for nome, extrator in EXTRATORES.items():
+            obtido = extrator(html)
+            if obtido != referencia:
+                divergencias[nome] += 1
+                if divergencias[nome] <= 3:
+                    print(f"⚠️ [{nome}] página {i} diverge:\n  esperado={referencia}\n  obtido={obtido}")
+    return divergencias
+
+
+def medir_vazao(paginas: list[str], repeticoes: int) -> dict[str, float]:
+    vazao = {}
+    for nome, extrator in EXTRATORES.items():
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            for html in paginas:
+                extrator(html)
+        vazao[nome] = len(paginas) * repeticoes / (time.perf_counter() - inicio)
+    return vazao
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    fonte = parser.add_mutually_exclusive_group()
+    fonte.add_argument("--html-dir", help="diretório com páginas *.html")
+    fonte.add_argument("--cache", action="store_true", help="usa as páginas SNPedia do cache HTTP")
+    parser.add_argument("--limite", type=int, default=500, help="máximo de páginas usadas")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    paginas = carregar_paginas(args.html_dir, args.cache, args.limite)
+    if not paginas:
+        print("❌ Nenhuma página encontrada.")
+        return 1
+    print(f"📄 {len(paginas)} páginas")
+
+    divergencias = verificar_conformidade(paginas)
+    for nome, vazao in medir_vazao(paginas, args.repeticoes).items():
+        print(f"{nome:>6}: {vazao:8.1f} páginas/s | divergências: {divergencias[nome]}")
+    return 1 if any(divergencias.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
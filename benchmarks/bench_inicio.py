@@ -0,0 +1,103 @@
+# ./benchmarks/bench_inicio.py
+"""
+Orçamento de inicialização do cli.py: cada invocação simples roda num
+processo novo, a partir de uma pasta vazia, e o melhor de --repeticoes tempos
+é comparado com ORCAMENTO_INICIO. Também confere que nenhuma delas criou
+arquivos ou pastas (efeitos colaterais de importação).
+
+Para as que estouram o orçamento, mostra os módulos mais caros segundo
+`python -X importtime`. Sai com código 1 se alguma estourar.
+
+    python -m benchmarks.bench_inicio
+    python -m benchmarks.bench_inicio --orcamento 0.3 --repeticoes 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from config.env import ORCAMENTO_INICIO
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Invocações que não fazem trabalho de verdade: ajuda e verificação de retomada
+INVOCACOES = [
+    ["--help"],
+    ["status"],
+    ["map", "--help"],
+    ["clean", "--help"],
+    ["match", "--help"],
+    ["cluster", "--help"],
+    ["interpret", "--help"],
+    ["run", "--help"],
+]
+
+
+def ambiente(pasta: Path) -> dict:
+    # Manifesto inexistente na pasta temporária: mede a inicialização, não a leitura de um manifesto grande
+    return {**os.environ, "PYTHONPATH": str(RAIZ), "MANIFESTO_RESULTADOS": str(pasta / "manifesto.jsonl")}
+
+
+def medir(argumentos: list[str], pasta: Path, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, str(RAIZ / "cli.py"), *argumentos], cwd=pasta, env=ambiente(pasta),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def imports_mais_caros(argumentos: list[str], pasta: Path, n: int = 8) -> list[tuple[float, str]]:
+    """(segundos acumulados, módulo) dos imports de primeiro nível mais lentos."""
+    resultado = subprocess.run([sys.executable, "-X", "importtime", str(RAIZ / "cli.py"), *argumentos],
+                               cwd=pasta, env=ambiente(pasta), capture_output=True, text=True)
+    custos = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, acumulado, nome = linha[len("import time:"):].split("|")
+        if not nome.startswith("  "):  # submódulos vêm indentados sob quem os importou
+            custos.append((int(acumulado) / 1e6, nome.strip()))
+    return sorted(custos, reverse=True)[:n]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orcamento", type=float, default=ORCAMENTO_INICIO, help="segundos por invocação")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    # Referência: o próprio interpretador, sem nada do projeto
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    print(f"🐍 Interpretador vazio: {time.perf_counter() - inicio:.3f}s")
+
+    estouros = []
+    with tempfile.TemporaryDirectory() as temporaria:
+        pasta = Path(temporaria)
+        for argumentos in INVOCACOES:
+            tempo = medir(argumentos, pasta, args.repeticoes)
+            ok = tempo <= args.orcamento
+            print(f"{'✅' if ok else '❌'} cli.py {' '.join(argumentos):<18} {tempo:.3f}s")
+            if not ok:
+                estouros.append(argumentos)
+        sobras = sorted(p.name for p in pasta.iterdir())
+
+    if sobras:
+        print(f"❌ Arquivos criados sem nenhuma etapa rodar: {', '.join(sobras)}")
+    for argumentos in estouros:
+        with tempfile.TemporaryDirectory() as temporaria:
+            print(f"\n🐢 Imports mais caros de `cli.py {' '.join(argumentos)}`:")
+            for segundos, nome in imports_mais_caros(argumentos, Path(temporaria)):
+                print(f"   {segundos:.3f}s  {nome}")
+
+    print(f"\n⏱️ Orçamento: {args.orcamento:.2f}s por invocação")
+    return 1 if estouros or sobras else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
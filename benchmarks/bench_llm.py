@@ -0,0 +1,124 @@
+# ./benchmarks/bench_llm.py
+"""
+Vazão do motor de interpretação contra o servidor LLM falso.
+
+Sobe o stub no mesmo processo, interpreta N prompts sintéticos com diferentes
+níveis de concorrência e compara com o limite teórico do servidor
+(slots / tempo por resposta). Também confere se uma saída interrompida é
+retomada sem repetir prompts e quantas chamadas ao modelo sobram num
+conjunto de várias amostras que compartilham pares (rsID, genótipo).
+
+    python -m benchmarks.bench_llm --prompts 200 --concorrencias 1,8,32
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stub_llm import StubLLM
+from tools.query_llm import interpretar_async, SaidaInterpretacoes
+from utils.http_cache import CacheHTTP
+
+
+def itens_sinteticos(n: int) -> list[dict]:
+    return [{"rsid": f"rs{i}", "genotipo": "CT", "prompt": f"Explique o genótipo CT na variante rs{i}."}
+            for i in range(n)]
+
+
+def amostras_sinteticas(n_amostras: int, n_snps: int, seed: int = 0) -> list[list[dict]]:
+    """Amostras com os mesmos rsIDs e genótipos sorteados entre 3 pares, em grafias variadas."""
+    import random
+
+    aleatorio = random.Random(seed)
+    grafias = [["CC", "C;C"], ["CT", "TC", "T;C", "(C;T)"], ["TT", "T;T"]]
+    amostras = []
+    for _ in range(n_amostras):
+        itens = []
+        for i in range(n_snps):
+            par = aleatorio.choice(grafias)
+            genotipo = aleatorio.choice(par)
+            # O prompt usa o genótipo normalizado, como o prompt_builder
+            itens.append({"rsid": f"rs{i}", "genotipo": genotipo, "prompt": f"Explique {par[0]} em rs{i}."})
+        amostras.append(itens)
+    return amostras
+
+
+async def _rodar(stub: StubLLM, itens, saida: SaidaInterpretacoes, concorrencia: int, stream: bool,
+                 cache: CacheHTTP) -> float:
+    endpoint = f"http://127.0.0.1:{stub.porta}/v1/chat/completions"
+    erros = []
+    inicio = time.perf_counter()
+    await interpretar_async(saida.pendentes(itens), saida.registrar, lambda item, e: erros.append(e),
+                            concorrencia, stream=stream, endpoint=endpoint, cache=cache)
+    if erros:
+        print(f"⚠️ {len(erros)} erros, ex.: {erros[0]!r}")
+    return time.perf_counter() - inicio
+
+
+async def medir(args) -> int:
+    stub = await StubLLM(args.latencia, args.tokens, args.intervalo_token, args.slots).iniciar()
+    tempo_resposta = args.latencia + args.tokens * args.intervalo_token
+    print(f"🤖 stub: {args.slots} slots, ~{tempo_resposta:.2f}s por resposta "
+          f"(limite do servidor ≈ {args.slots / tempo_resposta:.1f} prompts/s)")
+    itens = itens_sinteticos(args.prompts)
+    falhou = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for concorrencia in [int(c) for c in args.concorrencias.split(",")]:
+            for stream in (True, False):
+                caminho = Path(tmp) / f"saida_{concorrencia}_{stream}.jsonl"
+                cache = CacheHTTP(str(Path(tmp) / f"cache_{concorrencia}_{stream}.sqlite"))
+                with SaidaInterpretacoes(caminho) as saida:
+                    duracao = await _rodar(stub, itens, saida, concorrencia, stream, cache)
+                print(f"concorrência {concorrencia:>3} | stream={str(stream):<5} | "
+                      f"{args.prompts / duracao:7.1f} prompts/s ({duracao:.2f}s)")
+
+        # Retomada: metade já gravada, a segunda execução só faz a outra metade
+        caminho = Path(tmp) / "retomada.jsonl"
+        cache = CacheHTTP(str(Path(tmp) / "cache_retomada.sqlite"))
+        with SaidaInterpretacoes(caminho) as saida:
+            await _rodar(stub, itens[: args.prompts // 2], saida, 8, True, cache)
+        cache.limpar()  # a retomada tem de vir da saída, não do cache
+        antes = stub.atendidas
+        with SaidaInterpretacoes(caminho) as saida:
+            await _rodar(stub, itens, saida, 8, True, cache)
+            completos = len(saida.concluidos)
+        refeitos = stub.atendidas - antes
+        ok = completos == args.prompts and refeitos == args.prompts - args.prompts // 2
+        falhou += not ok
+        print(f"{'✅' if ok else '❌'} retomada: {refeitos} prompts na segunda execução, {completos} concluídos")
+
+        # Várias amostras: cada par (rsID, genótipo normalizado) chega ao modelo uma única vez
+        cache = CacheHTTP(str(Path(tmp) / "cache_amostras.sqlite"))
+        amostras = amostras_sinteticas(args.amostras, args.prompts)
+        antes = stub.atendidas
+        inicio = time.perf_counter()
+        for i, amostra in enumerate(amostras):
+            with SaidaInterpretacoes(Path(tmp) / f"amostra_{i}.jsonl") as saida:
+                await _rodar(stub, amostra, saida, 32, True, cache)
+        chamadas = stub.atendidas - antes
+        total = sum(len(a) for a in amostras)
+        ok = chamadas <= args.prompts * 3
+        falhou += not ok
+        print(f"{'✅' if ok else '❌'} {args.amostras} amostras: {total} interpretações com {chamadas} chamadas "
+              f"ao modelo ({1 - chamadas / total:.0%} locais) em {time.perf_counter() - inicio:.2f}s")
+    await stub.fechar()
+    return falhou
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=200)
+    parser.add_argument("--concorrencias", default="1,8,32")
+    parser.add_argument("--amostras", type=int, default=10, help="amostras no cenário de deduplicação")
+    parser.add_argument("--slots", type=int, default=32, help="requisições em paralelo no servidor")
+    parser.add_argument("--latencia", type=float, default=0.1)
+    parser.add_argument("--tokens", type=int, default=32)
+    parser.add_argument("--intervalo-token", type=float, default=0.002)
+    args = parser.parse_args(argv)
+    return asyncio.run(medir(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+# ./benchmarks/bench_pipeline.py
+"""
+Benchmark reprodutível do pipeline, sem rede: SNPedia e MyVariant locais
+(benchmarks/stub_fontes.py) e genomas sintéticos de tamanho fixo.
+
+Para cada tamanho mede tempo, vazão e pico de memória (RSS) de cada etapa:
+leitura do genoma, MyVariant em lote (mapear_variantes), enriquecimento
+completo (consultar_snpedia_completa, sequencial e async), limpeza,
+casamento de genótipos e clusterização. O enriquecimento por SNP é limitado
+a --max-rede SNPs por tamanho (1M páginas levaria horas mesmo localmente);
+as etapas seguintes rodam no genoma inteiro, com registros derivados dos
+enriquecidos.
+
+    python -m benchmarks.bench_pipeline                          # 1k, 100k e 1M
+    python -m benchmarks.bench_pipeline --tamanhos 1000,100000 --latencia 0.05 --taxa-erro 0.01
+    python -m benchmarks.bench_pipeline --comparar benchmarks/resultados/<anterior>.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.stub_fontes import iniciar_em_processo
+
+GENOTIPOS = np.array(["AA", "AG", "GG", "CC", "CT", "TT", "AC", "GT", "--"])
+PESOS_GENOTIPOS = np.array([0.2, 0.15, 0.1, 0.15, 0.15, 0.1, 0.06, 0.05, 0.04])
+CROMOSSOMOS = np.array([str(c) for c in range(1, 23)] + ["X"])
+
+
+# ========== MEMÓRIA ==========
+
+
+def rss_atual() -> int:
+    """RSS do processo em bytes (Linux: /proc; nos demais, o pico do getrusage)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == "darwin" else pico * 1024
+
+
+class MonitorMemoria:
+    """Amostra o RSS numa thread enquanto o bloco roda; `pico_mb` é o maior acréscimo sobre o início."""
+
+    def __init__(self, intervalo: float = 0.005):
+        self.intervalo = intervalo
+        self.inicio = self.pico = 0
+        self._parar = threading.Event()
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            self.pico = max(self.pico, rss_atual())
+
+    def __enter__(self):
+        self.inicio = self.pico = rss_atual()
+        self._thread = threading.Thread(target=self._amostrar, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join()
+        self.pico = max(self.pico, rss_atual())
+
+    @property
+    def pico_mb(self) -> float:
+        return (self.pico - self.inicio) / 2 ** 20
+
+
+class Etapas:
+    """Coleta {etapa: segundos, itens, vazão, pico de memória} de um tamanho de genoma."""
+
+    def __init__(self):
+        self.resultados: dict[str, dict] = {}
+
+    def medir(self, nome: str, funcao, itens_de=len):
+        with MonitorMemoria() as memoria:
+            inicio = time.perf_counter()
+            resultado = funcao()
+            segundos = time.perf_counter() - inicio
+        itens = itens_de(resultado)
+        self.resultados[nome] = {
+            "segundos": round(segundos, 4),
+            "itens": itens,
+            "itens_por_s": round(itens / segundos, 1) if segundos else None,
+            "pico_mb": round(memoria.pico_mb, 1),
+        }
+        print(f"   {nome:<20} {segundos:8.2f}s {itens:>9} itens {itens / max(segundos, 1e-9):>11,.0f}/s "
+              f"pico +{memoria.pico_mb:,.0f} MB")
+        return resultado
+
+
+# ========== DADOS SINTÉTICOS ==========
+
+
+def gerar_genoma(tamanho: int, pasta: Path, semente: int = 42) -> Path:
+    """CSV do projeto com `tamanho` SNPs (reaproveitado se já existir com a mesma semente)."""
+    caminho = pasta / f"genoma_{tamanho}_{semente}.csv"
+    if caminho.exists():
+        return caminho
+    aleatorio = np.random.default_rng(semente)
+    rsids = np.sort(aleatorio.choice(np.arange(1, 50 * tamanho + 1000), size=tamanho, replace=False))
+    pd.DataFrame({
+        "RSID": np.char.add("rs", rsids.astype(str)),
+        "CHROMOSOME": aleatorio.choice(CROMOSSOMOS, size=tamanho),
+        "POSITION": aleatorio.integers(1, 250_000_000, size=tamanho),
+        "RESULT": aleatorio.choice(GENOTIPOS, size=tamanho, p=PESOS_GENOTIPOS),
+    }).to_csv(caminho, index=False)
+    return caminho
+
+
+def registros_derivados(df: pd.DataFrame, modelos: list[dict]):
+    """
+    Um registro por SNP do genoma, com a anotação de um dos registros realmente
+    enriquecidos e o genótipo da linha: mesma forma e mesmo texto que o
+    pipeline produziria, sem consultar 1M páginas.
+    """
+    from tools.snp_mapper import campos_genotipo
+
+    for i, (rsid, chrom, pos, alelo) in enumerate(zip(df["RSID"], df["CHROMOSOME"], df["POSITION"], df["RESULT"])):
+        modelo = modelos[i % len(modelos)]
+        yield {**modelo, "rsid": rsid, "chromosome": str(chrom), "position": str(pos), **campos_genotipo(str(alelo))}
+
+
+# ========== ETAPAS ==========
+
+
+def enriquecer(df: pd.DataFrame, modo_async: bool, concorrencia: int) -> list[dict]:
+    from main_pipeline import processar
+
+    linhas = [(r, str(c), str(p), str(a)) for r, c, p, a in zip(df["RSID"], df["CHROMOSOME"], df["POSITION"], df["RESULT"])]
+    registros = []
+    processar(linhas, lambda rsid, dados: registros.append(dados), lambda rsid, erro: None,
+              "html", modo_async, concorrencia)
+    return registros
+
+
+def limpar_e_casar(registros) -> tuple[list[dict], dict[str, float]]:
+    """Limpeza e casamento em fluxo, como no orquestrador; devolve também o tempo próprio de cada parte."""
+    from tools.genotype_matcher import casar_em_fluxo
+    from tools.orquestrador import cronometrar, tempos_exclusivos
+    from tools.snp_cleaner import filtrar_snps
+
+    tempos: dict[str, float] = {}
+    fluxo = cronometrar(registros, tempos, "gerar")
+    fluxo = cronometrar(filtrar_snps(fluxo), tempos, "limpar")
+    fluxo = cronometrar(casar_em_fluxo(fluxo), tempos, "casar")
+    casados = list(fluxo)
+    return casados, tempos_exclusivos(tempos)
+
+
+def clusterizar(casados: list[dict], modo: str):
+    import pandas as pd
+    from tools.nlp_clustering import carregar_registros, clusterizar as clusterizar_completo, clusterizar_incremental
+
+    if modo == "auto":
+        modo = "completo" if len(casados) <= 100_000 else "incremental"
+    if modo == "completo":
+        df, _, _ = clusterizar_completo(carregar_registros(casados))
+        return df
+    _, blocos = clusterizar_incremental(lambda: casados, None)  # modelo novo, sem gravar em cache/
+    return pd.concat(blocos, ignore_index=True)
+
+
+def medir_tamanho(tamanho: int, pasta: Path, args) -> dict:
+    from tools.genome_reader import ler_genoma
+    from tools.load_map_variants import mapear_variantes
+    from utils.metricas import METRICAS
+
+    print(f"\n🧬 {tamanho:,} SNPs")
+    METRICAS.zerar()
+    etapas = Etapas()
+    caminho = gerar_genoma(tamanho, pasta, args.semente)
+
+    df = etapas.medir("ler_genoma", lambda: ler_genoma(caminho))
+    etapas.medir("myvariant_lote", lambda: mapear_variantes(df.copy()))
+    amostra = df.head(args.max_rede)
+    modelos = etapas.medir("enriquecer_seq", lambda: enriquecer(amostra, False, args.concorrencia))
+    if not args.sem_async:
+        etapas.medir("enriquecer_async", lambda: enriquecer(amostra, True, args.concorrencia))
+    if not modelos:
+        print("❌ Nenhum SNP enriquecido; etapas seguintes puladas.")
+        return {"etapas": etapas.resultados, "metricas": METRICAS.relatorio()}
+
+    casados, tempos = etapas.medir("limpar+casar", lambda: limpar_e_casar(registros_derivados(df, modelos)),
+                                   itens_de=lambda r: len(r[0]))
+    etapas.resultados["limpar+casar"]["subetapas_s"] = {nome: round(s, 4) for nome, s in tempos.items()}
+    etapas.medir("clusterizar", lambda: clusterizar(casados, args.modo_cluster))
+    return {"etapas": etapas.resultados, "metricas": METRICAS.relatorio()}
+
+
+# ========== RELATÓRIO ==========
+
+
+def comparar(atual: dict, anterior: dict):
+    """Variação de vazão por tamanho e etapa em relação a um relatório anterior."""
+    print(f"\n📈 Comparação com {anterior.get('data', '?')} (itens/s; negativo = mais lento)")
+    diferentes = {k for k, v in atual["parametros"].items() if anterior.get("parametros", {}).get(k) != v}
+    if diferentes:
+        print(f"   ⚠️ Parâmetros diferentes: {', '.join(sorted(diferentes))}")
+    for tamanho, resultado in atual["tamanhos"].items():
+        antes = anterior.get("tamanhos", {}).get(tamanho, {}).get("etapas", {})
+        for etapa, medida in resultado["etapas"].items():
+            vazao_antes = antes.get(etapa, {}).get("itens_por_s")
+            if vazao_antes and medida.get("itens_por_s"):
+                variacao = medida["itens_por_s"] / vazao_antes - 1
+                alerta = " ⚠️" if variacao < -0.1 else ""
+                print(f"   {int(tamanho):>9,} {etapa:<20} {vazao_antes:>11,.0f}/s -> "
+                      f"{medida['itens_por_s']:>11,.0f}/s ({variacao:+.0%}){alerta}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", default="1000,100000,1000000", help="SNPs por genoma sintético")
+    parser.add_argument("--max-rede", type=int, default=2000,
+                        help="SNPs enriquecidos página a página por tamanho")
+    parser.add_argument("--concorrencia", type=int, default=32, help="SNPs em voo no enriquecimento async")
+    parser.add_argument("--sem-async", action="store_true", help="não mede o enriquecimento async")
+    parser.add_argument("--modo-cluster", choices=["auto", "completo", "incremental"], default="auto")
+    parser.add_argument("--latencia", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--taxa-ausentes", type=float, default=0.0)
+    parser.add_argument("--html-dir", help="páginas gravadas <rsid>.html servidas pelo stub")
+    parser.add_argument("--do-cache", action="store_true", help="stub reproduz as páginas do cache HTTP")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--dados", default=str(Path(tempfile.gettempdir()) / "dna_analyzer_bench"),
+                        help="pasta dos genomas sintéticos (reaproveitados entre execuções)")
+    parser.add_argument("--saida", default="benchmarks/resultados", help="pasta do relatório JSON")
+    parser.add_argument("--comparar", help="relatório JSON anterior para comparação")
+    args = parser.parse_args(argv)
+
+    processo, ambiente = iniciar_em_processo(
+        latencia=args.latencia, jitter=args.jitter, taxa_erro=args.taxa_erro, taxa_ausentes=args.taxa_ausentes,
+        html_dir=args.html_dir, do_cache=args.do_cache, semente=args.semente,
+    )
+    # config.env lê o ambiente na importação: tudo de tools/ é importado depois daqui
+    os.environ.update(ambiente)
+    os.environ["CACHE_ATIVO"] = "0"  # cada execução mede a rede (local), não o cache
+    os.environ["LIMITES_POR_HOST"] = ""
+    os.environ["CONCORRENCIA_POR_HOST"] = str(args.concorrencia)
+
+    pasta = Path(args.dados)
+    pasta.mkdir(parents=True, exist_ok=True)
+    relatorio = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "parametros": {k: v for k, v in vars(args).items() if k not in ("saida", "comparar", "dados")},
+        "python": sys.version.split()[0],
+        "tamanhos": {},
+    }
+    try:
+        for tamanho in [int(t) for t in args.tamanhos.split(",") if t]:
+            relatorio["tamanhos"][str(tamanho)] = medir_tamanho(tamanho, pasta, args)
+    finally:
+        processo.terminate()
+
+    saida = Path(args.saida)
+    saida.mkdir(parents=True, exist_ok=True)
+    caminho = saida / f"bench_{datetime.now():%Y-%m-%d_%H-%M-%S}.json"
+    caminho.write_text(json.dumps(relatorio, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n📄 Relatório em {caminho.resolve()}")
+    if args.comparar:
+        comparar(relatorio, json.loads(Path(args.comparar).read_text(encoding="utf-8")))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
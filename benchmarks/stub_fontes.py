@@ -0,0 +1,237 @@
+# ./benchmarks/stub_fontes.py
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import zlib
+from itertools import islice
+from pathlib import Path
+from urllib.parse import parse_qs, unquote
+
+# ========== SNPEDIA E MYVARIANT LOCAIS (para benchmarks sem rede) ==========
+#
+# Só biblioteca padrão, no mesmo estilo do stub_llm. Atende as rotas usadas
+# pelo pipeline:
+#   GET  /index.php/<rsid>    página HTML da SNPedia
+#   GET  /v1/variant/<rsid>   documento do MyVariant
+#   POST /v1/query            MyVariant em lote (q=rs1,rs2,...)
+# As páginas vêm de gravações (arquivos <rsid>.html ou o cache HTTP) ou são
+# sintetizadas a partir do número do rsID: a mesma entrada gera sempre a mesma
+# resposta. Latência, jitter, limite de conexões atendidas em paralelo e taxa
+# de erros (503) são configuráveis.
+
+TRAITS = [
+    "increased risk of type 2 diabetes", "lactose intolerance", "caffeine metabolism, slow",
+    "higher LDL cholesterol", "reduced warfarin dose", "male pattern baldness",
+    "bitter taste perception", "earwax type, dry", "alcohol flush reaction", "blue eye color",
+    "increased risk of celiac disease", "lower vitamin D levels", "muscle performance, sprint",
+    "higher risk of age-related macular degeneration", "altered folate metabolism",
+    "increased risk of venous thrombosis", "normal response to clopidogrel", "freckling",
+    "higher blood pressure", "reduced risk of gout",
+]
+GENES = ["MTHFR", "APOE", "LCT", "CYP1A2", "HERC2", "ACTN3", "TCF7L2", "VKORC1", "ALDH2", "FTO",
+         "CYP2C19", "F5", "SLC2A9", "ABCC11", "CFH", "TAS2R38", "MC1R", "HLA-DQA1", "GC", "AGT"]
+ALELOS = "ACGT"
+
+
+def numero_rsid(rsid: str) -> int:
+    digitos = "".join(c for c in rsid if c.isdigit())
+    return int(digitos) if digitos else zlib.crc32(rsid.encode())
+
+
+def pagina_sintetica(rsid: str) -> str:
+    """HTML com a mesma estrutura que os extratores leem (tabela de genótipos, Gene, GMAF, descrição)."""
+    aleatorio = random.Random(numero_rsid(rsid))
+    a, b = aleatorio.sample(ALELOS, 2)
+    trait, gene = aleatorio.choice(TRAITS), aleatorio.choice(GENES)
+    linhas = "".join(
+        f"<tr><td>({x};{y})</td><td>{aleatorio.choice(['0', '1.5', '2', '3'])}</td>"
+        f"<td>{resumo}</td></tr>"
+        for (x, y), resumo in zip([(a, a), (a, b), (b, b)], [trait, f"carrier; {trait}", "normal"])
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>" + rsid + " - SNPedia</title></head><body>"
+        "<div id=\"mw-content-text\"><div class=\"mw-parser-output\">"
+        f"<table><tr><td>Gene</td><td><a href=\"/index.php/{gene}\">{gene}</a></td></tr>"
+        f"<tr><td>GMAF</td><td>{aleatorio.random() / 2:.4f}</td></tr></table>"
+        f"<p>{rsid.capitalize()} is a SNP in the {gene} gene associated with {trait}.</p>"
+        "<table class=\"sortable smwtable\"><tbody><tr><th>Geno</th><th>Mag</th><th>Summary</th></tr>"
+        f"{linhas}</tbody></table>"
+        # Páginas reais têm dezenas de KB de navegação e scripts em volta do conteúdo
+        f"<div id=\"rodape\">{'<p>navigation</p>' * 200}</div>"
+        "</div></div></body></html>"
+    )
+
+
+def documento_myvariant(rsid: str) -> dict:
+    aleatorio = random.Random(numero_rsid(rsid) * 31 + 7)
+    return {
+        "_id": f"chr{aleatorio.randint(1, 22)}:g.{aleatorio.randint(1, 10 ** 8)}A>G",
+        "query": rsid,
+        "dbsnp": {"rsid": rsid, "gene": {"symbol": aleatorio.choice(GENES)}},
+        "clinvar": {"clinical_significance": aleatorio.choice(["Benign", "Likely benign", "Pathogenic",
+                                                               "Uncertain significance"])},
+    }
+
+
+def carregar_gravacoes(html_dir: str | None, do_cache: bool, limite: int = 5000) -> tuple[dict, list]:
+    """({rsid: html} dos arquivos, [html] do cache HTTP) para responder com páginas reais."""
+    por_rsid, paginas = {}, []
+    if html_dir:
+        for arquivo in islice(sorted(Path(html_dir).glob("*.html")), limite):
+            por_rsid[arquivo.stem.lower()] = arquivo.read_text(encoding="utf-8")
+    if do_cache:
+        from utils.http_cache import CacheHTTP
+
+        paginas = list(islice(CacheHTTP().iterar("snpedia"), limite))
+    return por_rsid, paginas
+
+
+class StubFontes:
+    def __init__(self, latencia: float = 0.02, jitter: float = 0.01, taxa_erro: float = 0.0,
+                 slots: int = 64, taxa_ausentes: float = 0.0, gravacoes: tuple[dict, list] = ({}, []),
+                 semente: int = 42):
+        self.latencia = latencia
+        self.jitter = jitter
+        self.taxa_erro = taxa_erro
+        self.taxa_ausentes = taxa_ausentes
+        self.slots = asyncio.Semaphore(slots)
+        self.por_rsid, self.paginas = gravacoes
+        self.aleatorio = random.Random(semente)
+        self.atendidas = 0
+        self.servidor: asyncio.AbstractServer | None = None
+
+    @property
+    def porta(self) -> int:
+        return self.servidor.sockets[0].getsockname()[1]
+
+    async def iniciar(self, host: str = "127.0.0.1", porta: int = 0):
+        self.servidor = await asyncio.start_server(self._conexao, host, porta)
+        return self
+
+    async def _conexao(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                metodo, caminho, _ = linha.decode("latin-1").split(" ", 2)
+                cabecalhos = {}
+                while (h := await leitor.readline()) not in (b"\r\n", b"\n", b""):
+                    nome, _, valor = h.decode("latin-1").partition(":")
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                corpo = await leitor.readexactly(int(cabecalhos.get("content-length", 0)))
+                async with self.slots:
+                    await self._responder(metodo, caminho, corpo, escritor)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            escritor.close()
+
+    def _ausente(self, rsid: str) -> bool:
+        return self.taxa_ausentes > 0 and (numero_rsid(rsid) * 2654435761 % 1000) / 1000 < self.taxa_ausentes
+
+    def _pagina(self, rsid: str) -> str | None:
+        if self._ausente(rsid):
+            return None
+        if rsid.lower() in self.por_rsid:
+            return self.por_rsid[rsid.lower()]
+        if self.paginas:
+            return self.paginas[numero_rsid(rsid) % len(self.paginas)]
+        return pagina_sintetica(rsid)
+
+    async def _responder(self, metodo: str, caminho: str, corpo: bytes, escritor: asyncio.StreamWriter):
+        self.atendidas += 1
+        itens = 1
+        if metodo == "POST" and caminho.startswith("/v1/query"):
+            consulta = parse_qs(corpo.decode("utf-8"))
+            itens = len(consulta.get("q", [""])[0].split(","))
+        # Lotes grandes demoram mais no servidor real; o jitter é gaussiano, sem valores negativos
+        await asyncio.sleep(max(0.0, self.aleatorio.gauss(self.latencia, self.jitter)) * (1 + itens / 1000))
+
+        if self.taxa_erro and self.aleatorio.random() < self.taxa_erro:
+            self._escrever(escritor, 503, b'{"error": "sobrecarga simulada"}', "application/json",
+                           extra=b"Retry-After: 1\r\n")
+        elif caminho.startswith("/index.php/"):
+            pagina = self._pagina(unquote(caminho[len("/index.php/"):]))
+            if pagina is None:
+                self._escrever(escritor, 404, b"<html><body>There is currently no text in this page.</body></html>",
+                               "text/html; charset=UTF-8")
+            else:
+                self._escrever(escritor, 200, pagina.encode("utf-8"), "text/html; charset=UTF-8")
+        elif caminho.startswith("/v1/variant/"):
+            rsid = unquote(caminho[len("/v1/variant/"):].split("?")[0])
+            if self._ausente(rsid):
+                self._escrever(escritor, 404, b'{"success": false, "error": "ID not found"}', "application/json")
+            else:
+                self._escrever(escritor, 200, json.dumps(documento_myvariant(rsid)).encode(), "application/json")
+        elif metodo == "POST" and caminho.startswith("/v1/query"):
+            rsids = [r for r in consulta.get("q", [""])[0].split(",") if r]
+            hits = [{"query": r, "notfound": True} if self._ausente(r) else documento_myvariant(r) for r in rsids]
+            self._escrever(escritor, 200, json.dumps(hits).encode(), "application/json")
+        else:
+            self._escrever(escritor, 404, b"{}", "application/json")
+        await escritor.drain()
+
+    @staticmethod
+    def _escrever(escritor: asyncio.StreamWriter, status: int, corpo: bytes, tipo: str, extra: bytes = b""):
+        motivo = {200: "OK", 404: "Not Found", 503: "Service Unavailable"}[status]
+        escritor.write(f"HTTP/1.1 {status} {motivo}\r\nContent-Type: {tipo}\r\n".encode() + extra +
+                       f"Content-Length: {len(corpo)}\r\n\r\n".encode() + corpo)
+
+
+# ---------- processo separado (o cliente medido não disputa a CPU com o servidor) ----------
+
+
+def _servir_processo(configuracao: dict, portas: multiprocessing.Queue):
+    async def servir():
+        gravacoes = carregar_gravacoes(configuracao.pop("html_dir", None), configuracao.pop("do_cache", False))
+        # Um servidor por "site", para a latência por host das métricas sair separada
+        snpedia = await StubFontes(gravacoes=gravacoes, **configuracao).iniciar()
+        myvariant = await StubFontes(**configuracao).iniciar()
+        portas.put((snpedia.porta, myvariant.porta))
+        await asyncio.gather(snpedia.servidor.serve_forever(), myvariant.servidor.serve_forever())
+
+    asyncio.run(servir())
+
+
+def iniciar_em_processo(**configuracao) -> tuple[multiprocessing.Process, dict[str, str]]:
+    """
+    Sobe os dois servidores num processo filho e retorna (processo, variáveis de
+    ambiente) com URL_SNEDIA, API_MYVARIANT e API_MYVARIANT_QUERY apontando para eles.
+    """
+    portas: multiprocessing.Queue = multiprocessing.Queue()
+    processo = multiprocessing.Process(target=_servir_processo, args=(configuracao, portas), daemon=True)
+    processo.start()
+    porta_snpedia, porta_myvariant = portas.get(timeout=30)
+    return processo, {
+        "URL_SNEDIA": f"http://127.0.0.1:{porta_snpedia}/index.php/",
+        "API_MYVARIANT": f"http://127.0.0.1:{porta_myvariant}/v1/variant/",
+        "API_MYVARIANT_QUERY": f"http://127.0.0.1:{porta_myvariant}/v1/query",
+    }
+
+
+async def _servir(args):
+    gravacoes = carregar_gravacoes(args.html_dir, args.do_cache)
+    stub = await StubFontes(args.latencia, args.jitter, args.taxa_erro, args.slots, args.taxa_ausentes,
+                            gravacoes).iniciar(args.host, args.porta)
+    base = f"http://{args.host}:{stub.porta}"
+    print(f"🧪 SNPedia/MyVariant locais em {base}")
+    print(f"   URL_SNEDIA={base}/index.php/ API_MYVARIANT={base}/v1/variant/ API_MYVARIANT_QUERY={base}/v1/query")
+    async with stub.servidor:
+        await stub.servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SNPedia e MyVariant falsos para testes e benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8088)
+    parser.add_argument("--latencia", type=float, default=0.02, help="segundos por resposta (média)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="desvio padrão da latência")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="fração de respostas 503")
+    parser.add_argument("--taxa-ausentes", type=float, default=0.0, help="fração de rsIDs sem página (404)")
+    parser.add_argument("--slots", type=int, default=64, help="requisições atendidas em paralelo")
+    parser.add_argument("--html-dir", help="páginas gravadas <rsid>.html para reproduzir")
+    parser.add_argument("--do-cache", action="store_true", help="reproduz as páginas guardadas no cache HTTP")
+    asyncio.run(_servir(parser.parse_args()))
@@ -0,0 +1,117 @@
+# ./benchmarks/stub_llm.py
+import argparse
+import asyncio
+import json
+import time
+
+# ========== SERVIDOR LLM FALSO (compatível com /v1/chat/completions) ==========
+#
+# Só biblioteca padrão. Simula a latência de um servidor de modelo: tempo até o
+# primeiro token, intervalo entre tokens e um limite de requisições atendidas
+# em paralelo (como os slots de um llama.cpp / LM Studio). Respostas com
+# "stream": true saem como eventos SSE em transferência chunked, com keep-alive.
+
+
+class StubLLM:
+    def __init__(self, latencia: float = 0.2, tokens: int = 32, intervalo_token: float = 0.005,
+                 slots: int = 64, taxa_erro: float = 0.0):
+        self.latencia = latencia
+        self.tokens = tokens
+        self.intervalo_token = intervalo_token
+        self.taxa_erro = taxa_erro
+        self.slots = asyncio.Semaphore(slots)
+        self.atendidas = 0
+        self.servidor: asyncio.AbstractServer | None = None
+
+    @property
+    def porta(self) -> int:
+        return self.servidor.sockets[0].getsockname()[1]
+
+    async def iniciar(self, host: str = "127.0.0.1", porta: int = 0):
+        self.servidor = await asyncio.start_server(self._conexao, host, porta)
+        return self
+
+    async def fechar(self):
+        self.servidor.close()
+        await self.servidor.wait_closed()
+
+    async def _conexao(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                cabecalhos = {}
+                while (h := await leitor.readline()) not in (b"\r\n", b"\n", b""):
+                    nome, _, valor = h.decode("latin-1").partition(":")
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                corpo = await leitor.readexactly(int(cabecalhos.get("content-length", 0)))
+                await self._responder(json.loads(corpo or b"{}"), escritor)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _responder(self, pedido: dict, escritor: asyncio.StreamWriter):
+        async with self.slots:
+            self.atendidas += 1
+            await asyncio.sleep(self.latencia)
+            if self.taxa_erro and (self.atendidas * 7919 % 1000) / 1000 < self.taxa_erro:
+                corpo = b'{"error": "sobrecarga simulada"}'
+                escritor.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Type: application/json\r\n"
+                               b"Content-Length: " + str(len(corpo)).encode() + b"\r\n\r\n" + corpo)
+                await escritor.drain()
+                return
+
+            prompt = pedido.get("messages", [{}])[-1].get("content", "")
+            palavras = [f"tok{i}" for i in range(self.tokens)]
+            palavras[0] = f"[{len(prompt)}]"
+
+            if not pedido.get("stream"):
+                await asyncio.sleep(self.intervalo_token * self.tokens)
+                corpo = json.dumps({
+                    "object": "chat.completion", "model": pedido.get("model"), "created": int(time.time()),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(palavras)},
+                                 "finish_reason": "stop"}],
+                }).encode()
+                escritor.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                               b"Content-Length: " + str(len(corpo)).encode() + b"\r\n\r\n" + corpo)
+                await escritor.drain()
+                return
+
+            escritor.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                           b"Transfer-Encoding: chunked\r\n\r\n")
+            for i, palavra in enumerate(palavras):
+                delta = {"content": palavra if i == 0 else " " + palavra}
+                evento = {"object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta}]}
+                self._chunk(escritor, f"data: {json.dumps(evento)}\n\n".encode())
+                await escritor.drain()
+                await asyncio.sleep(self.intervalo_token)
+            self._chunk(escritor, b"data: [DONE]\n\n")
+            escritor.write(b"0\r\n\r\n")
+            await escritor.drain()
+
+    @staticmethod
+    def _chunk(escritor: asyncio.StreamWriter, dados: bytes):
+        escritor.write(f"{len(dados):x}\r\n".encode() + dados + b"\r\n")
+
+
+async def _servir(args):
+    stub = await StubLLM(args.latencia, args.tokens, args.intervalo_token, args.slots, args.taxa_erro).iniciar(
+        args.host, args.porta
+    )
+    print(f"🤖 Stub LLM em http://{args.host}:{stub.porta}/v1/chat/completions")
+    async with stub.servidor:
+        await stub.servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor LLM falso para testes e benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=1234)
+    parser.add_argument("--latencia", type=float, default=0.2, help="segundos até o primeiro token")
+    parser.add_argument("--tokens", type=int, default=32)
+    parser.add_argument("--intervalo-token", type=float, default=0.005)
+    parser.add_argument("--slots", type=int, default=64, help="requisições atendidas em paralelo")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="fração de respostas 503")
+    asyncio.run(_servir(parser.parse_args()))
@@ -0,0 +1,89 @@
+# ./cli.py
+import sys
+from importlib import import_module
+from pathlib import Path
+
+# ====== ENTRADA ÚNICA DO PIPELINE ======
+#
+#   python cli.py <subcomando> [opções do subcomando]
+#
+# Cada subcomando aponta para o main(argv) de um módulo, importado só quando o
+# subcomando roda: `cli.py --help` e `cli.py status` não carregam pandas,
+# httpx, scikit-learn nem matplotlib. Nenhuma pasta é criada antes de uma
+# etapa de fato gravar algo. benchmarks/bench_inicio.py confere o tempo de
+# inicialização contra ORCAMENTO_INICIO.
+
+SUBCOMANDOS = {
+    "map": ("main_pipeline:main", "enriquece os SNPs do genoma com SNPedia e MyVariant (retoma pelo manifesto)"),
+    "clean": ("tools.snp_cleaner:main", "mantém os registros com dados e texto descritivo"),
+    "match": ("tools.genotype_matcher:main", "mantém os SNPs cujo genótipo casa com um genótipo relevante"),
+    "cluster": ("tools.nlp_clustering:main", "clusteriza os textos dos SNPs e gera gráfico e relatórios"),
+    "interpret": ("tools.query_llm:main", "interpreta os genótipos casados com um LLM local"),
+    "run": ("tools.orquestrador:main", "todas as etapas em fluxo, sem pastas intermediárias"),
+    "status": ("cli:status", "resumo do manifesto: o que já foi processado e o que o próximo map vai retomar"),
+}
+
+
+def ajuda() -> str:
+    largura = max(map(len, SUBCOMANDOS))
+    linhas = ["uso: cli.py <subcomando> [opções]", "", "subcomandos:"]
+    linhas += [f"  {nome:<{largura}}  {descricao}" for nome, (_, descricao) in SUBCOMANDOS.items()]
+    linhas += ["", "Opções de cada subcomando: cli.py <subcomando> --help"]
+    return "\n".join(linhas)
+
+
+def carregar(alvo: str):
+    """'pacote.modulo:funcao' -> função, importando o módulo só agora."""
+    modulo, funcao = alvo.split(":")
+    return getattr(sys.modules[__name__] if modulo == "cli" else import_module(modulo), funcao)
+
+
+# ====== SUBCOMANDOS LEVES ======
+
+
+def status(argv=None):
+    import argparse
+    from config.env import CSV_ENTRADA, MANIFESTO_RESULTADOS
+    from utils.manifesto import ManifestoResultados, STATUS_OK, STATUS_RETENTAVEL, STATUS_SEM_SNPEDIA
+
+    parser = argparse.ArgumentParser(description=SUBCOMANDOS["status"][1])
+    parser.add_argument("--manifesto", default=MANIFESTO_RESULTADOS)
+    args = parser.parse_args(argv)
+
+    manifesto = ManifestoResultados(args.manifesto)
+    print(f"📄 Entrada: {CSV_ENTRADA} ({'encontrada' if Path(CSV_ENTRADA).exists() else 'não encontrada'})")
+    if not len(manifesto):
+        print(f"🗂️ Manifesto vazio ou ausente: {args.manifesto} (o próximo map processa tudo)")
+        return 0
+    resumo = manifesto.resumo()
+    print(f"🗂️ {len(manifesto)} SNPs no manifesto {args.manifesto}:")
+    for nome, total in resumo.most_common():
+        print(f"   {nome}: {total}")
+    falhas = sum(total for nome, total in resumo.items()
+                 if nome not in (STATUS_OK, STATUS_RETENTAVEL, STATUS_SEM_SNPEDIA))
+    print(f"🔁 O próximo map retoma {resumo.get(STATUS_RETENTAVEL, 0)} SNPs com falha transitória"
+          + (f"; {falhas} falhas definitivas só com --retentar-falhas" if falhas else ""))
+    if resumo.get(STATUS_SEM_SNPEDIA):
+        print(f"🔎 {resumo[STATUS_SEM_SNPEDIA]} SNPs sem página são conferidos de novo no índice da SNPedia")
+    return 0
+
+
+# ====== EXECUÇÃO ======
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(ajuda())
+        return 0
+    nome, *resto = argv
+    if nome not in SUBCOMANDOS:
+        print(f"❌ Subcomando desconhecido: {nome}\n\n{ajuda()}")
+        return 2
+    # O argparse de cada módulo mostra "cli.py <subcomando>" no uso
+    sys.argv[0] = f"{Path(sys.argv[0]).name} {nome}"
+    return carregar(SUBCOMANDOS[nome][0])(resto)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
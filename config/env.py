@@ -5,7 +5,122 @@ load_dotenv()
 
 CSV_ENTRADA = os.getenv("CSV_ENTRADA", "./data/data10.csv")
 CSV_SAIDA = os.getenv("CSV_SAIDA", "variants_com_mapeamento10.csv")
-CACHE_FILE = os.getenv("CACHE_FILE", "variant_cache10.pkl")
+CACHE_FILE = os.getenv("CACHE_FILE", "cache/http_cache.sqlite")
 API_MYVARIANT = os.getenv("API_MYVARIANT", "https://myvariant.info/v1/variant/")
 URL_SNEDIA = os.getenv("URL_SNEDIA", "https://www.snpedia.com/index.php/")
 SNP_MAPPING_SAIDA = os.getenv("SNP_MAPPING_SAIDA", "snps_data")
+
+# ====== CONCORRÊNCIA (modo async) ======
+
+def _ler_limites_por_host(valor: str, tipo=int) -> dict:
+    """Converte 'host=n,host2=m' em {'host': n, 'host2': m}."""
+    limites = {}
+    for par in valor.split(","):
+        if "=" in par:
+            host, n = par.split("=", 1)
+            limites[host.strip()] = tipo(n)
+    return limites
+
+CONCORRENCIA_MAX = int(os.getenv("CONCORRENCIA_MAX", 32))
+CONCORRENCIA_POR_HOST = int(os.getenv("CONCORRENCIA_POR_HOST", 8))
+LIMITES_POR_HOST = _ler_limites_por_host(
+    os.getenv("LIMITES_POR_HOST", "www.snpedia.com=8,myvariant.info=16")
+)
+
+# ====== POLÍTICA DE REDE (limite de taxa, novas tentativas, disjuntor) ======
+
+TIMEOUT_CONEXAO = float(os.getenv("TIMEOUT_CONEXAO", 5))
+TIMEOUT_LEITURA = float(os.getenv("TIMEOUT_LEITURA", 20))
+TAXA_POR_HOST = _ler_limites_por_host(  # requisições/s por host
+    os.getenv("TAXA_POR_HOST", "www.snpedia.com=10,bots.snpedia.com=5,myvariant.info=20"), float
+)
+TAXA_PADRAO = float(os.getenv("TAXA_PADRAO", 0))  # demais hosts; 0 = sem limite até o primeiro 429
+TAXA_APOS_LIMITE = float(os.getenv("TAXA_APOS_LIMITE", 10))  # ponto de partida de um host sem limite após um 429
+MAX_TENTATIVAS = int(os.getenv("MAX_TENTATIVAS", 4))
+BACKOFF_BASE = float(os.getenv("BACKOFF_BASE", 0.5))
+BACKOFF_MAX = float(os.getenv("BACKOFF_MAX", 30))
+DISJUNTOR_FALHAS = int(os.getenv("DISJUNTOR_FALHAS", 5))  # falhas seguidas que abrem o disjuntor do host
+DISJUNTOR_PAUSA = float(os.getenv("DISJUNTOR_PAUSA", 60))
+
+# ====== MYVARIANT EM LOTE ======
+
+API_MYVARIANT_QUERY = os.getenv("API_MYVARIANT_QUERY", "https://myvariant.info/v1/query")
+TAMANHO_LOTE_MYVARIANT = int(os.getenv("TAMANHO_LOTE_MYVARIANT", 1000))
+
+# ====== ANOTAÇÃO LOCAL (ClinVar/dbSNP importados, no lugar do MyVariant) ======
+
+ANOTACAO_LOCAL = os.getenv("ANOTACAO_LOCAL", "cache/anotacao_local.sqlite")
+MYVARIANT_BACKEND = os.getenv("MYVARIANT_BACKEND", "remoto")  # "remoto", "local" (sem rede) ou "misto" (ausentes vão ao MyVariant)
+
+# ====== CACHE HTTP PERSISTENTE ======
+
+CACHE_ATIVO = os.getenv("CACHE_ATIVO", "1") == "1"
+CACHE_TAMANHO_MAX_MB = int(os.getenv("CACHE_TAMANHO_MAX_MB", 2048))
+CACHE_TTLS = {  # segundos; 0 = nunca expira
+    "snpedia": int(os.getenv("CACHE_TTL_SNPEDIA", 30 * 24 * 3600)),
+    "myvariant": int(os.getenv("CACHE_TTL_MYVARIANT", 7 * 24 * 3600)),
+    "snpedia_wikitext": int(os.getenv("CACHE_TTL_SNPEDIA", 30 * 24 * 3600)),
+    "llm": int(os.getenv("CACHE_TTL_LLM", 0)),  # a chave já muda com modelo/template
+}
+
+# ====== ÍNDICE GLOBAL DE RESULTADOS ======
+
+MANIFESTO_RESULTADOS = os.getenv("MANIFESTO_RESULTADOS", "resultados/manifesto_snps.jsonl")
+
+# ====== COORTE (várias amostras, cada rsID anotado uma vez) ======
+
+COORTE_DIR = os.getenv("COORTE_DIR", "resultados/coorte")  # anotacoes/ compartilhadas + amostras/<nome>/
+MATRIZ_GENOTIPOS_DIR = os.getenv("MATRIZ_GENOTIPOS_DIR", "resultados/coorte/genotipos")  # 2 bits por chamada
+
+# ====== MÉTRICAS DA EXECUÇÃO ======
+
+METRICAS_DIR = os.getenv("METRICAS_DIR", "resultados/metricas")  # <data>.json + <data>.prom por execução
+ORCAMENTO_INICIO = float(os.getenv("ORCAMENTO_INICIO", 0.5))  # segundos para `cli.py --help`, `status` e `<etapa> --help`
+
+# ====== ARMAZENAMENTO DOS REGISTROS ======
+
+FORMATO_SAIDA = os.getenv("FORMATO_SAIDA", "jsonl")  # "jsonl" (shards) ou "json" (um arquivo por SNP)
+REGISTROS_POR_SHARD = int(os.getenv("REGISTROS_POR_SHARD", 50_000))
+
+# ====== EXTRAÇÃO DO HTML DA SNPEDIA ======
+
+SNPEDIA_EXTRATOR = os.getenv("SNPEDIA_EXTRATOR", "lxml")  # "lxml" (rápido) ou "bs4" (referência)
+
+# ====== ÍNDICE DE EXISTÊNCIA NA SNPEDIA ======
+
+INDICE_SNPEDIA = os.getenv("INDICE_SNPEDIA", "cache/indice_snpedia.npz")
+
+# ====== ÍNDICE GENÔMICO (consultas por região/gene) ======
+
+INDICE_GENOMICO_DIR = os.getenv("INDICE_GENOMICO_DIR", "resultados/indice_genomico")
+
+# ====== WIKITEXTO EM LOTE (API MediaWiki) ======
+
+SNPEDIA_FONTE = os.getenv("SNPEDIA_FONTE", "html")  # "html" (página renderizada) ou "wikitext" (API em lote)
+TAMANHO_LOTE_WIKITEXTO = int(os.getenv("TAMANHO_LOTE_WIKITEXTO", 50))  # limite da API para contas sem bot
+
+# ====== LEITURA DO GENOMA ======
+
+TAMANHO_BLOCO_LEITURA = int(os.getenv("TAMANHO_BLOCO_LEITURA", 100_000))
+
+# ====== INTERPRETAÇÃO POR LLM (endpoint compatível com OpenAI) ======
+
+LLM_ENDPOINT = os.getenv("LLM_ENDPOINT", "http://localhost:1234/v1/chat/completions")
+LLM_MODELO = os.getenv("LLM_MODELO", "akhilanilkumar_-_biogpt-baseline")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "")
+LLM_CONCORRENCIA = int(os.getenv("LLM_CONCORRENCIA", 8))
+LLM_TEMPERATURA = float(os.getenv("LLM_TEMPERATURA", 0.3))
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", 512))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 120))
+LLM_STREAM = os.getenv("LLM_STREAM", "1") == "1"
+LLM_SAIDA = os.getenv("LLM_SAIDA", "resultados/interpretacoes.jsonl")
+
+# ====== EMBEDDINGS DAS DESCRIÇÕES ======
+
+EMBEDDING_CODIFICADOR = os.getenv("EMBEDDING_CODIFICADOR", "hashing")  # "hashing" (CPU, offline) ou "sentence-transformers"
+EMBEDDING_MODELO = os.getenv("EMBEDDING_MODELO", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 256))  # só para o codificador "hashing"
+EMBEDDING_DIR = os.getenv("EMBEDDING_DIR", "resultados/embeddings")
+TAMANHO_LOTE_EMBEDDING = int(os.getenv("TAMANHO_LOTE_EMBEDDING", 1024))
+IVF_MINIMO_VETORES = int(os.getenv("IVF_MINIMO_VETORES", 50_000))  # a partir daqui a etapa constrói o índice IVF
+IVF_CAUDA_MAX = float(os.getenv("IVF_CAUDA_MAX", 0.1))  # fração de vetores fora do IVF que dispara a reconstrução
@@ -1,97 +1,58 @@
 # DEPRECATED: Este arquivo será posteriormente integrado a main_pipeline.py
+# A consulta ao LLM agora vive em tools/query_llm.py (async, concorrente e retomável);
+# este script só a aplica às linhas do CSV de entrada.
 
-from operator import index
 import pandas as pd
-import requests
-import time
 from pathlib import Path
+from tools.genome_reader import SEM_CHAMADA
+from tools.prompt_builder import genotipo_do_registro, montar_prompt
+from tools.query_llm import interpretar, imprimir_estatisticas_cache, SaidaInterpretacoes
 
 # ============ CONFIGURAÇÕES ============
 
 CSV_ENTRADA = "261855.csv"
 CSV_SAIDA = "analise_genetica_interpretada.csv"
-ENDPOINT = "http://localhost:1234/v1/chat/completions"
-MODELO = "akhilanilkumar_-_biogpt-baseline"
-
-# ============ FUNÇÃO: MONTA PROMPT ============
-
-def montar_prompt():
-    return (
-        f"Explique de forma clara e objetiva o impacto médico ou genético "
-        f"de ter o genótipo GG na variante rsID rs1805009."
-        f"Se não houver informação suficiente, responda 'Sem dados confiáveis disponíveis.'"
-    )
-    
-    """ return (
-        f"Explique de forma clara e objetiva o impacto médico ou genético "
-        f"de ter o genótipo {genotipo} na variante rsID {rsid}. "
-        f"Se não houver informação suficiente, responda 'Sem dados confiáveis disponíveis.'"
-    ) """
-
-# ============ FUNÇÃO: CONSULTA MODELO LOCAL ============
-
-def consultar_biogpt(prompt):
-    payload = {
-        "model": MODELO,
-        "messages": [
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.3,
-        "max_tokens": 512,
-        "stream": False
-    }
-    try:
-        response = requests.post(ENDPOINT, json=payload, timeout=30)
-        if response.ok:
-            return response.json()['choices'][0]['message']['content'].strip()
-        else:
-            return f"[Erro HTTP {response.status_code}]"
-    except Exception as e:
-        return f"[Erro de conexão: {str(e)}]"
+JSONL_SAIDA = "analise_genetica_interpretada.jsonl"
 
 # ============ FLUXO PRINCIPAL ============
 
 def processar_arquivo():
     # Verifica se o arquivo existe
-   """  if not Path(CSV_ENTRADA).exists():
+    if not Path(CSV_ENTRADA).exists():
         print(f"Arquivo não encontrado: {CSV_ENTRADA}")
         return
 
     df = pd.read_csv(CSV_ENTRADA, dtype=str)
+    # Célula vazia vira NaN (que seria lido como o genótipo "nan"); sem chamada não tem o que interpretar
+    chamados = df["RESULT"].notna() & ~df["RESULT"].fillna("").str.strip().str.upper().isin(SEM_CHAMADA)
+    if not chamados.all():
+        print(f"🧹 {int((~chamados).sum())} variantes sem genótipo chamado ignoradas.")
+    df = df[chamados]
+    itens = (
+        {"rsid": rsid, "genotipo": genotipo, "prompt": montar_prompt(rsid, genotipo)}
+        for rsid, genotipo in zip(df["RSID"], df["RESULT"].map(lambda g: genotipo_do_registro({"alelo": g})))
+    )
 
-    if Path(CSV_SAIDA).exists():
-        df_saida = pd.read_csv(CSV_SAIDA, dtype=str)
-        rsids_processados = set(df_saida["RSID"])
-        resultados = df_saida.to_dict(orient="records")
-        print(f"✔ {len(rsids_processados)} variantes já processadas.")
-    else:
-        rsids_processados = set()
-        resultados = []
-
-    total = len(df)
-    
-    for index, row in df.iterrows():
-        rsid = row["RSID"]
-        genotipo = row["RESULT"]
-
-        if rsid in rsids_processados:
-            print(f"[({index}+{1})/{total}] {rsid} → já processado, pulando.")
-            continue """
-
-prompt = montar_prompt()
-
-resposta = consultar_biogpt(prompt)
+    with SaidaInterpretacoes(JSONL_SAIDA) as saida:
+        if saida.concluidos:
+            print(f"✔ {len(saida.concluidos)} variantes já processadas.")
 
-resultados = []
+        def ao_falhar(item, erro):
+            print(f"⚠️ {item['rsid']}: {erro}")
+            saida.registrar_falha(item, erro)
 
-resultados.append({                  
-        "PROMPT": prompt,
-        "INTERPRETACAO": resposta
-})
-pd.DataFrame(resultados).to_csv(CSV_SAIDA, index=False)
+        interpretar(saida.pendentes(itens), saida.registrar, ao_falhar)
+    imprimir_estatisticas_cache()
 
-time.sleep(0.5)  
-print(f"\n🏁 Processamento finalizado. Total: {len(resultados)} variantes salvas em {CSV_SAIDA}")
+    resultados = pd.read_json(JSONL_SAIDA, lines=True) if Path(JSONL_SAIDA).stat().st_size else pd.DataFrame()
+    if "interpretacao" not in resultados:
+        print("❌ Nenhuma variante interpretada.")
+        return
+    resultados = resultados[resultados["interpretacao"].notna()].drop_duplicates("rsid", keep="last")
+    resultados.rename(columns={"rsid": "RSID", "prompt": "PROMPT", "interpretacao": "INTERPRETACAO"})[
+        ["RSID", "PROMPT", "INTERPRETACAO"]
+    ].to_csv(CSV_SAIDA, index=False)
+    print(f"\n🏁 Processamento finalizado. Total: {len(resultados)} variantes salvas em {CSV_SAIDA}")
 
 
 # ============ EXECUÇÃO ============
@@ -0,0 +1,224 @@
+# ./embedding/armazem.py
+import json
+from pathlib import Path
+from typing import Iterable
+import numpy as np
+from config.env import EMBEDDING_DIR, IVF_MINIMO_VETORES, IVF_CAUDA_MAX
+
+# ========== ARMAZÉM DE VETORES (float16 em memmap) ==========
+#
+#   vetores.f16  matriz N x dim em float16, só anexada, lida por np.memmap
+#   rsids.txt    rsID de cada linha, na mesma ordem
+#   meta.json    dim e codificador que geraram os vetores
+#   ivf.npz      (opcional) índice aproximado: centróides e linhas por lista
+#
+# A busca exata percorre a matriz em blocos, então só o bloco corrente e o
+# top-k ficam em RAM; o resto do arquivo é paginado pelo sistema operacional.
+# A aproximada (IVF, o padrão quando ivf.npz existe) só lê as linhas das
+# listas mais próximas da consulta.
+
+BLOCO_BUSCA = 1 << 17  # linhas por bloco na busca exata
+N_SONDAS = 8  # listas do IVF visitadas por consulta
+
+
+class ArmazemVetores:
+    def __init__(self, diretorio: Path | str = EMBEDDING_DIR, dim: int | None = None, codificador: str | None = None):
+        self.diretorio = Path(diretorio)
+        self.caminho_vetores = self.diretorio / "vetores.f16"
+        self.caminho_rsids = self.diretorio / "rsids.txt"
+        self.caminho_meta = self.diretorio / "meta.json"
+        self.caminho_ivf = self.diretorio / "ivf.npz"
+
+        meta = json.loads(self.caminho_meta.read_text(encoding="utf-8")) if self.caminho_meta.exists() else {}
+        if meta and dim is not None and meta["dim"] != dim:
+            raise ValueError(f"Armazém em {self.diretorio} tem dim={meta['dim']}, não {dim}.")
+        if meta and codificador is not None and meta["codificador"] != codificador:
+            raise ValueError(f"Armazém em {self.diretorio} foi gerado com '{meta['codificador']}', não '{codificador}'.")
+        self.dim = meta.get("dim", dim)
+        self.codificador = meta.get("codificador", codificador)
+        if self.dim is None:
+            raise ValueError(f"Nenhum armazém em {self.diretorio}; informe `dim` para criar um.")
+
+        self.rsids: list[str] = []
+        if self.caminho_rsids.exists():
+            self.rsids = self.caminho_rsids.read_text(encoding="utf-8").split()
+        self._reconciliar()
+        self.indice = {rsid: i for i, rsid in enumerate(self.rsids)}  # a última versão vence
+        # Linhas substituídas por uma versão mais nova do mesmo rsID ficam fora da busca
+        self.ativos = np.zeros(len(self.rsids), dtype=bool)
+        self.ativos[list(self.indice.values())] = True
+        self._mapa = None
+        self._ivf = None
+
+    def _reconciliar(self):
+        """Após uma interrupção, vetores e rsIDs podem ter tamanhos diferentes: corta no menor."""
+        linhas = self.caminho_vetores.stat().st_size // (2 * self.dim) if self.caminho_vetores.exists() else 0
+        n = min(linhas, len(self.rsids))
+        if linhas != n:
+            with open(self.caminho_vetores, "r+b") as f:
+                f.truncate(n * 2 * self.dim)
+        if len(self.rsids) != n:
+            self.rsids = self.rsids[:n]
+            self.caminho_rsids.write_text("".join(f"{r}\n" for r in self.rsids), encoding="utf-8")
+
+    def __len__(self):
+        return len(self.rsids)
+
+    def __contains__(self, rsid: str) -> bool:
+        return rsid in self.indice
+
+    @property
+    def matriz(self) -> np.ndarray:
+        """Matriz N x dim só leitura (mapeada do disco, sem carregar na RAM)."""
+        if self._mapa is None or len(self._mapa) != len(self.rsids):
+            if not self.rsids:
+                return np.zeros((0, self.dim), dtype=np.float16)
+            self._mapa = np.memmap(self.caminho_vetores, dtype=np.float16, mode="r", shape=(len(self.rsids), self.dim))
+        return self._mapa
+
+    def adicionar(self, rsids: list[str], vetores: np.ndarray):
+        if vetores.shape != (len(rsids), self.dim):
+            raise ValueError(f"Esperado {len(rsids)} x {self.dim}, recebido {vetores.shape}.")
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        if not self.caminho_meta.exists():
+            self.caminho_meta.write_text(json.dumps({"dim": self.dim, "codificador": self.codificador}), encoding="utf-8")
+        # Vetores antes dos rsIDs: uma interrupção no meio é corrigida por _reconciliar
+        with open(self.caminho_vetores, "ab") as f:
+            f.write(np.ascontiguousarray(vetores, dtype=np.float16).tobytes())
+        with open(self.caminho_rsids, "a", encoding="utf-8") as f:
+            f.write("".join(f"{r}\n" for r in rsids))
+        ativos = np.ones(len(rsids), dtype=bool)
+        for j, rsid in enumerate(rsids):
+            anterior = self.indice.get(rsid)
+            if anterior is not None:
+                if anterior < len(self.ativos):
+                    self.ativos[anterior] = False
+                else:
+                    ativos[anterior - len(self.ativos)] = False
+            self.indice[rsid] = len(self.rsids)
+            self.rsids.append(rsid)
+        self.ativos = np.concatenate([self.ativos, ativos])
+
+    def vetor(self, rsid: str) -> np.ndarray | None:
+        i = self.indice.get(rsid)
+        return None if i is None else np.asarray(self.matriz[i], dtype=np.float32)
+
+    def _top_k(self, sims: np.ndarray, linhas: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        if sims.shape[1] > k:
+            top = np.argpartition(-sims, k, axis=1)[:, :k]
+            return np.take_along_axis(sims, top, axis=1), linhas[top]
+        return sims, np.broadcast_to(linhas, sims.shape)
+
+    def _formatar(self, melhores_sim: np.ndarray, melhores_idx: np.ndarray) -> list[list[tuple[str, float]]]:
+        resultados = []
+        for sims, idxs in zip(melhores_sim, melhores_idx):
+            ordem = np.argsort(-sims)
+            resultados.append([(self.rsids[i], float(s)) for i, s in zip(idxs[ordem], sims[ordem]) if np.isfinite(s)])
+        return resultados
+
+    def buscar(self, consultas: np.ndarray, k: int = 10, excluir: Iterable[str] = (),
+               aproximado: bool = True, n_sondas: int = N_SONDAS,
+               bloco: int = BLOCO_BUSCA) -> list[list[tuple[str, float]]]:
+        """
+        k vizinhos mais próximos (cosseno) de cada consulta. Retorna, por
+        consulta, [(rsid, similaridade), ...]. Se há um índice IVF construído,
+        só as `n_sondas` listas mais próximas são lidas; aproximado=False força
+        a varredura exata.
+        """
+        consultas = np.atleast_2d(np.asarray(consultas, dtype=np.float32))
+        ativos = self.ativos.copy()
+        ativos[[self.indice[r] for r in excluir if r in self.indice]] = False
+        if aproximado and self.ivf is not None:
+            return self._buscar_ivf(consultas, k, ativos, n_sondas)
+
+        melhores_sim = np.full((len(consultas), 0), -np.inf, dtype=np.float32)
+        melhores_idx = np.zeros((len(consultas), 0), dtype=np.int64)
+        matriz = self.matriz
+        for inicio in range(0, len(matriz), bloco):
+            parte = np.asarray(matriz[inicio:inicio + bloco], dtype=np.float32)
+            sims = consultas @ parte.T  # n_consultas x linhas do bloco
+            sims[:, ~ativos[inicio:inicio + len(parte)]] = -np.inf
+            sims, idx = self._top_k(sims, np.arange(inicio, inicio + len(parte)), k)
+            melhores_sim = np.concatenate([melhores_sim, sims], axis=1)
+            melhores_idx = np.concatenate([melhores_idx, idx], axis=1)
+            if melhores_sim.shape[1] > k:
+                manter = np.argpartition(-melhores_sim, k, axis=1)[:, :k]
+                melhores_sim = np.take_along_axis(melhores_sim, manter, axis=1)
+                melhores_idx = np.take_along_axis(melhores_idx, manter, axis=1)
+        return self._formatar(melhores_sim, melhores_idx)
+
+    # ---------- índice aproximado (IVF) ----------
+
+    @property
+    def ivf(self) -> dict | None:
+        if self._ivf is None and self.caminho_ivf.exists():
+            with np.load(self.caminho_ivf) as dados:
+                self._ivf = {nome: dados[nome] for nome in dados.files}
+        return self._ivf
+
+    def construir_ivf(self, n_listas: int | None = None, amostra: int = 200_000):
+        """
+        Agrupa os vetores em `n_listas` listas (k-means sobre uma amostra) e
+        grava as linhas de cada lista. Linhas anexadas depois da construção
+        continuam sendo encontradas: a busca as percorre de forma exata.
+        """
+        from sklearn.cluster import MiniBatchKMeans
+
+        n = len(self)
+        n_listas = n_listas or max(1, int(np.sqrt(n)))
+        aleatorio = np.random.default_rng(42)
+        linhas_amostra = np.sort(aleatorio.choice(n, size=min(n, amostra), replace=False))
+        kmeans = MiniBatchKMeans(n_clusters=n_listas, random_state=42, n_init=1, batch_size=4096)
+        kmeans.fit(np.asarray(self.matriz[linhas_amostra], dtype=np.float32))
+
+        listas = np.empty(n, dtype=np.int32)
+        for inicio in range(0, n, BLOCO_BUSCA):
+            listas[inicio:inicio + BLOCO_BUSCA] = kmeans.predict(np.asarray(self.matriz[inicio:inicio + BLOCO_BUSCA], dtype=np.float32))
+        ordem = np.argsort(listas, kind="stable")
+        inicios = np.searchsorted(listas[ordem], np.arange(n_listas + 1))
+        np.savez(self.caminho_ivf, centroides=kmeans.cluster_centers_.astype(np.float32),
+                 ordem=ordem.astype(np.int64), inicios=inicios.astype(np.int64), n_indexados=np.int64(n))
+        self._ivf = None
+
+    def atualizar_ivf(self, minimo: int = IVF_MINIMO_VETORES, cauda_max: float = IVF_CAUDA_MAX) -> bool:
+        """
+        Constrói o IVF quando o armazém chega a `minimo` vetores, e o reconstrói
+        quando mais de `cauda_max` deles foram anexados depois da última
+        construção (essa cauda é percorrida de forma exata a cada consulta).
+        Retorna True se construiu.
+        """
+        n = len(self)
+        if n < minimo:
+            return False
+        ivf = self.ivf
+        if ivf is not None and n - int(ivf["n_indexados"]) <= cauda_max * n:
+            return False
+        self.construir_ivf()
+        return True
+
+    def _buscar_ivf(self, consultas: np.ndarray, k: int, ativos: np.ndarray, n_sondas: int):
+        ivf = self.ivf
+        centroides, ordem, inicios = ivf["centroides"], ivf["ordem"], ivf["inicios"]
+        cauda = np.arange(int(ivf["n_indexados"]), len(self))
+        n_sondas = min(n_sondas, len(centroides))
+        # Mesma métrica da atribuição às listas (euclidiana): -||q - c||² + cte = 2 q·c - ||c||²
+        proximidade = 2 * (consultas @ centroides.T) - (centroides ** 2).sum(axis=1)
+        sondas = np.argpartition(-proximidade, n_sondas - 1, axis=1)[:, :n_sondas]
+
+        melhores_sim, melhores_idx = [], []
+        for consulta, listas in zip(consultas, sondas):
+            linhas = np.sort(np.concatenate([ordem[inicios[l]:inicios[l + 1]] for l in listas] + [cauda]))
+            linhas = linhas[ativos[linhas]]
+            sims = np.asarray(self.matriz[linhas], dtype=np.float32) @ consulta
+            sims, idx = self._top_k(sims[None, :], linhas, k)
+            preencher = k - sims.shape[1]  # listas com menos de k linhas
+            melhores_sim.append(np.pad(sims[0], (0, max(preencher, 0)), constant_values=-np.inf))
+            melhores_idx.append(np.pad(idx[0], (0, max(preencher, 0))))
+        return self._formatar(np.array(melhores_sim), np.array(melhores_idx))
+
+    def similares(self, rsid: str, k: int = 10, aproximado: bool = True) -> list[tuple[str, float]]:
+        """SNPs cuja descrição é mais parecida com a de `rsid` (excluindo ele mesmo)."""
+        vetor = self.vetor(rsid)
+        if vetor is None:
+            raise KeyError(f"{rsid} não está no armazém de vetores.")
+        return self.buscar(vetor, k, excluir=[rsid], aproximado=aproximado)[0]
@@ -0,0 +1,80 @@
+# ./embedding/codificadores.py
+from typing import Callable
+import numpy as np
+from config.env import EMBEDDING_CODIFICADOR, EMBEDDING_MODELO, EMBEDDING_DIM
+
+# ========== CODIFICADORES DE TEXTO ==========
+#
+# Todo codificador tem `nome`, `dim` e `codificar(textos) -> np.ndarray`
+# (float32, len(textos) x dim, linhas com norma 1: produto interno = cosseno).
+
+
+def _normalizar(vetores: np.ndarray) -> np.ndarray:
+    normas = np.linalg.norm(vetores, axis=1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return (vetores / normas).astype(np.float32)
+
+
+class CodificadorHashing:
+    """
+    Padrão: só CPU, sem download nem treino. Palavras e bigramas viram um
+    vetor esparso por hashing, projetado em `dim` dimensões por uma matriz
+    aleatória esparsa de semente fixa (Johnson-Lindenstrauss), então o mesmo
+    texto gera sempre o mesmo vetor, em qualquer máquina.
+    """
+
+    nome = "hashing"
+    N_FEATURES = 2 ** 18
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        from scipy import sparse
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.random_projection import SparseRandomProjection
+
+        self.dim = dim
+        self.vetorizador = HashingVectorizer(
+            n_features=self.N_FEATURES,
+            ngram_range=(1, 2),
+            token_pattern=r"\b[a-zA-Z][a-zA-Z\-]+\b",
+            alternate_sign=False,
+            norm="l2",
+            dtype=np.float32,
+        )
+        # A projeção só precisa do número de colunas para sortear a matriz
+        self.projecao = SparseRandomProjection(n_components=dim, dense_output=True, random_state=42)
+        self.projecao.fit(sparse.csr_matrix((1, self.N_FEATURES), dtype=np.float32))
+
+    def codificar(self, textos: list[str]) -> np.ndarray:
+        return _normalizar(self.projecao.transform(self.vetorizador.transform(textos)))
+
+
+class CodificadorSentenceTransformers:
+    """Modelo de sentenças (opcional: requer `sentence-transformers` e o modelo baixado)."""
+
+    nome = "sentence-transformers"
+
+    def __init__(self, modelo: str = EMBEDDING_MODELO):
+        from sentence_transformers import SentenceTransformer
+
+        self.modelo = SentenceTransformer(modelo, device="cpu")
+        self.dim = self.modelo.get_sentence_embedding_dimension()
+
+    def codificar(self, textos: list[str]) -> np.ndarray:
+        return _normalizar(np.asarray(self.modelo.encode(textos, batch_size=64, show_progress_bar=False)))
+
+
+CODIFICADORES: dict[str, Callable[[], object]] = {
+    "hashing": CodificadorHashing,
+    "sentence-transformers": CodificadorSentenceTransformers,
+}
+
+
+def obter_codificador(nome: str = EMBEDDING_CODIFICADOR):
+    """Codificador configurado; cai para o de hashing se o opcional não estiver instalado."""
+    if nome not in CODIFICADORES:
+        raise ValueError(f"Codificador desconhecido: {nome} (opções: {', '.join(CODIFICADORES)})")
+    try:
+        return CODIFICADORES[nome]()
+    except ImportError:
+        print(f"⚠️ Codificador '{nome}' indisponível; usando 'hashing'.")
+        return CodificadorHashing()
@@ -0,0 +1,92 @@
+# ./embedding/embutir.py
+import argparse
+import time
+from typing import Iterable, Iterator
+from config.env import EMBEDDING_CODIFICADOR, EMBEDDING_DIR, TAMANHO_LOTE_EMBEDDING
+from embedding.armazem import ArmazemVetores
+from embedding.codificadores import obter_codificador
+from utils.lotes import dividir_em_lotes
+
+# ========== ETAPA DE EMBEDDINGS ==========
+
+
+def abrir_armazem(diretorio: str = EMBEDDING_DIR, codificador=None) -> ArmazemVetores:
+    """Armazém existente, ou um novo com a dimensão do codificador."""
+    if codificador is None:
+        return ArmazemVetores(diretorio)
+    return ArmazemVetores(diretorio, dim=codificador.dim, codificador=codificador.nome)
+
+
+def embutir_registros(registros: Iterable[dict], armazem: ArmazemVetores | None = None, codificador=None,
+                      tamanho_lote: int = TAMANHO_LOTE_EMBEDDING, reembutir: bool = False) -> Iterator[dict]:
+    """
+    Etapa em fluxo: codifica trait/resumo/descricao_livre em lotes, anexa os
+    vetores ao armazém e repassa cada registro adiante sem alterá-lo. rsIDs já
+    presentes no armazém são pulados, a menos que `reembutir`. No fim, o
+    índice IVF é construído ou renovado se o armazém já é grande (atualizar_ivf).
+    """
+    from tools.nlp_clustering import textos_snps
+
+    if codificador is None:
+        codificador = obter_codificador()
+    if armazem is None:
+        armazem = abrir_armazem(codificador=codificador)
+    for lote in dividir_em_lotes(registros, tamanho_lote):
+        textos = [t for t in textos_snps(lote) if reembutir or t["rsid"] not in armazem]
+        if textos:
+            armazem.adicionar([t["rsid"] for t in textos], codificador.codificar([t["texto"] for t in textos]))
+        yield from lote
+
+    inicio = time.perf_counter()
+    if armazem.atualizar_ivf():
+        print(f"🧭 Índice IVF com {len(armazem)} vetores em {time.perf_counter() - inicio:.1f}s")
+
+
+def main(argv=None):
+    from utils.record_store import iterar_registros
+
+    parser = argparse.ArgumentParser(description="Embeddings das descrições dos SNPs e busca por similares.")
+    parser.add_argument("--armazem", default=EMBEDDING_DIR, help="pasta do armazém de vetores")
+    parser.add_argument("--codificador", default=EMBEDDING_CODIFICADOR)
+    acoes = parser.add_mutually_exclusive_group(required=True)
+    acoes.add_argument("--entrada", help="pasta de registros a embutir")
+    acoes.add_argument("--similares", metavar="RSID", help="SNPs com descrição parecida com a deste rsID")
+    acoes.add_argument("--consulta", metavar="TEXTO", help="SNPs com descrição parecida com um texto livre")
+    acoes.add_argument("--construir-ivf", action="store_true", help="constrói o índice aproximado do armazém")
+    parser.add_argument("--reembutir", action="store_true", help="codifica de novo rsIDs já presentes")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--exato", action="store_true", help="varredura exata, mesmo com o índice IVF construído")
+    args = parser.parse_args(argv)
+
+    if args.entrada:
+        codificador = obter_codificador(args.codificador)
+        armazem = abrir_armazem(args.armazem, codificador)
+        antes, inicio = len(armazem), time.perf_counter()
+        total = sum(1 for _ in embutir_registros(iterar_registros(args.entrada), armazem, codificador,
+                                                 reembutir=args.reembutir))
+        print(f"✅ {len(armazem) - antes} vetores novos de {total} registros em {time.perf_counter() - inicio:.1f}s "
+              f"({len(armazem)} no armazém: {armazem.diretorio.resolve()})")
+        return 0
+
+    armazem = ArmazemVetores(args.armazem)
+    if args.construir_ivf:
+        inicio = time.perf_counter()
+        armazem.construir_ivf()
+        print(f"✅ Índice IVF com {len(armazem)} vetores em {time.perf_counter() - inicio:.1f}s")
+        return 0
+
+    codificador = obter_codificador(armazem.codificador) if args.consulta else None
+    inicio = time.perf_counter()
+    if args.similares:
+        vizinhos = armazem.similares(args.similares, args.k, aproximado=not args.exato)
+    else:
+        vizinhos = armazem.buscar(codificador.codificar([args.consulta]), args.k, aproximado=not args.exato)[0]
+    duracao = (time.perf_counter() - inicio) * 1000
+    for rsid, similaridade in vizinhos:
+        print(f"{rsid:>14}  {similaridade:.3f}")
+    print(f"⏱️ {duracao:.1f} ms em {len(armazem)} vetores")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,51 +1,216 @@
 # ./main_pipeline.py
-import pandas as pd
+import argparse
+from datetime import datetime
 from pathlib import Path
-from tqdm import tqdm
-from config.env import CSV_ENTRADA
-from tools.snp_mapper import consultar_snpedia_completa
-from utils.json_tools import snp_ja_processado, salvar_json_snp
+from typing import TYPE_CHECKING, Callable
+from config.env import CSV_ENTRADA, CONCORRENCIA_MAX, TAMANHO_LOTE_MYVARIANT, SNPEDIA_FONTE
+from utils.lotes import dividir_em_lotes
+from utils.manifesto import ManifestoResultados, STATUS_OK, STATUS_FALHA, STATUS_SEM_SNPEDIA, STATUS_RETENTAVEL
+from utils.metricas import METRICAS, contar, cronometro
+
+if TYPE_CHECKING:
+    from tools.snpedia_index import IndiceSNPedia
+
+# pandas, httpx, bs4 e mwclient entram só nas funções que os usam: importar este
+# módulo (ou rodar `cli.py map --help`) não paga a inicialização deles
 
 # ====== CONFIGURAÇÕES ======
 
 
-PASTA_SAIDA = Path("resultados/snp_mapping_data") / pd.Timestamp.now().strftime(
-    "%Y-%m-%d_%H-%M-%S"
-)
-PASTA_SAIDA.mkdir(parents=True, exist_ok=True)
+RAIZ_SAIDA = Path("resultados/snp_mapping_data")
+
+
+def pasta_saida() -> Path:
+    """Pasta desta execução, com a data de início (criada só quando há registros a gravar)."""
+    return RAIZ_SAIDA / datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+# ====== MODOS DE PROCESSAMENTO ======
+
+
+def filtrar_por_indice_snpedia(linhas: list, indice: "IndiceSNPedia | None", manifesto: ManifestoResultados | None) -> list:
+    """Descarta, sem nenhuma requisição, os rsIDs que não têm página na SNPedia."""
+    if indice is None:
+        return linhas
+    existe = indice.contem_lote([linha[0] for linha in linhas])
+    if manifesto is not None:
+      for linha, tem_pagina in zip(linhas, existe):
+        # Reverificados que continuam sem página já estão no manifesto: não anexa de novo
+        if not tem_pagina and manifesto.status(linha[0]) != STATUS_SEM_SNPEDIA:
+          manifesto.registrar(linha[0], STATUS_SEM_SNPEDIA)
+    return [linha for linha, tem_pagina in zip(linhas, existe) if tem_pagina]
+
+
+def linhas_pendentes(caminho: str, manifesto: ManifestoResultados | None, retentar_falhas: bool = False,
+                     retomar: Callable[[str], bool] | None = None):
+    """
+    Lê o genoma em blocos e entrega (rsid, chromosome, position, alelo) só dos
+    SNPs que ainda não estão no manifesto e que têm página na SNPedia.
+    Sem manifesto, entrega todos os SNPs com página. Os marcados sem página
+    em execuções anteriores são conferidos de novo no índice atual (que pode
+    ter sido atualizado); sem índice, continuam pulados. `retomar(rsid)` é
+    chamado para cada SNP pulado pelo manifesto; se devolver False (resultado
+    não encontrado), o SNP é processado de novo.
+    """
+    from tools.genome_reader import ler_genoma_em_blocos
+    from tools.snpedia_index import IndiceSNPedia
+
+    indice = IndiceSNPedia.carregar()
+    reverificar = indice is not None
+
+    def pendente(rsid: str) -> bool:
+      if manifesto is None or not manifesto.ja_processado(
+          rsid, retentar_falhas=retentar_falhas, reverificar_sem_snpedia=reverificar):
+        return True
+      return retomar is not None and not retomar(rsid)
+
+    for bloco in ler_genoma_em_blocos(caminho):
+      linhas = [
+        (rsid, str(chrom), str(pos), alelo)
+        for rsid, chrom, pos, alelo in zip(bloco["RSID"], bloco["CHROMOSOME"], bloco["POSITION"], bloco["RESULT"])
+        if pendente(rsid)
+      ]
+      yield from filtrar_por_indice_snpedia(linhas, indice, manifesto)
+
+
+def processar_sequencial(linhas, ao_concluir, ao_falhar):
+    from tools.load_map_variants import consultar_myvariant_lote, anotacao_myvariant
+    from tools.snp_mapper import consultar_snpedia_completa
+
+    # MyVariant em lote: uma requisição por TAMANHO_LOTE_MYVARIANT linhas
+    for lote in dividir_em_lotes(linhas, TAMANHO_LOTE_MYVARIANT):
+      anotacoes = consultar_myvariant_lote([linha[0] for linha in lote])
+      for rsid, chrom, pos, alelo in lote:
+        try:
+            dados = consultar_snpedia_completa(
+              rsid, chrom, pos, alelo, myvariant=anotacao_myvariant(anotacoes, rsid)
+            )
+        except Exception as e:
+          ao_falhar(rsid, e)
+          continue
+        ao_concluir(rsid, dados)
+
+
+def processar_wikitext(linhas, ao_concluir, ao_falhar):
+    from tools.load_map_variants import consultar_myvariant_lote
+    from tools.snp_mapper import consultar_snpedia_lote_wikitext
+
+    # Wikitexto pela API MediaWiki: poucas consultas por lote, sem HTML para parsear
+    for lote in dividir_em_lotes(linhas, TAMANHO_LOTE_MYVARIANT):
+      anotacoes = consultar_myvariant_lote([linha[0] for linha in lote])
+      try:
+        resultados = consultar_snpedia_lote_wikitext(lote, anotacoes)
+      except Exception as e:
+        resultados = {linha[0]: e for linha in lote}
+      for rsid, *_ in lote:
+        dados = resultados[rsid]
+        if isinstance(dados, Exception):
+          ao_falhar(rsid, dados)
+        else:
+          ao_concluir(rsid, dados)
+
+
+def processar_async(linhas, ao_concluir, ao_falhar, concorrencia: int = CONCORRENCIA_MAX):
+    from tools.async_enrichment import enriquecer
+
+    enriquecer(linhas, ao_concluir, ao_falhar, concorrencia)
+
+
+def processar(linhas, ao_concluir, ao_falhar, fonte: str = SNPEDIA_FONTE,
+              modo_async: bool = False, concorrencia: int = CONCORRENCIA_MAX):
+    """Enriquece as linhas no modo escolhido, chamando ao_concluir(rsid, dados) ou ao_falhar(rsid, erro)."""
+    if fonte == "wikitext":
+      processar_wikitext(linhas, ao_concluir, ao_falhar)
+    elif modo_async:
+      processar_async(linhas, ao_concluir, ao_falhar, concorrencia)
+    else:
+      processar_sequencial(linhas, ao_concluir, ao_falhar)
 
 # ====== EXECUÇÃO PRINCIPAL ======
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mapeia SNPs do CSV com SNPedia e MyVariant.")
+    parser.add_argument("--async", dest="modo_async", action="store_true",
+                        help="enriquece em paralelo com um cliente httpx assíncrono")
+    parser.add_argument("--concorrencia", type=int, default=CONCORRENCIA_MAX,
+                        help="máximo de SNPs em processamento simultâneo no modo async")
+    parser.add_argument("--fonte", choices=["html", "wikitext"], default=SNPEDIA_FONTE,
+                        help="páginas HTML renderizadas ou wikitexto em lote pela API MediaWiki")
+    parser.add_argument("--retentar-falhas", action="store_true",
+                        help="processa de novo os rsIDs que falharam em execuções anteriores")
+    parser.add_argument("--coorte", metavar="PASTA",
+                        help="pasta com vários genomas: cada rsID distinto é anotado uma vez e juntado a cada amostra")
+    args = parser.parse_args(argv)
+
+    if args.coorte:
+      from tools.coorte import processar_coorte
+
+      pastas = processar_coorte(args.coorte, fonte=args.fonte, modo_async=args.modo_async,
+                                concorrencia=args.concorrencia)
+      for nome, pasta in pastas.items():
+        print(f"✅ {nome}: {pasta.resolve()}")
+      METRICAS.imprimir_resumo()
+      print(f"📊 Métricas em {METRICAS.exportar()}")
+      return
+
+    from tqdm import tqdm
+    from tools.genome_reader import detectar_formato
+    from utils.http_cache import obter_cache
+    from utils.politica_rede import ErroTransitorio
+    from utils.record_store import EscritorRegistros
+
     # Verifica CSV de entrada
     if not Path(CSV_ENTRADA).exists():
         print(f"❌ CSV de entrada não encontrado: {CSV_ENTRADA}")
         exit(1)
 
-    # Carrega lista única de RSIDs
-    df = pd.read_csv(CSV_ENTRADA, dtype=str)
+    # Formato do genoma (CSV do projeto, 23andMe ou Ancestry)
+    try:
+      detectar_formato(CSV_ENTRADA)
+    except ValueError as e:
+      print(f"❌ {e}")
+      return
 
+    # Manifesto global: retoma de qualquer execução anterior
+    manifesto = ManifestoResultados()
+    if len(manifesto):
+      print(f"✔ {len(manifesto)} SNPs já no manifesto: {dict(manifesto.resumo())}")
 
-    if not all(col in df.columns for col in ["RSID", "CHROMOSOME", "POSITION", "RESULT"]):
-      print("❌ Colunas esperadas não encontradas no CSV.")
-      return
+    # Lido em blocos: a memória não cresce com o tamanho do arquivo
+    linhas = linhas_pendentes(CSV_ENTRADA, manifesto, retentar_falhas=args.retentar_falhas)
+    saida = pasta_saida()
+    escritor = EscritorRegistros(saida)
+    try:
+      with tqdm(desc="Processando SNPs", unit="SNP") as barra:
 
-    # Processa cada linha
-    for rsid, chrom, pos, alelo in tqdm(
-      zip(df["RSID"], df["CHROMOSOME"], df["POSITION"], df["RESULT"]),
-      total=len(df),
-      desc="Processando SNPs",
-      unit="SNP"):
-      if snp_ja_processado(rsid, PASTA_SAIDA):
-        continue
-      try:
-          dados = consultar_snpedia_completa(rsid, chrom, pos, alelo)
-          salvar_json_snp(rsid, dados, PASTA_SAIDA)
-      except Exception as e:
-        print(f"⚠️ Erro ao processar {rsid}: {e}")
-    
-    print(f"\n✅ Pipeline finalizado. JSONs em: {PASTA_SAIDA.resolve()}")
+        def ao_concluir(rsid, dados):
+          with cronometro("gravar_registro"):
+            arquivo = escritor.salvar(dados)
+            manifesto.registrar(rsid, STATUS_OK, dados, arquivo=arquivo)
+          contar("snps_total", resultado=STATUS_OK)
+          barra.update(1)
+
+        def ao_falhar(rsid, erro):
+          # Fonte fora do ar ou limitando: o SNP volta na próxima execução, sem --retentar-falhas
+          status = STATUS_RETENTAVEL if isinstance(erro, ErroTransitorio) else STATUS_FALHA
+          tqdm.write(f"⚠️ Erro ao processar {rsid}: {erro}")
+          manifesto.registrar(rsid, status, erro=erro)
+          contar("snps_total", resultado=status, tipo=type(erro).__name__)
+          barra.update(1)
+
+        processar(linhas, ao_concluir, ao_falhar, args.fonte, args.modo_async, args.concorrencia)
+    finally:
+      escritor.fechar()
+      manifesto.fechar()
+
+    cache = obter_cache()
+    if cache is not None:
+      for fonte, est in cache.estatisticas()["fontes"].items():
+        print(f"🗄️ Cache {fonte}: {est['hits']} hits / {est['misses']} misses ({est['taxa_acerto']:.0%})")
+
+    METRICAS.imprimir_resumo()
+    print(f"📊 Métricas em {METRICAS.exportar()}")
+    print(f"\n✅ Pipeline finalizado. Registros em: {saida.resolve()}")
 
 if __name__ == "__main__":
     main()
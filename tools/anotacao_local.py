@@ -0,0 +1,298 @@
+# ./tools/anotacao_local.py
+import argparse
+import gzip
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+from tqdm import tqdm
+from config.env import ANOTACAO_LOCAL, MYVARIANT_BACKEND
+
+# ========== ANOTAÇÃO LOCAL DE VARIANTES (ClinVar/dbSNP importados) ==========
+#
+# Os mesmos dois campos que pedimos ao MyVariant (gene e significado clínico),
+# tirados de um dump local e guardados em SQLite com o número do rsID como
+# chave inteira (a própria B-tree da tabela, sem índice à parte). Com
+# MYVARIANT_BACKEND=local o pipeline não consulta a rede para essas anotações;
+# com "misto" só os rsIDs ausentes da base vão ao MyVariant.
+#
+# Formatos aceitos na importação:
+#   VCF do ClinVar  - rsID em INFO/RS, gene em INFO/GENEINFO, CLNSIG
+#   VCF do dbSNP    - rsID na coluna ID, gene em INFO/GENEINFO
+#   TSV/CSV         - colunas de rsID, gene e significado (variant_summary.txt
+#                     do ClinVar, ou o CSV gerado por load_map_variants)
+# Vários arquivos podem ser importados na mesma base: o primeiro valor não
+# vazio de cada campo prevalece (ex.: gene do dbSNP, significado do ClinVar).
+
+TAMANHO_LOTE_SQL = 900  # abaixo do limite de parâmetros por consulta do SQLite
+
+COLUNAS_TSV = {
+    "rsid": ("rsid", "rs# (dbsnp)", "rs", "snp", "dbsnp", "rs_id"),
+    "gene": ("gene", "genesymbol", "gene_symbol", "symbol"),
+    "clin": ("significado_clinico", "clinical_significance", "clinicalsignificance", "clnsig"),
+}
+
+# CLNSIG numérico dos VCFs antigos do dbSNP
+CLNSIG_NUMERICO = {
+    "0": "Uncertain significance", "1": "not provided", "2": "Benign", "3": "Likely benign",
+    "4": "Likely pathogenic", "5": "Pathogenic", "6": "drug response", "7": "histocompatibility",
+    "255": "other",
+}
+
+
+def numero_rs(rsid: str) -> int | None:
+    """'rs429358' ou '429358' -> 429358; IDs sem número de rs (ex.: 'i3000001') -> None."""
+    rsid = rsid.strip().lower()
+    if rsid.startswith("rs"):
+        rsid = rsid[2:]
+    return int(rsid) if rsid.isdigit() else None
+
+
+def primeiro_gene(valor: str) -> str:
+    """'BRCA1:672|NBR2:10230' ou 'BRCA1;NBR2' -> 'BRCA1' (o MyVariant também fica com o primeiro)."""
+    for separador in ("|", ";", ","):
+        valor = valor.split(separador)[0]
+    gene = valor.split(":")[0].strip()
+    return "" if gene in ("-", ".") else gene
+
+
+def normalizar_clin(valor: str) -> str:
+    """CLNSIG do VCF ('Likely_pathogenic|risk_factor') na grafia do MyVariant ('Likely pathogenic, risk factor')."""
+    valor = valor.strip()
+    if valor in ("", ".", "-"):
+        return ""
+    if valor.replace("|", ",").replace(",", "").isdigit():
+        return ", ".join(CLNSIG_NUMERICO.get(codigo, codigo) for codigo in valor.replace("|", ",").split(","))
+    return valor.replace("_", " ").replace("|", ", ")
+
+
+def _abrir_texto(caminho: Path):
+    if caminho.suffix == ".gz":
+        return gzip.open(caminho, "rt", encoding="utf-8", errors="replace")
+    return open(caminho, encoding="utf-8", errors="replace")
+
+
+def detectar_formato_anotacao(caminho: Path | str) -> str:
+    nome = Path(caminho).name.lower().removesuffix(".gz")
+    return "vcf" if nome.endswith(".vcf") else "tsv"
+
+
+def ler_vcf(linhas: Iterable[str]) -> Iterator[tuple[int, str, str]]:
+    """(número do rs, gene, significado) de cada rsID de um VCF do ClinVar ou do dbSNP."""
+    for linha in linhas:
+        if linha.startswith("#"):
+            continue
+        campos = linha.rstrip("\n").split("\t", 8)
+        if len(campos) < 8:
+            continue
+        info = dict(item.split("=", 1) for item in campos[7].split(";") if "=" in item)
+        if "RS" in info:  # ClinVar: a coluna ID é o VariationID
+            numeros = [numero_rs(n) for n in info["RS"].split(",")]
+        else:
+            numeros = [numero_rs(n) for n in campos[2].split(";") if n.lower().startswith("rs")]
+        gene = primeiro_gene(info.get("GENEINFO", ""))
+        clin = normalizar_clin(info.get("CLNSIG", ""))
+        for numero in numeros:
+            if numero is not None:
+                yield numero, gene, clin
+
+
+def ler_tsv(linhas: Iterable[str]) -> Iterator[tuple[int, str, str]]:
+    """(número do rs, gene, significado) de um TSV/CSV com cabeçalho; as colunas são achadas pelo nome."""
+    linhas = iter(linhas)
+    for cabecalho in linhas:
+        if not cabecalho.startswith("##"):
+            break
+    else:
+        return
+    separador = "\t" if "\t" in cabecalho else ","
+    nomes = [n.strip().lstrip("#").strip().lower() for n in cabecalho.rstrip("\n").split(separador)]
+    posicoes = {}
+    for campo, aliases in COLUNAS_TSV.items():
+        posicoes[campo] = next((nomes.index(a) for a in aliases if a in nomes), None)
+    if posicoes["rsid"] is None:
+        raise ValueError(f"Nenhuma coluna de rsID no cabeçalho (esperado uma de: {', '.join(COLUNAS_TSV['rsid'])})")
+
+    for linha in linhas:
+        campos = linha.rstrip("\n").split(separador)
+        if len(campos) <= posicoes["rsid"]:
+            continue
+        numero = numero_rs(campos[posicoes["rsid"]])
+        if numero is None:
+            continue  # ex.: '-1' no variant_summary para variantes sem rsID
+        gene = primeiro_gene(campos[posicoes["gene"]]) if posicoes["gene"] is not None else ""
+        clin = normalizar_clin(campos[posicoes["clin"]]) if posicoes["clin"] is not None else ""
+        yield numero, gene, clin
+
+
+class AnotacaoLocal:
+    """
+    Base SQLite {número do rs: (gene, significado clínico)}. Consultas em lote
+    resolvem centenas de rsIDs por SELECT; `resolver_ausentes` define se um
+    rsID que não está na base é "sem dados" (True) ou fica para o MyVariant.
+    """
+
+    def __init__(self, caminho: str = ANOTACAO_LOCAL, resolver_ausentes: bool = True):
+        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        self.caminho = caminho
+        self.resolver_ausentes = resolver_ausentes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS variantes (
+                   rs INTEGER PRIMARY KEY,
+                   gene TEXT NOT NULL DEFAULT '',
+                   clin TEXT NOT NULL DEFAULT ''
+               )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS importacoes (
+                   arquivo TEXT NOT NULL,
+                   formato TEXT NOT NULL,
+                   linhas INTEGER NOT NULL,
+                   importado REAL NOT NULL
+               )"""
+        )
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM variantes").fetchone()[0]
+
+    # ---------- importação ----------
+
+    def importar(self, caminho: Path | str, formato: str | None = None, tamanho_lote: int = 50_000) -> int:
+        """Importa um VCF ou TSV (opcionalmente .gz) e retorna quantas linhas com rsID foram lidas."""
+        caminho = Path(caminho)
+        formato = formato or detectar_formato_anotacao(caminho)
+        leitor = ler_vcf if formato == "vcf" else ler_tsv
+        inserir = """INSERT INTO variantes (rs, gene, clin) VALUES (?, ?, ?)
+                     ON CONFLICT(rs) DO UPDATE SET
+                         gene = CASE WHEN variantes.gene = '' THEN excluded.gene ELSE variantes.gene END,
+                         clin = CASE WHEN variantes.clin = '' THEN excluded.clin ELSE variantes.clin END"""
+        total, lote = 0, []
+        with self._lock, _abrir_texto(caminho) as arquivo:
+            self._conn.execute("PRAGMA synchronous=OFF")  # uma importação interrompida é simplesmente refeita
+            self._conn.execute("BEGIN")
+            try:
+                linhas = tqdm(arquivo, desc=f"Importando {caminho.name}", unit=" linhas", unit_scale=True)
+                for registro in leitor(linhas):
+                    lote.append(registro)
+                    if len(lote) >= tamanho_lote:
+                        self._conn.executemany(inserir, lote)
+                        total += len(lote)
+                        lote.clear()
+                self._conn.executemany(inserir, lote)
+                total += len(lote)
+                self._conn.execute("INSERT INTO importacoes VALUES (?, ?, ?, ?)",
+                                   (str(caminho), formato, total, time.time()))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+        return total
+
+    # ---------- consulta ----------
+
+    def consultar(self, rsid: str) -> tuple[str, str] | None:
+        """(gene, significado) do rsID, ou None se ele não está na base."""
+        numero = numero_rs(rsid)
+        if numero is None:
+            return None
+        with self._lock:
+            linha = self._conn.execute("SELECT gene, clin FROM variantes WHERE rs = ?", (numero,)).fetchone()
+        return tuple(linha) if linha else None
+
+    def consultar_lote(self, rsids: Iterable[str]) -> dict[str, tuple[str, str]]:
+        """{rsid: (gene, significado)} só dos rsIDs presentes na base."""
+        por_numero: dict[int, list[str]] = {}
+        for rsid in rsids:
+            numero = numero_rs(rsid)
+            if numero is not None:
+                por_numero.setdefault(numero, []).append(rsid)
+        numeros = list(por_numero)
+        achados = {}
+        with self._lock:
+            for inicio in range(0, len(numeros), TAMANHO_LOTE_SQL):
+                parte = numeros[inicio:inicio + TAMANHO_LOTE_SQL]
+                marcadores = ",".join("?" * len(parte))
+                for numero, gene, clin in self._conn.execute(
+                    f"SELECT rs, gene, clin FROM variantes WHERE rs IN ({marcadores})", parte
+                ):
+                    for rsid in por_numero[numero]:
+                        achados[rsid] = (gene, clin)
+        return achados
+
+    def separar(self, rsids: list[str]) -> tuple[dict[str, tuple[str, str]], list[str]]:
+        """Mesmo contrato de `separar_cache_myvariant`: (resolvidos pela base, que faltam consultar)."""
+        achados = self.consultar_lote(rsids)
+        if self.resolver_ausentes:
+            return {rsid: achados.get(rsid, ("", "")) for rsid in rsids}, []
+        return achados, [rsid for rsid in rsids if rsid not in achados]
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            variantes, com_gene, com_clin = self._conn.execute(
+                "SELECT COUNT(*), SUM(gene != ''), SUM(clin != '') FROM variantes"
+            ).fetchone()
+            importacoes = self._conn.execute(
+                "SELECT arquivo, formato, linhas, importado FROM importacoes ORDER BY importado"
+            ).fetchall()
+        return {
+            "variantes": variantes,
+            "com_gene": com_gene or 0,
+            "com_significado": com_clin or 0,
+            "importacoes": [
+                {"arquivo": a, "formato": f, "linhas": n, "importado": time.strftime("%Y-%m-%d %H:%M", time.localtime(t))}
+                for a, f, n, t in importacoes
+            ],
+        }
+
+    def fechar(self):
+        self._conn.close()
+
+
+_anotacao: AnotacaoLocal | None = None
+
+def obter_anotacao_local() -> AnotacaoLocal | None:
+    """Base local ativa pelo MYVARIANT_BACKEND ('local' ou 'misto'); None no modo 'remoto'."""
+    global _anotacao
+    if MYVARIANT_BACKEND not in ("local", "misto"):
+        return None
+    if _anotacao is None:
+        if not Path(ANOTACAO_LOCAL).exists():
+            raise FileNotFoundError(
+                f"MYVARIANT_BACKEND={MYVARIANT_BACKEND}, mas a base local não existe: {ANOTACAO_LOCAL} "
+                f"(rode python -m tools.anotacao_local --importar <arquivo>)"
+            )
+        _anotacao = AnotacaoLocal(ANOTACAO_LOCAL, resolver_ausentes=MYVARIANT_BACKEND == "local")
+    return _anotacao
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Base local de gene e significado clínico por rsID (ClinVar/dbSNP).")
+    parser.add_argument("--importar", action="append", metavar="ARQUIVO",
+                        help="VCF ou TSV/CSV, opcionalmente .gz (pode repetir)")
+    parser.add_argument("--formato", choices=["vcf", "tsv"], help="padrão: pela extensão do arquivo")
+    parser.add_argument("--caminho", default=ANOTACAO_LOCAL)
+    parser.add_argument("rsids", nargs="*", help="rsIDs a consultar na base")
+    args = parser.parse_args()
+
+    if not args.importar and not Path(args.caminho).exists():
+        print(f"❌ Base local não encontrada: {args.caminho} (rode com --importar)")
+        exit(1)
+    base = AnotacaoLocal(args.caminho)
+    for arquivo in args.importar or []:
+        inicio = time.perf_counter()
+        n = base.importar(arquivo, args.formato)
+        print(f"✅ {arquivo}: {n} linhas com rsID em {time.perf_counter() - inicio:.1f}s")
+
+    est = base.estatisticas()
+    print(f"🗄️ {est['variantes']} variantes em {args.caminho} "
+          f"({est['com_gene']} com gene, {est['com_significado']} com significado clínico)")
+    for rsid in args.rsids:
+        anotacao = base.consultar(rsid)
+        print(f"{rsid}: " + (f"gene={anotacao[0] or '-'} | significado={anotacao[1] or '-'}" if anotacao else "✘ ausente"))
+    base.fechar()
@@ -0,0 +1,244 @@
+# ./tools/async_enrichment.py
+import asyncio
+from typing import Callable, Iterable
+from urllib.parse import urlsplit
+
+import httpx
+from config.env import (
+    API_MYVARIANT,
+    API_MYVARIANT_QUERY,
+    TAMANHO_LOTE_MYVARIANT,
+    URL_SNEDIA,
+    CONCORRENCIA_MAX,
+    CONCORRENCIA_POR_HOST,
+    LIMITES_POR_HOST,
+)
+from tools.load_map_variants import (
+    anotacao_myvariant,
+    chave_rsid,
+    primeiro_documento,
+    parametros_lote_myvariant,
+    agrupar_hits_myvariant,
+    separar_cache_myvariant,
+    registrar_lote_myvariant,
+)
+from tools.snp_mapper import (
+    normalizar_rsid,
+    montar_registro_base,
+    extrair_dados_snpedia,
+    aplicar_myvariant,
+)
+from utils.http_cache import obter_cache
+from utils.lotes import dividir_em_lotes, iterar_em_thread
+from utils.metricas import cronometrado, erro_silenciado
+from utils.politica_rede import ErroTransitorio, obter_politica
+
+# ========== ENRIQUECIMENTO ASSÍNCRONO (SNPedia + MyVariant) ==========
+
+TAMANHO_GRAVACAO_CACHE = 100  # páginas novas gravadas no cache por ida à thread
+
+
+class LimitesPorHost:
+    """Um semáforo por host, para não sobrecarregar nenhum servidor isoladamente."""
+
+    def __init__(self, limites: dict[str, int] = LIMITES_POR_HOST, padrao: int = CONCORRENCIA_POR_HOST):
+        self.limites = limites
+        self.padrao = padrao
+        self._semaforos: dict[str, asyncio.Semaphore] = {}
+
+    def semaforo(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ""
+        if host not in self._semaforos:
+            self._semaforos[host] = asyncio.Semaphore(self.limites.get(host, self.padrao))
+        return self._semaforos[host]
+
+
+def criar_cliente_async(concorrencia: int = CONCORRENCIA_MAX) -> httpx.AsyncClient:
+    """Cliente compartilhado, com pool de conexões dimensionado pela concorrência."""
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    return httpx.AsyncClient(limits=limites, timeout=obter_politica().timeout, follow_redirects=True)
+
+
+async def _get(client: httpx.AsyncClient, limites: LimitesPorHost, url: str) -> httpx.Response:
+    async with limites.semaforo(url):
+        return await obter_politica().executar_async(url, lambda: client.get(url))
+
+
+class GravadorPaginas:
+    """
+    Acumula as páginas baixadas da SNPedia e as grava no cache a cada
+    `tamanho` páginas, numa thread e numa só transação.
+    """
+
+    def __init__(self, cache, tamanho: int = TAMANHO_GRAVACAO_CACHE):
+        self.cache = cache
+        self.tamanho = tamanho
+        self._pendentes: list[tuple[str, str]] = []
+
+    async def guardar(self, rsid: str, html: str):
+        self._pendentes.append((rsid, html))
+        if len(self._pendentes) >= self.tamanho:
+            await self.descarregar()
+
+    async def descarregar(self):
+        itens, self._pendentes = self._pendentes, []
+        if itens:
+            await asyncio.to_thread(self.cache.guardar_varios, "snpedia", itens)
+
+
+@cronometrado("buscar_snpedia")
+async def buscar_html_snpedia(
+    client: httpx.AsyncClient, limites: LimitesPorHost, rsid: str,
+    paginas: dict[str, str] | None = None, gravador: GravadorPaginas | None = None,
+) -> str:
+    """
+    `paginas` são as páginas do lote já lidas do cache e `gravador` acumula as
+    novas; sem eles, o cache é lido e gravado página a página (numa thread).
+    """
+    cache = obter_cache()
+    if paginas is not None:
+        html = paginas.pop(rsid, None)  # lida uma vez: a memória do lote vai sendo liberada
+    elif cache is not None:
+        html = await cache.obter_async("snpedia", rsid)
+    else:
+        html = None
+    if html is not None:
+        return html
+    resp = await _get(client, limites, f"{URL_SNEDIA}{rsid}")
+    resp.raise_for_status()
+    if gravador is not None:
+        await gravador.guardar(rsid, resp.text)
+    elif cache is not None:
+        await cache.guardar_async("snpedia", rsid, resp.text)
+    return resp.text
+
+
+async def consultar_myvariant_async(client: httpx.AsyncClient, limites: LimitesPorHost, rsid: str) -> tuple[str, str]:
+    """Versão assíncrona de `consultar_myvariant`, com o mesmo contrato."""
+    # Base local e cache (SQLite) rodam numa thread, fora do loop de eventos
+    em_cache, faltantes = await asyncio.to_thread(separar_cache_myvariant, [chave_rsid(rsid)])
+    if not faltantes:
+        return em_cache[chave_rsid(rsid)]
+    resp = await _get(client, limites, f"{API_MYVARIANT}{rsid}")
+    if resp.status_code != 200:
+        return "", ""
+    try:
+        documentos = {chave_rsid(rsid): primeiro_documento(resp.json())}
+        return (await asyncio.to_thread(registrar_lote_myvariant, documentos))[chave_rsid(rsid)]
+    except ValueError as e:
+        erro_silenciado("consultar_myvariant", e)
+        return "", ""
+
+
+@cronometrado("myvariant_lote")
+async def consultar_myvariant_lote_async(
+    client: httpx.AsyncClient, limites: LimitesPorHost, rsids: list[str]
+) -> dict[str, tuple[str, str] | ErroTransitorio]:
+    """Versão assíncrona de `consultar_myvariant_lote` para um único lote."""
+    unicos = list(dict.fromkeys(chave_rsid(r) for r in rsids if r))
+    resultado = {rsid: ("", "") for rsid in unicos}
+    em_cache, faltantes = await asyncio.to_thread(separar_cache_myvariant, unicos)
+    resultado.update(em_cache)
+    if not faltantes:
+        return resultado
+    try:
+        async with limites.semaforo(API_MYVARIANT_QUERY):
+            resp = await obter_politica().executar_async(
+                API_MYVARIANT_QUERY,
+                lambda: client.post(API_MYVARIANT_QUERY, data=parametros_lote_myvariant(faltantes)),
+            )
+        if resp.status_code == 200:
+            documentos = agrupar_hits_myvariant(faltantes, resp.json())
+            resultado.update(await asyncio.to_thread(registrar_lote_myvariant, documentos))
+    except ErroTransitorio as e:
+        resultado.update({rsid: e for rsid in faltantes})
+    except Exception as e:
+        erro_silenciado("consultar_myvariant_lote", e)
+    return resultado
+
+
+async def consultar_snpedia_completa_async(
+    client: httpx.AsyncClient, limites: LimitesPorHost, rsid: str, chromosome: str, position: int, alelo: str,
+    myvariant: asyncio.Task | None = None, paginas: asyncio.Task | None = None,
+    gravador: GravadorPaginas | None = None,
+) -> dict:
+    """
+    Mesmo registro de `consultar_snpedia_completa`, sem bloquear o loop de eventos.
+    `myvariant` é a tarefa do lote MyVariant que contém este rsID e `paginas`
+    a leitura do cache das páginas do mesmo lote, quando houver.
+    """
+    rsid = normalizar_rsid(rsid)
+    html = await buscar_html_snpedia(
+        client, limites, rsid, await paginas if paginas is not None else None, gravador
+    )
+
+    data = montar_registro_base(rsid, chromosome, position, alelo)
+    extrair_dados_snpedia(html, data)
+
+    if myvariant is not None:
+        gene, clin = anotacao_myvariant(await myvariant, rsid)
+    else:
+        gene, clin = await consultar_myvariant_async(client, limites, rsid)
+    return aplicar_myvariant(data, gene, clin)
+
+
+async def enriquecer_async(
+    linhas: Iterable[tuple],
+    ao_concluir: Callable[[str, dict], None],
+    ao_falhar: Callable[[str, Exception], None],
+    concorrencia: int = CONCORRENCIA_MAX,
+    tamanho_lote: int = TAMANHO_LOTE_MYVARIANT,
+):
+    """
+    Enriquece as linhas (rsid, chromosome, position, alelo) com um pool fixo de
+    `concorrencia` trabalhadores. A fila é limitada, então o número de
+    requisições em voo e a memória não crescem com o tamanho da entrada.
+    O MyVariant é consultado uma vez por lote de `tamanho_lote` linhas, em
+    paralelo às páginas da SNPedia do mesmo lote. O cache (SQLite + zlib) é
+    lido uma vez por lote e gravado em blocos, sempre numa thread.
+    """
+    limites = LimitesPorHost()
+    cache = obter_cache()
+    gravador = GravadorPaginas(cache) if cache is not None else None
+    fila: asyncio.Queue = asyncio.Queue(maxsize=concorrencia * 2)
+
+    async with criar_cliente_async(concorrencia) as client:
+
+        async def trabalhador():
+            while True:
+                item = await fila.get()
+                if item is None:
+                    return
+                linha, lote_myvariant, paginas = item
+                rsid = linha[0]
+                try:
+                    dados = await consultar_snpedia_completa_async(
+                        client, limites, *linha, myvariant=lote_myvariant, paginas=paginas, gravador=gravador
+                    )
+                    ao_concluir(rsid, dados)
+                except Exception as e:
+                    ao_falhar(rsid, e)
+
+        trabalhadores = [asyncio.create_task(trabalhador()) for _ in range(concorrencia)]
+        # Lotes montados fora do loop: a leitura do genoma não para as requisições em voo
+        async for lote in iterar_em_thread(dividir_em_lotes(linhas, tamanho_lote)):
+            lote_myvariant = asyncio.create_task(
+                consultar_myvariant_lote_async(client, limites, [linha[0] for linha in lote])
+            )
+            paginas = None
+            if cache is not None:
+                paginas = asyncio.create_task(asyncio.to_thread(
+                    cache.obter_varios, "snpedia", [normalizar_rsid(linha[0]) for linha in lote]
+                ))
+            for linha in lote:
+                await fila.put((linha, lote_myvariant, paginas))
+        for _ in trabalhadores:
+            await fila.put(None)
+        await asyncio.gather(*trabalhadores)
+        if gravador is not None:
+            await gravador.descarregar()
+
+
+def enriquecer(linhas, ao_concluir, ao_falhar, concorrencia: int = CONCORRENCIA_MAX):
+    """Ponto de entrada síncrono para o modo async."""
+    asyncio.run(enriquecer_async(linhas, ao_concluir, ao_falhar, concorrencia))
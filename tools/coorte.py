@@ -0,0 +1,129 @@
+# ./tools/coorte.py
+import re
+import shutil
+from pathlib import Path
+from typing import Iterator
+from tqdm import tqdm
+from config.env import COORTE_DIR, CONCORRENCIA_MAX, SNPEDIA_FONTE
+from tools.genome_reader import detectar_formato, ler_genoma_em_blocos
+from tools.snp_mapper import campos_genotipo
+from utils.politica_rede import ErroTransitorio
+from utils.record_store import EscritorRegistros, RegistroSNPStore
+
+# ========== MODO COORTE: VÁRIAS AMOSTRAS, UMA ANOTAÇÃO POR VARIANTE ==========
+#
+#   <saida>/anotacoes/        SNPedia + MyVariant de cada rsID distinto, sem genótipo
+#   <saida>/amostras/<nome>/  registros da amostra = anotação + alelo da pessoa
+#
+# Pessoas compartilham quase todos os rsIDs, e a anotação de uma variante não
+# depende do genótipo. Então a rede é consultada uma vez por rsID distinto da
+# coorte (e só para os que ainda não estão em anotacoes/), e cada amostra vira
+# uma junção local com a tabela compartilhada.
+
+
+def nome_amostra(caminho: Path) -> str:
+    """'joao.txt.gz' -> 'joao'."""
+    return re.sub(r"(\.(txt|csv|tsv))?(\.gz)?$", "", caminho.name, flags=re.IGNORECASE)
+
+
+def listar_amostras(pasta: Path | str) -> list[Path]:
+    """Arquivos de genoma reconhecidos na pasta (os demais são ignorados com aviso)."""
+    amostras = []
+    for caminho in sorted(Path(pasta).iterdir()):
+        if not caminho.is_file() or caminho.name.startswith("."):
+            continue
+        try:
+            detectar_formato(caminho)
+        except (ValueError, UnicodeDecodeError, OSError):
+            print(f"⚠️ Ignorando {caminho.name}: formato de genoma não reconhecido.")
+            continue
+        amostras.append(caminho)
+    return amostras
+
+
+def uniao_rsids(amostras: list[Path]) -> tuple[dict[str, tuple[str, str]], int]:
+    """
+    rsIDs distintos da coorte, com o cromossomo e a posição da primeira amostra
+    em que aparecem, e o total de linhas somando todas as amostras.
+    """
+    variantes: dict[str, tuple[str, str]] = {}
+    total = 0
+    for caminho in amostras:
+        for bloco in ler_genoma_em_blocos(caminho):
+            total += len(bloco)
+            for rsid, chrom, pos in zip(bloco["RSID"], bloco["CHROMOSOME"], bloco["POSITION"]):
+                if rsid not in variantes:
+                    variantes[rsid] = (str(chrom), str(pos))
+    return variantes, total
+
+
+def anotar_variantes(variantes: dict[str, tuple[str, str]], anotacoes: RegistroSNPStore,
+                     fonte: str = SNPEDIA_FONTE, modo_async: bool = False,
+                     concorrencia: int = CONCORRENCIA_MAX) -> dict[str, int]:
+    """
+    Enriquece uma vez cada rsID que ainda não está em `anotacoes` (e que tem
+    página na SNPedia), com o mesmo motor do main_pipeline. O genótipo fica
+    vazio: ele é preenchido por amostra na junção.
+    """
+    from main_pipeline import filtrar_por_indice_snpedia, processar
+    from tools.snpedia_index import IndiceSNPedia
+
+    novas = [(rsid, chrom, pos, "") for rsid, (chrom, pos) in variantes.items() if rsid not in anotacoes]
+    linhas = filtrar_por_indice_snpedia(novas, IndiceSNPedia.carregar(), None)
+    contagem = {"reaproveitadas": len(variantes) - len(novas), "sem_snpedia": len(novas) - len(linhas),
+                "anotadas": 0, "falhas": 0, "retentaveis": 0}
+
+    with tqdm(total=len(linhas), desc="Anotando variantes da coorte", unit="SNP") as barra:
+
+        def ao_concluir(rsid, dados):
+            anotacoes.adicionar(dados)
+            contagem["anotadas"] += 1
+            barra.update(1)
+
+        def ao_falhar(rsid, erro):
+            tqdm.write(f"⚠️ Erro ao processar {rsid}: {erro}")
+            # Transitórias não entram em anotacoes/, então a próxima execução as tenta de novo
+            contagem["retentaveis" if isinstance(erro, ErroTransitorio) else "falhas"] += 1
+            barra.update(1)
+
+        processar(linhas, ao_concluir, ao_falhar, fonte, modo_async, concorrencia)
+    return contagem
+
+
+def juntar_amostra(caminho: Path, anotacoes: RegistroSNPStore) -> Iterator[dict]:
+    """Registros da amostra: a anotação compartilhada de cada rsID mais o alelo da pessoa."""
+    for bloco in ler_genoma_em_blocos(caminho):
+        for rsid, chrom, pos, alelo in zip(bloco["RSID"], bloco["CHROMOSOME"], bloco["POSITION"], bloco["RESULT"]):
+            anotacao = anotacoes.obter(rsid)
+            if anotacao is None:
+                continue  # sem página na SNPedia, ou a anotação falhou
+            yield {**anotacao, "chromosome": str(chrom), "position": str(pos), **campos_genotipo(alelo)}
+
+
+def processar_coorte(pasta: Path | str, saida: Path | str = COORTE_DIR, fonte: str = SNPEDIA_FONTE,
+                     modo_async: bool = False, concorrencia: int = CONCORRENCIA_MAX) -> dict[str, Path]:
+    """Anota a união de rsIDs das amostras em `pasta` e grava os registros de cada uma. Retorna {amostra: pasta}."""
+    saida = Path(saida)
+    amostras = listar_amostras(pasta)
+    if not amostras:
+        print(f"❌ Nenhum arquivo de genoma em: {pasta}")
+        return {}
+
+    variantes, total_linhas = uniao_rsids(amostras)
+    print(f"🧬 {len(amostras)} amostras, {total_linhas} genótipos, {len(variantes)} rsIDs distintos")
+
+    pastas = {}
+    with RegistroSNPStore(saida / "anotacoes") as anotacoes:
+        contagem = anotar_variantes(variantes, anotacoes, fonte, modo_async, concorrencia)
+        print(f"🔎 {contagem['anotadas']} variantes anotadas agora, {contagem['reaproveitadas']} reaproveitadas, "
+              f"{contagem['sem_snpedia']} sem SNPedia, {contagem['falhas']} falhas, "
+              f"{contagem['retentaveis']} para tentar de novo")
+
+        for caminho in tqdm(amostras, desc="Juntando amostras", unit="amostra"):
+            nome = nome_amostra(caminho)
+            pastas[nome] = saida / "amostras" / nome
+            # A junção é local e barata: refeita do zero, sem duplicar registros de execuções anteriores
+            shutil.rmtree(pastas[nome], ignore_errors=True)
+            with EscritorRegistros(pastas[nome]) as escritor:
+                escritor.salvar_todos(juntar_amostra(caminho, anotacoes))
+    return pastas
@@ -0,0 +1,148 @@
+# ./tools/genome_reader.py
+import gzip
+from collections import Counter
+from itertools import product
+from pathlib import Path
+from typing import Iterator
+import numpy as np
+import pandas as pd
+from config.env import TAMANHO_BLOCO_LEITURA
+
+# ========== LEITURA EM STREAMING DE EXPORTAÇÕES 23andMe / Ancestry / CSV ==========
+#
+# Formatos reconhecidos:
+#   "23andme":  TSV com cabeçalho comentado "# rsid chromosome position genotype"
+#   "ancestry": TSV com cabeçalho "rsid chromosome position allele1 allele2"
+#   "csv":      o CSV do projeto, "RSID,CHROMOSOME,POSITION,RESULT"
+# Os blocos saem sempre com as colunas RSID, CHROMOSOME, POSITION, RESULT.
+# Linhas descartadas (IDs internos, sem chamada, cromossomo ou posição
+# inválidos, genótipo fora do alfabeto, duplicadas) são contadas por motivo e
+# resumidas ao fim da leitura.
+
+COLUNAS = ["RSID", "CHROMOSOME", "POSITION", "RESULT"]
+
+CROMOSSOMOS = pd.CategoricalDtype([str(c) for c in range(1, 23)] + ["X", "Y", "XY", "MT"])
+# Códigos da Ancestry para os cromossomos não numéricos
+CROMOSSOMOS_ANCESTRY = {"23": "X", "24": "Y", "25": "XY", "26": "MT", "M": "MT"}
+
+_ALELOS = "ACGTDI"
+GENOTIPOS = pd.CategoricalDtype(list(_ALELOS) + ["".join(p) for p in product(_ALELOS, repeat=2)])
+SEM_CHAMADA = {"--", "-", "00", "0", ""}
+
+
+def _abrir_texto(caminho: Path):
+    if caminho.suffix == ".gz":
+        return gzip.open(caminho, "rt", encoding="utf-8", errors="replace")
+    return open(caminho, encoding="utf-8", errors="replace")
+
+
+def detectar_formato(caminho: str | Path) -> str:
+    """Identifica o fornecedor pela primeira linha útil (ou pelo cabeçalho comentado)."""
+    caminho = Path(caminho)
+    with _abrir_texto(caminho) as f:
+        for linha in f:
+            texto = linha.strip().lower()
+            if not texto:
+                continue
+            if texto.startswith("#"):
+                if "rsid" in texto and "genotype" in texto:
+                    return "23andme"
+                continue
+            if texto.startswith("rsid\tchromosome\tposition\tallele1"):
+                return "ancestry"
+            if texto.replace('"', "").startswith("rsid,chromosome,position,result"):
+                return "csv"
+            if texto.count("\t") == 3:
+                return "23andme"
+            break
+    raise ValueError(f"Formato de genoma não reconhecido: {caminho}")
+
+
+def _blocos_brutos(caminho: Path, formato: str, tamanho_bloco: int) -> Iterator[pd.DataFrame]:
+    if formato == "23andme":
+        leitor = pd.read_csv(caminho, sep="\t", comment="#", header=None, names=COLUNAS,
+                             dtype=str, chunksize=tamanho_bloco)
+        yield from leitor
+    elif formato == "ancestry":
+        leitor = pd.read_csv(caminho, sep="\t", comment="#", header=0, dtype=str, chunksize=tamanho_bloco)
+        for bloco in leitor:
+            bloco.columns = [c.strip().lower() for c in bloco.columns]
+            a1 = bloco["allele1"].fillna("0").str.strip()
+            a2 = bloco["allele2"].fillna("0").str.strip()
+            yield pd.DataFrame({
+                "RSID": bloco["rsid"],
+                "CHROMOSOME": bloco["chromosome"].str.strip().replace(CROMOSSOMOS_ANCESTRY),
+                "POSITION": bloco["position"],
+                # Alelo "0" é sem chamada na Ancestry
+                "RESULT": np.where((a1 == "0") | (a2 == "0"), "--", a1 + a2),
+            })
+    else:
+        leitor = pd.read_csv(caminho, dtype=str, chunksize=tamanho_bloco)
+        for bloco in leitor:
+            bloco.columns = [c.strip().upper() for c in bloco.columns]
+            yield bloco[COLUNAS]
+
+
+def _tipar(bloco: pd.DataFrame, vistos: set[int], descartes: Counter) -> pd.DataFrame:
+    """Remove linhas inválidas e duplicadas (contando-as em `descartes`) e converte para tipos compactos."""
+    rsid = bloco["RSID"].astype(str).str.strip()
+    resultado = bloco["RESULT"].fillna("").astype(str).str.strip().str.upper()
+    # Valores fora das categorias (genótipo fora do alfabeto ACGTDI, "chr99") viram NaN
+    genotipo = resultado.astype(GENOTIPOS)
+    cromossomo = (bloco["CHROMOSOME"].astype(str).str.strip().str.upper()
+                  .str.removeprefix("CHR").replace(CROMOSSOMOS_ANCESTRY).astype(CROMOSSOMOS))
+    posicao = pd.to_numeric(bloco["POSITION"], errors="coerce")
+
+    mascara = pd.Series(True, index=bloco.index)
+    # Em ordem: cada linha é contada só pelo primeiro motivo que a descarta
+    for motivo, valida in (
+        ("id_interno", rsid.str.lower().str.match(r"rs\d+$")),
+        ("sem_chamada", ~resultado.isin(SEM_CHAMADA)),
+        ("genotipo", genotipo.notna()),
+        ("cromossomo", cromossomo.notna()),
+        ("posicao", posicao.between(0, np.iinfo(np.int32).max) & (posicao % 1 == 0)),
+    ):
+        descartes[motivo] += int((mascara & ~valida).sum())
+        mascara &= valida
+
+    numeros = pd.to_numeric(rsid.str[2:].where(mascara), errors="coerce")
+    repetido = mascara & (numeros.duplicated() | numeros.isin(vistos))
+    descartes["duplicado"] += int(repetido.sum())
+    mascara &= ~repetido
+    vistos.update(numeros[mascara].astype("int64").tolist())
+
+    return pd.DataFrame({
+        "RSID": rsid[mascara].str.lower(),
+        "CHROMOSOME": cromossomo[mascara],
+        "POSITION": posicao[mascara].astype("int32"),
+        "RESULT": genotipo[mascara],
+    }).reset_index(drop=True)
+
+
+def ler_genoma_em_blocos(caminho: str | Path, tamanho_bloco: int = TAMANHO_BLOCO_LEITURA,
+                         formato: str | None = None) -> Iterator[pd.DataFrame]:
+    """
+    Lê a exportação em blocos de `tamanho_bloco` linhas, já filtrados e tipados.
+    A memória fica limitada a um bloco (mais o conjunto de rsIDs já vistos,
+    guardados como inteiros para remover duplicados entre blocos).
+    """
+    caminho = Path(caminho)
+    formato = formato or detectar_formato(caminho)
+    vistos: set[int] = set()
+    descartes: Counter = Counter()
+    for bloco in _blocos_brutos(caminho, formato, tamanho_bloco):
+        df = _tipar(bloco, vistos, descartes)
+        if len(df):
+            yield df
+
+    if total := sum(descartes.values()):
+        motivos = ", ".join(f"{motivo}: {n}" for motivo, n in descartes.items() if n)
+        print(f"🧹 {caminho.name}: {total} linhas descartadas ({motivos})")
+
+
+def ler_genoma(caminho: str | Path, formato: str | None = None) -> pd.DataFrame:
+    """Genoma inteiro em um DataFrame (mesmas colunas e tipos dos blocos)."""
+    blocos = list(ler_genoma_em_blocos(caminho, formato=formato))
+    if not blocos:
+        return pd.DataFrame({c: pd.Series(dtype=object) for c in COLUNAS})
+    return pd.concat(blocos, ignore_index=True)
@@ -1,56 +1,161 @@
 # ./tools/genotype_matcher.py
 
+import argparse
 import os
-import json
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator
+from utils.lotes import dividir_em_lotes
+from utils.record_store import iterar_registros, EscritorRegistros
+
+if TYPE_CHECKING:
+    import numpy as np
 
 INPUT_DIR = Path(os.getenv("SNP_DATA_DIR", "resultados/snps_filtrados"))
 OUTPUT_DIR = Path(os.getenv("RELEVANT_SNP_DIR", "resultados/snps_com_alelos_relevantes"))
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+TAMANHO_BLOCO_CASAMENTO = int(os.getenv("TAMANHO_BLOCO_CASAMENTO", 50_000))
+
+# numpy e pandas entram só no casamento em lote: `cli.py match --help` e quem
+# só normaliza genótipos (prompt_builder, query_llm) não pagam o import
+
+# ====== NORMALIZAÇÃO DE ALELOS ======
+
+# Cada alelo vira um bit, para comparar conjuntos de alelos com operações vetoriais
+BITS_ALELOS = {"A": 1, "C": 2, "G": 4, "T": 8, "D": 16, "I": 32}
+COMPLEMENTO = {"A": "T", "C": "G", "G": "C", "T": "A", "D": "D", "I": "I"}
+
+
+def normalizar_genotipo(genotipo: str) -> str:
+    """'(T;C)', 'T;C', 'tc' -> 'CT'; chamada hemizigótica 'A' -> 'AA'; sem alelos -> ''."""
+    alelos = [c for c in str(genotipo or "").upper() if c in BITS_ALELOS]
+    if len(alelos) == 1:
+        alelos *= 2
+    return "".join(sorted(alelos)) if len(alelos) == 2 else "".join(alelos)
+
+
+def complementar_genotipo(genotipo: str) -> str:
+    """Genótipo normalizado lido na fita oposta ('AG' -> 'CT')."""
+    return normalizar_genotipo("".join(COMPLEMENTO[c] for c in genotipo))
+
+
+def bits_genotipo(genotipo: str) -> int:
+    bits = 0
+    for c in genotipo:
+        bits |= BITS_ALELOS[c]
+    return bits
+
+
+def _mapear_unicos(valores, funcao) -> "np.ndarray":
+    """
+    Aplica `funcao` só aos valores distintos e espalha o resultado por índice.
+    Há poucas dezenas de genótipos distintos, então o custo é O(n) em NumPy.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codigos, unicos = pd.factorize(pd.Series(valores, dtype=object).fillna(""))
+    tabela = np.array([funcao(u) for u in unicos] + [funcao("")], dtype=object)
+    return tabela[codigos]
+
+
+# ====== CASAMENTO EM LOTE ======
+
+
+def casar_genotipos_em_lote(snps: list[dict]) -> list[list[dict]]:
+    """
+    Para cada SNP, retorna os genótipos relevantes (não comuns/normais) que
+    casam com o genótipo do indivíduo, numa única passada vetorizada sobre a
+    tabela de todos os genótipos da SNPedia do lote.
+
+    A ordem dos alelos não importa ('(T;C)' casa com 'CT'). Se os alelos do
+    indivíduo não existem entre os da SNPedia mas os complementares existem,
+    o genótipo foi reportado na outra fita e é comparado pelo complemento.
+    """
+    import numpy as np
+    import pandas as pd
+
+    linhas = [
+        (i, g.get("genotipo", ""), g.get("magnitude", ""), g.get("resumo", "") or "")
+        for i, snp in enumerate(snps)
+        for g in snp.get("genotipos", [])
+    ]
+    relevantes: list[list[dict]] = [[] for _ in snps]
+    if not linhas:
+        return relevantes
+
+    idx, genotipos, magnitudes, resumos = (np.array(coluna, dtype=object) for coluna in zip(*linhas))
+    idx = idx.astype(np.int64)
+    normalizados = _mapear_unicos(genotipos, normalizar_genotipo)
+
+    # Genótipo do indivíduo, direto e na fita complementar
+    individuo = _mapear_unicos([snp.get("alelo_clean") or snp.get("alelo") or "" for snp in snps], normalizar_genotipo)
+    complemento = _mapear_unicos(individuo, complementar_genotipo)
+
+    # Alelos presentes na SNPedia por SNP (OU dos bits de todos os seus genótipos)
+    alelos_snpedia = np.zeros(len(snps), dtype=np.int64)
+    np.bitwise_or.at(alelos_snpedia, idx, _mapear_unicos(normalizados, bits_genotipo).astype(np.int64))
+    bits_direto = _mapear_unicos(individuo, bits_genotipo).astype(np.int64)
+    bits_complemento = _mapear_unicos(complemento, bits_genotipo).astype(np.int64)
+    usar_complemento = ((bits_direto & ~alelos_snpedia) != 0) & ((bits_complemento & ~alelos_snpedia) == 0)
+    orientado = np.where(usar_complemento, complemento, individuo)
+
+    alvo = orientado[idx]
+    resumos = np.array([r.lower() for r in resumos], dtype=object)
+    comum = np.fromiter(("common" in r or "normal" in r for r in resumos), dtype=bool, count=len(resumos))
+    casa = (normalizados == alvo) & (alvo != "") & ~comum
+
+    selecionados = np.flatnonzero(casa)
+    valores = pd.to_numeric(pd.Series(magnitudes[selecionados]), errors="coerce").to_numpy()
+    for k, magnitude in zip(selecionados, valores):
+        relevantes[idx[k]].append({
+            "genotipo": genotipos[k],
+            "resumo": resumos[k],
+            "magnitude": None if np.isnan(magnitude) else float(magnitude),
+        })
+    return relevantes
+
 
 def extrair_alelos_relevantes(snp):
     """Retorna genótipos relevantes (não comuns
     /normais) que casam com o alelo do indivíduo."""
-    alelo = snp.get("alelo")
-    relevantes = []
-    for g in snp.get("genotipos", []):
-        genotipo = g.get("genotipo", "")
-        resumo = g.get("resumo", "").lower()
-        if alelo in genotipo and "common" not in resumo and "normal" not in resumo:
-            relevantes.append({
-                "genotipo": genotipo,
-                "resumo": resumo,
-                "magnitude": g.get("magnitude", "")
-            })
-    return relevantes
+    return casar_genotipos_em_lote([snp])[0]
+
+
+def casar_em_fluxo(snps: Iterable[dict], tamanho_bloco: int = TAMANHO_BLOCO_CASAMENTO) -> Iterator[dict]:
+    """Casa os SNPs em blocos e entrega só os que têm genótipo relevante, com `alelos_relevantes`."""
+    for bloco in dividir_em_lotes(snps, tamanho_bloco):
+        for snp, relevantes in zip(bloco, casar_genotipos_em_lote(bloco)):
+            if relevantes:
+                snp["alelos_relevantes"] = relevantes
+                yield snp
+
 
 def filtrar_snps_com_alelos_relevantes(snps):
     """Filtra SNPs que tenham pelo menos um genótipo relevante para o alelo do indivíduo."""
-    return [snp for snp in snps if extrair_alelos_relevantes(snp)]
+    return [snp for snp, relevantes in zip(snps, casar_genotipos_em_lote(snps)) if relevantes]
 
-def filtrar_e_salvar_snps_relevantes():
+def filtrar_e_salvar_snps_relevantes(entrada: Path | str = INPUT_DIR, saida: Path | str = OUTPUT_DIR):
     total = 0
     salvos = 0
 
-    for arquivo in INPUT_DIR.glob("*.json"):
-        total += 1
-        with open(arquivo, encoding="utf-8") as f:
-            snp = json.load(f)
-
-        relevantes = extrair_alelos_relevantes(snp)
-        if not relevantes:
-            continue
+    def contar(snps):
+        nonlocal total
+        for snp in snps:
+            total += 1
+            yield snp
 
-        snp["alelos_relevantes"] = relevantes
+    with EscritorRegistros(saida) as escritor:
+        salvos = escritor.salvar_todos(casar_em_fluxo(contar(iterar_registros(entrada))))
 
-        output_path = OUTPUT_DIR / arquivo.name
-        with open(output_path, "w", encoding="utf-8") as out:
-            json.dump(snp, out, ensure_ascii=False, indent=2)
+    print(f"\n✅ {salvos}/{total} SNPs salvos com alelos relevantes em: {Path(saida).resolve()}")
 
-        salvos += 1
 
-    print(f"\n✅ {salvos}/{total} SNPs salvos com alelos relevantes em: {OUTPUT_DIR.resolve()}")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mantém os SNPs cujo genótipo casa com um genótipo relevante da SNPedia.")
+    parser.add_argument("--entrada", default=INPUT_DIR, help="pasta de registros (saída do snp_cleaner)")
+    parser.add_argument("--saida", default=OUTPUT_DIR, help="pasta dos registros casados")
+    args = parser.parse_args(argv)
+    filtrar_e_salvar_snps_relevantes(args.entrada, args.saida)
 
 
 if __name__ == "__main__":
-    filtrar_e_salvar_snps_relevantes()
+    main()
@@ -0,0 +1,343 @@
+# ./tools/indice_genomico.py
+import argparse
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+import numpy as np
+import pandas as pd
+from config.env import INDICE_GENOMICO_DIR
+from utils.lotes import dividir_em_lotes
+
+# ========== ÍNDICE GENÔMICO (cromossomo/posição) DOS SNPs ANOTADOS ==========
+#
+#   posicoes.npy     posição de cada variante (uint32), ordenada por cromossomo e posição
+#   magnitudes.npy   maior magnitude entre os genótipos relevantes da pessoa (float32, NaN = nenhum)
+#   genes.npy        índice do gene anotado em genes.txt (int32, -1 = sem gene)
+#   rsids.npy        rsID de cada linha (bytes de largura fixa)
+#   genes.txt        tabela de nomes de genes
+#   meta.json        [início, fim) de cada cromossomo nos vetores acima, origem, data
+#   intervalos.npz   (opcional) tabela de genes: cromossomo, início, fim, nome
+#
+# Cada cromossomo é uma fatia contígua e ordenada dos vetores, então uma região
+# é uma busca binária (searchsorted) dentro da fatia. Tudo é reaberto com
+# mmap_mode="r": carregar o índice não lê os vetores, e uma consulta só toca
+# as páginas da fatia que ela percorre.
+
+ORDEM_CROMOSSOMOS = [str(n) for n in range(1, 23)] + ["X", "Y", "MT"]
+# Numeração da Ancestry para os não autossomos (25 = região pseudoautossômica, tratada como X)
+APELIDOS_CROMOSSOMOS = {"23": "X", "24": "Y", "25": "X", "26": "MT", "M": "MT", "XY": "X"}
+
+
+def normalizar_cromossomo(valor) -> str:
+    """'chr1' -> '1'; 'chrM', '26' -> 'MT'; '23' -> 'X'."""
+    nome = re.sub(r"^chr", "", str(valor).strip(), flags=re.IGNORECASE).upper()
+    return APELIDOS_CROMOSSOMOS.get(nome, nome)
+
+
+def _ordem_cromossomo(nome: str) -> tuple:
+    return (ORDEM_CROMOSSOMOS.index(nome), "") if nome in ORDEM_CROMOSSOMOS else (len(ORDEM_CROMOSSOMOS), nome)
+
+
+def interpretar_regiao(texto: str) -> tuple[str, int, int]:
+    """'chr19:44,900,000-44,910,000' -> ('19', 44900000, 44910000); 'chr19' -> o cromossomo inteiro."""
+    cromossomo, _, intervalo = texto.replace(",", "").partition(":")
+    if not intervalo:
+        return normalizar_cromossomo(cromossomo), 0, np.iinfo(np.uint32).max
+    inicio, _, fim = intervalo.partition("-")
+    return normalizar_cromossomo(cromossomo), int(inicio), int(fim or inicio)
+
+
+def gene_do_registro(registro: dict) -> str:
+    """Gene do MyVariant ou, na falta dele, o primeiro gene listado na SNPedia."""
+    genes = registro.get("genes") or []
+    return registro.get("gene") or (genes[0] if genes else "")
+
+
+def magnitudes_relevantes(registros: list[dict]) -> np.ndarray:
+    """Maior magnitude entre os genótipos da SNPedia que casam com a pessoa (NaN se nenhum)."""
+    from tools.genotype_matcher import casar_genotipos_em_lote
+
+    if all("alelos_relevantes" in r for r in registros):
+        relevantes = [r["alelos_relevantes"] for r in registros]
+    else:
+        relevantes = casar_genotipos_em_lote(registros)
+    magnitudes = np.full(len(registros), np.nan, dtype=np.float32)
+    for i, alelos in enumerate(relevantes):
+        valores = [a["magnitude"] for a in alelos if a.get("magnitude") is not None]
+        if valores:
+            magnitudes[i] = max(valores)
+    return magnitudes
+
+
+class IndiceGenomico:
+    def __init__(self, diretorio: Path | str = INDICE_GENOMICO_DIR):
+        self.diretorio = Path(diretorio)
+        caminho_meta = self.diretorio / "meta.json"
+        if not caminho_meta.exists():
+            raise FileNotFoundError(f"Nenhum índice genômico em {self.diretorio} (rode com --construir).")
+        self.meta = json.loads(caminho_meta.read_text(encoding="utf-8"))
+        self.cromossomos: dict[str, tuple[int, int]] = {c: tuple(f) for c, f in self.meta["cromossomos"].items()}
+        self.posicoes = np.load(self.diretorio / "posicoes.npy", mmap_mode="r")
+        self.magnitudes = np.load(self.diretorio / "magnitudes.npy", mmap_mode="r")
+        self.genes = np.load(self.diretorio / "genes.npy", mmap_mode="r")
+        self.rsids = np.load(self.diretorio / "rsids.npy", mmap_mode="r")
+        self.nomes_genes = (self.diretorio / "genes.txt").read_text(encoding="utf-8").split("\n")[:-1]
+        self._id_gene = {nome: i for i, nome in enumerate(self.nomes_genes)}
+        self.intervalos = None
+        if (self.diretorio / "intervalos.npz").exists():
+            with np.load(self.diretorio / "intervalos.npz") as dados:
+                self.intervalos = pd.DataFrame({k: dados[k] for k in ("cromossomo", "inicio", "fim", "gene")})
+
+    def __len__(self):
+        return len(self.posicoes)
+
+    # ---------- construção ----------
+
+    @classmethod
+    def construir(cls, registros: Iterable[dict], diretorio: Path | str = INDICE_GENOMICO_DIR,
+                  origem: str = "", tamanho_lote: int = 50_000) -> "IndiceGenomico":
+        """Indexa os registros (em fluxo, por lotes) e grava os vetores ordenados em `diretorio`."""
+        diretorio = Path(diretorio)
+        diretorio.mkdir(parents=True, exist_ok=True)
+        partes = {"cromossomo": [], "posicao": [], "magnitude": [], "gene": [], "rsid": []}
+        sem_posicao = 0
+        for lote in dividir_em_lotes(registros, tamanho_lote):
+            posicoes = pd.to_numeric(pd.Series([r.get("position") for r in lote], dtype=object), errors="coerce")
+            validos = posicoes.notna().to_numpy() & (posicoes.fillna(-1).to_numpy() >= 0)
+            sem_posicao += int((~validos).sum())
+            lote = [r for r, ok in zip(lote, validos) if ok]
+            if not lote:
+                continue
+            partes["cromossomo"].append(np.array([normalizar_cromossomo(r.get("chromosome", "")) for r in lote], dtype=object))
+            partes["posicao"].append(posicoes[validos].to_numpy(dtype=np.uint32))
+            partes["magnitude"].append(magnitudes_relevantes(lote))
+            partes["gene"].append(np.array([gene_do_registro(r) for r in lote], dtype=object))
+            partes["rsid"].append(np.array([r.get("rsid", "") for r in lote], dtype=object))
+
+        colunas = {k: np.concatenate(v) if v else np.array([], dtype=object) for k, v in partes.items()}
+        nomes_cromossomos = sorted(set(colunas["cromossomo"]), key=_ordem_cromossomo)
+        rank = {c: i for i, c in enumerate(nomes_cromossomos)}
+        codigos = np.array([rank[c] for c in colunas["cromossomo"]], dtype=np.int16)
+        ordem = np.lexsort((colunas["posicao"], codigos)) if len(codigos) else np.array([], dtype=np.int64)
+
+        # Genes como inteiros: agregações viram bincount
+        genes_ordenados = pd.Series(colunas["gene"][ordem], dtype=object)
+        genes_codigos, nomes_genes = pd.factorize(genes_ordenados.mask(genes_ordenados == ""))
+        fronteiras = np.searchsorted(codigos[ordem], np.arange(len(nomes_cromossomos) + 1))
+        np.save(diretorio / "posicoes.npy", np.asarray(colunas["posicao"], dtype=np.uint32)[ordem])
+        np.save(diretorio / "magnitudes.npy", np.asarray(colunas["magnitude"], dtype=np.float32)[ordem])
+        np.save(diretorio / "genes.npy", genes_codigos.astype(np.int32))
+        np.save(diretorio / "rsids.npy", np.array([r.encode("utf-8") for r in colunas["rsid"][ordem]], dtype="S"))
+        (diretorio / "genes.txt").write_text("".join(f"{g}\n" for g in nomes_genes), encoding="utf-8")
+        meta = {
+            "origem": origem,
+            "variantes": int(len(ordem)),
+            "sem_posicao": sem_posicao,
+            "construido": datetime.now().isoformat(timespec="seconds"),
+            "cromossomos": {c: [int(fronteiras[i]), int(fronteiras[i + 1])] for i, c in enumerate(nomes_cromossomos)},
+        }
+        (diretorio / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+        return cls(diretorio)
+
+    def importar_intervalos(self, caminho: Path | str):
+        """
+        Tabela de genes: BED (cromossomo, início 0-based, fim, nome) ou TSV/CSV
+        com cabeçalho contendo colunas de cromossomo, início, fim e gene.
+        Guardada em 1-based inclusivo, como as posições dos genomas.
+        """
+        caminho = Path(caminho)
+        nome = caminho.name.lower().removesuffix(".gz")
+        if nome.endswith(".bed"):
+            tabela = pd.read_csv(caminho, sep="\t", header=None, comment="#", usecols=[0, 1, 2, 3],
+                                 names=["cromossomo", "inicio", "fim", "gene"], dtype={0: str, 3: str})
+            tabela["inicio"] += 1
+        else:
+            tabela = pd.read_csv(caminho, sep=None, engine="python", dtype=str)
+            colunas = {c.lower().lstrip("#"): c for c in tabela.columns}
+            escolher = lambda *nomes: colunas[next(n for n in nomes if n in colunas)]
+            try:
+                tabela = pd.DataFrame({
+                    "cromossomo": tabela[escolher("cromossomo", "chromosome", "chrom", "chr", "seqname")],
+                    "inicio": pd.to_numeric(tabela[escolher("inicio", "start", "txstart", "chromstart")]),
+                    "fim": pd.to_numeric(tabela[escolher("fim", "end", "txend", "chromend")]),
+                    "gene": tabela[escolher("gene", "gene_name", "genesymbol", "symbol", "name2", "name")],
+                })
+            except StopIteration:
+                raise ValueError(f"{caminho}: esperado colunas de cromossomo, início, fim e gene") from None
+        tabela["cromossomo"] = tabela["cromossomo"].map(normalizar_cromossomo)
+        tabela = tabela.dropna().sort_values(["cromossomo", "inicio"])
+        np.savez(self.diretorio / "intervalos.npz",
+                 cromossomo=tabela["cromossomo"].to_numpy(dtype=str), inicio=tabela["inicio"].to_numpy(np.int64),
+                 fim=tabela["fim"].to_numpy(np.int64), gene=tabela["gene"].to_numpy(dtype=str))
+        self.intervalos = tabela.reset_index(drop=True)
+        return len(tabela)
+
+    # ---------- consultas ----------
+
+    def regiao(self, cromossomo: str, inicio: int, fim: int) -> np.ndarray:
+        """Linhas das variantes em [inicio, fim] (1-based, inclusivo), em ordem de posição."""
+        cromossomo = normalizar_cromossomo(cromossomo)
+        if cromossomo not in self.cromossomos:
+            return np.array([], dtype=np.int64)
+        a, b = self.cromossomos[cromossomo]
+        fatia = self.posicoes[a:b]
+        esquerda = np.searchsorted(fatia, inicio, side="left")
+        direita = np.searchsorted(fatia, fim, side="right")
+        return np.arange(a + esquerda, a + direita)
+
+    def gene(self, nome: str) -> np.ndarray:
+        """
+        Variantes do gene: pelas coordenadas da tabela de intervalos, se ela
+        tiver o gene; senão, pela anotação de cada registro (MyVariant/SNPedia).
+        """
+        if self.intervalos is not None:
+            coordenadas = self.intervalos[self.intervalos["gene"].str.upper() == nome.upper()]
+            if len(coordenadas):
+                linhas = [self.regiao(c, i, f) for c, i, f in coordenadas[["cromossomo", "inicio", "fim"]].itertuples(index=False)]
+                return np.unique(np.concatenate(linhas))
+        id_gene = self._id_gene.get(nome)
+        if id_gene is None:
+            id_gene = next((i for g, i in self._id_gene.items() if g.upper() == nome.upper()), None)
+        return np.flatnonzero(self.genes == id_gene) if id_gene is not None else np.array([], dtype=np.int64)
+
+    def cromossomo_das_linhas(self, linhas: np.ndarray) -> np.ndarray:
+        nomes = list(self.cromossomos)
+        inicios = np.array([self.cromossomos[c][0] for c in nomes])
+        return np.array(nomes, dtype=object)[np.searchsorted(inicios, linhas, side="right") - 1]
+
+    def variantes(self, linhas: np.ndarray) -> pd.DataFrame:
+        """Tabela das linhas: rsid, cromossomo, posição, gene e magnitude."""
+        linhas = np.asarray(linhas, dtype=np.int64)
+        genes = np.asarray(self.genes[linhas])
+        nomes = np.array(self.nomes_genes + [""], dtype=object)
+        return pd.DataFrame({
+            "rsid": np.char.decode(np.asarray(self.rsids[linhas]), "utf-8"),
+            "cromossomo": self.cromossomo_das_linhas(linhas),
+            "posicao": np.asarray(self.posicoes[linhas]),
+            "gene": nomes[genes],  # -1 cai no "" do fim
+            "magnitude": np.asarray(self.magnitudes[linhas]),
+        })
+
+    @staticmethod
+    def _agregar(grupos: np.ndarray, magnitudes: np.ndarray, n_grupos: int) -> dict[str, np.ndarray]:
+        """Contagens, soma e máximo de magnitude por grupo (NaN = variante sem genótipo relevante)."""
+        tem = ~np.isnan(magnitudes)
+        maximos = np.full(n_grupos, np.nan)
+        np.fmax.at(maximos, grupos[tem], magnitudes[tem])
+        return {
+            "variantes": np.bincount(grupos, minlength=n_grupos),
+            "com_magnitude": np.bincount(grupos[tem], minlength=n_grupos),
+            "magnitude_soma": np.bincount(grupos[tem], weights=magnitudes[tem], minlength=n_grupos),
+            "magnitude_max": maximos,
+        }
+
+    def resumo_genes(self, usar_intervalos: bool | None = None) -> pd.DataFrame:
+        """
+        Agregado por gene, ordenado pela soma de magnitudes. Usa a tabela de
+        intervalos quando ela existe (uma variante pode cair em mais de um gene),
+        senão o gene anotado em cada registro.
+        """
+        usar_intervalos = self.intervalos is not None if usar_intervalos is None else usar_intervalos
+        if usar_intervalos:
+            if self.intervalos is None:
+                raise ValueError("Índice sem tabela de intervalos (importe uma com --genes).")
+            grupos, linhas = [], []
+            for k, (cromossomo, inicio, fim) in enumerate(self.intervalos[["cromossomo", "inicio", "fim"]].itertuples(index=False)):
+                dentro = self.regiao(cromossomo, inicio, fim)
+                linhas.append(dentro)
+                grupos.append(np.full(len(dentro), k))
+            grupos = np.concatenate(grupos) if grupos else np.array([], dtype=np.int64)
+            linhas = np.concatenate(linhas) if linhas else np.array([], dtype=np.int64)
+            agregado = self._agregar(grupos, np.asarray(self.magnitudes[linhas], dtype=np.float64), len(self.intervalos))
+            tabela = pd.DataFrame({"gene": self.intervalos["gene"], **agregado})
+            # Genes com várias isoformas/intervalos: soma as contagens e fica com o maior máximo
+            tabela = tabela.groupby("gene", as_index=False).agg(
+                variantes=("variantes", "sum"), com_magnitude=("com_magnitude", "sum"),
+                magnitude_soma=("magnitude_soma", "sum"), magnitude_max=("magnitude_max", "max"),
+            )
+        else:
+            com_gene = np.flatnonzero(np.asarray(self.genes) >= 0)
+            agregado = self._agregar(np.asarray(self.genes[com_gene]), np.asarray(self.magnitudes[com_gene], dtype=np.float64),
+                                     len(self.nomes_genes))
+            tabela = pd.DataFrame({"gene": self.nomes_genes, **agregado})
+        tabela = tabela[tabela["variantes"] > 0]
+        return tabela.sort_values(["magnitude_soma", "variantes"], ascending=False).reset_index(drop=True)
+
+    def janelas(self, tamanho: int = 1_000_000, cromossomo: str | None = None) -> pd.DataFrame:
+        """Resumo por janelas fixas de `tamanho` pb (só as janelas com variantes)."""
+        nomes = [normalizar_cromossomo(cromossomo)] if cromossomo else list(self.cromossomos)
+        tabelas = []
+        for nome in nomes:
+            if nome not in self.cromossomos:
+                continue
+            a, b = self.cromossomos[nome]
+            if a == b:
+                continue
+            # Posições são 1-based: a janela k cobre k*tamanho+1 .. (k+1)*tamanho (posição 0 fica na primeira)
+            posicoes = np.asarray(self.posicoes[a:b], dtype=np.int64)
+            indices = np.maximum(posicoes - 1, 0) // tamanho
+            agregado = self._agregar(indices, np.asarray(self.magnitudes[a:b], dtype=np.float64), int(indices[-1]) + 1)
+            ocupadas = np.flatnonzero(agregado["variantes"])
+            tabelas.append(pd.DataFrame({
+                "cromossomo": nome,
+                "inicio": ocupadas * tamanho + 1,
+                "fim": (ocupadas + 1) * tamanho,
+                **{k: v[ocupadas] for k, v in agregado.items()},
+            }))
+        if not tabelas:
+            return pd.DataFrame(columns=["cromossomo", "inicio", "fim", "variantes", "com_magnitude",
+                                         "magnitude_soma", "magnitude_max"])
+        return pd.concat(tabelas, ignore_index=True)
+
+
+def main(argv=None):
+    from utils.record_store import iterar_registros
+
+    parser = argparse.ArgumentParser(description="Índice por cromossomo/posição dos SNPs anotados.")
+    parser.add_argument("--indice", default=INDICE_GENOMICO_DIR, help="pasta do índice")
+    parser.add_argument("--construir", metavar="PASTA", help="indexa a pasta de registros (shards ou JSONs)")
+    parser.add_argument("--genes", metavar="ARQUIVO", help="tabela de intervalos de genes (BED ou TSV) para o índice")
+    consultas = parser.add_mutually_exclusive_group()
+    consultas.add_argument("--regiao", help="ex.: chr19:44,900,000-44,910,000")
+    consultas.add_argument("--gene", help="variantes de um gene")
+    consultas.add_argument("--resumo-genes", action="store_true", help="genes ordenados pela soma de magnitudes")
+    consultas.add_argument("--janelas", type=int, metavar="PB", help="resumo por janelas de PB pares de base")
+    parser.add_argument("--cromossomo", help="restringe --janelas a um cromossomo")
+    parser.add_argument("--top", type=int, default=20, help="linhas mostradas")
+    args = parser.parse_args(argv)
+
+    if args.construir:
+        indice = IndiceGenomico.construir(iterar_registros(args.construir), args.indice, origem=args.construir)
+        print(f"✅ {len(indice)} variantes indexadas em {args.indice} "
+              f"({len(indice.cromossomos)} cromossomos, {len(indice.nomes_genes)} genes anotados"
+              f"{', ' + str(indice.meta['sem_posicao']) + ' sem posição' if indice.meta['sem_posicao'] else ''})")
+    else:
+        try:
+            indice = IndiceGenomico(args.indice)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            return
+    if args.genes:
+        print(f"🧬 {indice.importar_intervalos(args.genes)} intervalos de genes importados de {args.genes}")
+
+    pd.set_option("display.width", 160)
+    if args.regiao:
+        tabela = indice.variantes(indice.regiao(*interpretar_regiao(args.regiao)))
+    elif args.gene:
+        tabela = indice.variantes(indice.gene(args.gene))
+    elif args.resumo_genes:
+        tabela = indice.resumo_genes()
+    elif args.janelas:
+        tabela = indice.janelas(args.janelas, args.cromossomo).sort_values(
+            ["magnitude_soma", "variantes"], ascending=False)
+    else:
+        return
+    print(f"🔎 {len(tabela)} linhas")
+    if len(tabela):
+        print(tabela.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,172 @@
 # ./tools/load_map_variants.py
 import pandas as pd
-import httpx
 from tqdm import tqdm
 from pathlib import Path
-from config.env import API_MYVARIANT, CSV_ENTRADA, CSV_SAIDA
+from typing import Iterable
+from config.env import API_MYVARIANT, API_MYVARIANT_QUERY, TAMANHO_LOTE_MYVARIANT, CSV_ENTRADA, CSV_SAIDA
+from tools.anotacao_local import obter_anotacao_local
+from utils.http_cache import obter_cache
+from utils.lotes import dividir_em_lotes
+from utils.metricas import cronometrado, erro_silenciado
+from utils.politica_rede import ErroTransitorio, obter_politica
 
 # ========== ETAPA 1: LEITURA E MAPEAMENTO BÁSICO MyVariant ==========
 
+CAMPOS_MYVARIANT = "dbsnp.gene.symbol,clinvar.clinical_significance"
+
 def carregar_csv(caminho: str) -> pd.DataFrame:
-    df = pd.read_csv(caminho, dtype=str)
-    df = df.drop_duplicates(subset=["RSID"])
-    df = df[["RSID", "CHROMOSOME", "POSITION", "RESULT"]]
-    return df.reset_index(drop=True)
+    """Genoma (CSV do projeto ou exportação 23andMe/Ancestry) sem duplicados nem sem-chamadas."""
+    from tools.genome_reader import ler_genoma
+
+    return ler_genoma(caminho)
+
+
+def primeiro_documento(valor) -> dict:
+    # O MyVariant devolve lista quando há mais de um hit, gene ou registro ClinVar
+    if isinstance(valor, list):
+        return valor[0] if valor else {}
+    return valor or {}
+
+
+def extrair_gene_clin(dados: dict) -> tuple[str, str]:
+    """Extrai (gene_symbol, clinical_significance) de um documento do MyVariant."""
+    gene = primeiro_documento(dados.get("dbsnp", {}).get("gene", {})).get("symbol", "")
+    clin = primeiro_documento(dados.get("clinvar", {})).get("clinical_significance", "")
+    return gene, clin
+
+
+def chave_rsid(rsid: str) -> str:
+    """Chave usada nos resultados em lote: rsID sem espaços e em minúsculas."""
+    return rsid.strip().lower()
 
 
 def consultar_myvariant(rsid: str) -> tuple[str, str]:
     """
-    Consulta MyVariant.info via API HTTP (requests).
-    Retorna (gene_symbol, clinical_significance).
+    Consulta MyVariant.info via API HTTP (ou a base local, conforme MYVARIANT_BACKEND).
+    Retorna (gene_symbol, clinical_significance); ("", "") se o rsID não tem
+    dados. Falhas transitórias (timeout, 429, 5xx) levantam ErroTransitorio
+    em vez de virar uma anotação vazia.
     """
+    chave = chave_rsid(rsid)
+    resolvidos, faltantes = separar_cache_myvariant([chave])
+    if not faltantes:
+        return resolvidos[chave]
+    resp = obter_politica().get(f"{API_MYVARIANT}{rsid}")
+    if resp.status_code != 200:
+        return "", ""
     try:
-        resp =  httpx.get(f"{API_MYVARIANT}{rsid}", timeout=50)
-        if resp.status_code == 200:
-            dados = resp.json()
-            gene = dados.get("dbsnp", {}).get("gene", {}).get("symbol", "")
-            clin = dados.get("clinvar", {}).get("clinical_significance", "")
-            return gene, clin
-    except Exception:
-        pass
-    return "", ""
+        dados = primeiro_documento(resp.json())
+    except ValueError as e:
+        erro_silenciado("consultar_myvariant", e)
+        return "", ""
+    return registrar_lote_myvariant({chave: dados})[chave]
+
+
+def parametros_lote_myvariant(lote: list[str]) -> dict:
+    """Corpo do POST /query para buscar vários rsIDs de uma vez."""
+    return {"q": ",".join(lote), "scopes": "dbsnp.rsid", "fields": CAMPOS_MYVARIANT}
+
+
+def agrupar_hits_myvariant(lote: list[str], hits: list[dict]) -> dict[str, dict]:
+    """
+    Converte a resposta do POST /query em {rsid: documento}, usando o primeiro
+    hit de cada rsID. rsIDs do lote sem hit recebem {} (também vai para o cache).
+    """
+    documentos = {}
+    for hit in hits:
+        rsid = chave_rsid(hit.get("query", ""))
+        if hit.get("notfound") or rsid in documentos:
+            continue
+        documentos[rsid] = hit
+    return {rsid: documentos.get(rsid, {}) for rsid in lote}
+
+
+def separar_cache_myvariant(unicos: list[str]) -> tuple[dict[str, tuple[str, str]], list[str]]:
+    """
+    Divide os rsIDs entre os já resolvidos (base local de anotação ou cache)
+    e os que faltam consultar no MyVariant.
+    """
+    resolvidos, pendentes = {}, unicos
+    local = obter_anotacao_local()
+    if local is not None:
+        resolvidos, pendentes = local.separar(unicos)
+    cache = obter_cache()
+    if cache is None or not pendentes:
+        return resolvidos, pendentes
+    faltantes = []
+    for rsid in pendentes:
+        dados = cache.obter_json("myvariant", rsid)
+        if dados is None:
+            faltantes.append(rsid)
+        else:
+            resolvidos[rsid] = extrair_gene_clin(dados)
+    return resolvidos, faltantes
+
+
+def registrar_lote_myvariant(documentos: dict[str, dict]) -> dict[str, tuple[str, str]]:
+    """Guarda os documentos de um lote no cache e retorna {rsid: (gene, clin)}."""
+    cache = obter_cache()
+    if cache is not None:
+        for rsid, dados in documentos.items():
+            cache.guardar_json("myvariant", rsid, dados)
+    return {rsid: extrair_gene_clin(dados) for rsid, dados in documentos.items()}
+
+
+@cronometrado("myvariant_lote")
+def consultar_myvariant_lote(
+    rsids: Iterable[str], tamanho_lote: int = TAMANHO_LOTE_MYVARIANT, progresso: bool = False
+) -> dict[str, tuple[str, str] | ErroTransitorio]:
+    """
+    Consulta vários rsIDs no MyVariant com POST em lotes de até `tamanho_lote`.
+    Remove duplicados e retorna {rsid em minúsculas: (gene_symbol, clinical_significance)};
+    rsIDs sem dados ficam com ("", ""), e os de um lote que falhou de forma
+    transitória ficam com o ErroTransitorio (ver `anotacao_myvariant`).
+    """
+    unicos = list(dict.fromkeys(chave_rsid(r) for r in rsids if r))
+    resultado = {rsid: ("", "") for rsid in unicos}
+    em_cache, faltantes = separar_cache_myvariant(unicos)
+    resultado.update(em_cache)
+    if not faltantes:
+        return resultado
+
+    lotes = dividir_em_lotes(faltantes, tamanho_lote)
+    if progresso:
+        lotes = tqdm(lotes, total=-(-len(faltantes) // tamanho_lote), desc="Mapeando MyVariant", unit="lote")
+
+    politica = obter_politica()
+    for lote in lotes:
+        try:
+            resp = politica.post(API_MYVARIANT_QUERY, data=parametros_lote_myvariant(lote))
+            if resp.status_code == 200:
+                resultado.update(registrar_lote_myvariant(agrupar_hits_myvariant(lote, resp.json())))
+        except ErroTransitorio as e:
+            resultado.update({rsid: e for rsid in lote})
+        except Exception as e:
+            erro_silenciado("consultar_myvariant_lote", e)
+    return resultado
+
+
+def anotacao_myvariant(anotacoes: dict, rsid: str) -> tuple[str, str]:
+    """(gene, clin) do rsID num resultado de `consultar_myvariant_lote`; levanta o erro se o lote dele falhou."""
+    valor = anotacoes.get(chave_rsid(rsid), ("", ""))
+    if isinstance(valor, Exception):
+        raise valor
+    return valor
 
 
 def mapear_variantes(df: pd.DataFrame) -> pd.DataFrame:
-    genes, clins = [], []
-    for rsid in tqdm(df["RSID"], desc="Mapeando MyVariant"):
-        gene, clin = consultar_myvariant(rsid)
+    anotacoes = consultar_myvariant_lote(df["RSID"], progresso=True)
+    genes, clins, sem_resposta = [], [], 0
+    for rsid in df["RSID"]:
+        try:
+            gene, clin = anotacao_myvariant(anotacoes, rsid)
+        except ErroTransitorio:
+            gene, clin = "", ""
+            sem_resposta += 1
         genes.append(gene)
         clins.append(clin)
+    if sem_resposta:
+        print(f"⚠️ {sem_resposta} rsIDs ficaram sem resposta do MyVariant (falha transitória); rode de novo para completá-los.")
     df["GENE"] = genes
     df["SIGNIFICADO_CLINICO"] = clins
     return df
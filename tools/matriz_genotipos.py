@@ -0,0 +1,302 @@
+# ./tools/matriz_genotipos.py
+import argparse
+import json
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from config.env import MATRIZ_GENOTIPOS_DIR
+from tools.genome_reader import GENOTIPOS, ler_genoma_em_blocos
+
+# ========== MATRIZ DE GENÓTIPOS EMPACOTADA (2 bits por chamada) ==========
+#
+#   matriz.u8     amostras x ceil(capacidade / 4) bytes, lida por np.memmap
+#   rsids.npy     número do rs de cada coluna (int64), na ordem das colunas
+#   alelos.npy    colunas x 2: alelos A e B da coluna (índices em ALFABETO, 0 = ainda não visto)
+#   amostras.txt  nome de cada linha, na mesma ordem
+#   meta.json     colunas em uso e capacidade (largura das linhas)
+#
+# Código de cada chamada: 0 = sem chamada (ou alelo fora do dicionário da
+# coluna), 1 = AA, 2 = AB, 3 = BB. Os alelos de uma coluna são os dois
+# primeiros vistos na coorte e nunca mudam, então os códigos já gravados
+# continuam válidos quando novas amostras chegam. rsIDs novos viram colunas
+# no fim; as linhas antigas ficam com 0 nelas (se a capacidade acabar, o
+# arquivo é reescrito com linhas mais largas).
+#
+# 700k SNPs cabem em 175 KB por pessoa: 500 genomas somam ~90 MB.
+
+ALFABETO = "ACGTDI"  # mesmo alfabeto das categorias de GENOTIPOS no genome_reader
+BLOCO_SIMILARIDADE = 1 << 14  # SNPs por bloco nas multiplicações
+_DESLOCAMENTOS = np.array([0, 2, 4, 6], dtype=np.uint8)
+
+
+def _tabela_alelos() -> tuple[np.ndarray, np.ndarray]:
+    """Para cada categoria de GENOTIPOS, os índices (1-based) dos dois alelos; hemizigoto 'A' vira 'AA'."""
+    primeiro, segundo = [], []
+    for genotipo in GENOTIPOS.categories:
+        primeiro.append(ALFABETO.index(genotipo[0]) + 1)
+        segundo.append(ALFABETO.index(genotipo[-1]) + 1)
+    return np.array(primeiro, dtype=np.uint8), np.array(segundo, dtype=np.uint8)
+
+
+ALELO_1, ALELO_2 = _tabela_alelos()
+
+
+def empacotar(codigos: np.ndarray) -> np.ndarray:
+    """Códigos 0..3 (comprimento múltiplo de 4) -> bytes, 4 chamadas por byte."""
+    grupos = codigos.reshape(-1, 4).astype(np.uint8)
+    return grupos[:, 0] | (grupos[:, 1] << 2) | (grupos[:, 2] << 4) | (grupos[:, 3] << 6)
+
+
+def desempacotar(bytes_: np.ndarray) -> np.ndarray:
+    """Bytes (amostras x b) -> códigos (amostras x 4b)."""
+    bytes_ = np.asarray(bytes_)
+    return ((bytes_[..., None] >> _DESLOCAMENTOS) & 3).reshape(*bytes_.shape[:-1], -1)
+
+
+class MatrizGenotipos:
+    def __init__(self, diretorio: Path | str = MATRIZ_GENOTIPOS_DIR):
+        self.diretorio = Path(diretorio)
+        self.caminho_matriz = self.diretorio / "matriz.u8"
+        self.caminho_amostras = self.diretorio / "amostras.txt"
+        self.caminho_meta = self.diretorio / "meta.json"
+
+        meta = json.loads(self.caminho_meta.read_text(encoding="utf-8")) if self.caminho_meta.exists() else {}
+        self.colunas = meta.get("colunas", 0)
+        self.capacidade = meta.get("capacidade", 0)
+        self.rsids = np.load(self.diretorio / "rsids.npy") if self.colunas else np.zeros(0, dtype=np.int64)
+        self.alelos = np.load(self.diretorio / "alelos.npy") if self.colunas else np.zeros((0, 2), dtype=np.uint8)
+        self.amostras: list[str] = []
+        if self.caminho_amostras.exists():
+            self.amostras = self.caminho_amostras.read_text(encoding="utf-8").split("\n")[:-1]
+        self._reconciliar()
+        self._indice = pd.Index(self.rsids)
+        self._mapa = None
+
+    @property
+    def largura(self) -> int:
+        """Bytes por linha."""
+        return self.capacidade // 4
+
+    def _reconciliar(self):
+        """Após uma interrupção, linhas e nomes podem divergir: corta no menor."""
+        linhas = self.caminho_matriz.stat().st_size // self.largura if self.largura and self.caminho_matriz.exists() else 0
+        n = min(linhas, len(self.amostras))
+        if linhas != n:
+            with open(self.caminho_matriz, "r+b") as f:
+                f.truncate(n * self.largura)
+        if len(self.amostras) != n:
+            self.amostras = self.amostras[:n]
+            self.caminho_amostras.write_text("".join(f"{a}\n" for a in self.amostras), encoding="utf-8")
+
+    def __len__(self):
+        return len(self.amostras)
+
+    @property
+    def matriz(self) -> np.ndarray:
+        """Amostras x largura bytes, só leitura (mapeada do disco)."""
+        if not self.amostras:
+            return np.zeros((0, self.largura), dtype=np.uint8)
+        if self._mapa is None or self._mapa.shape != (len(self.amostras), self.largura):
+            self._mapa = np.memmap(self.caminho_matriz, dtype=np.uint8, mode="r",
+                                   shape=(len(self.amostras), self.largura))
+        return self._mapa
+
+    # ---------- codificação ----------
+
+    def _colunas_de(self, numeros: np.ndarray) -> np.ndarray:
+        """Coluna de cada número de rs, criando colunas para os que o dicionário ainda não tem."""
+        colunas = self._indice.get_indexer(numeros)
+        novos = colunas < 0
+        if novos.any():
+            colunas[novos] = np.arange(self.colunas, self.colunas + novos.sum())
+            self.rsids = np.concatenate([self.rsids, numeros[novos]])
+            self.alelos = np.concatenate([self.alelos, np.zeros((novos.sum(), 2), dtype=np.uint8)])
+            self.colunas = len(self.rsids)
+            self._indice = pd.Index(self.rsids)
+        return colunas
+
+    def codificar(self, rsids: pd.Series, genotipos: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (colunas, códigos) de uma amostra. `rsids` em minúsculas ('rs123') e
+        `genotipos` na categoria GENOTIPOS, como saem de ler_genoma_em_blocos.
+        Atualiza o dicionário: colunas novas e alelos ainda não vistos.
+        """
+        numeros = pd.to_numeric(rsids.str[2:]).to_numpy(np.int64)
+        categorias = genotipos.astype(GENOTIPOS).cat.codes.to_numpy()
+        validos = categorias >= 0
+        numeros, categorias = numeros[validos], categorias[validos]
+        a1, a2 = ALELO_1[categorias], ALELO_2[categorias]
+        colunas = self._colunas_de(numeros)
+
+        # O primeiro alelo visto numa coluna vira A; o primeiro diferente dele, B
+        for alelo in (a1, a2):
+            sem_a = self.alelos[colunas, 0] == 0
+            self.alelos[colunas[sem_a], 0] = alelo[sem_a]
+            sem_b = (self.alelos[colunas, 1] == 0) & (alelo != self.alelos[colunas, 0])
+            self.alelos[colunas[sem_b], 1] = alelo[sem_b]
+
+        a, b = self.alelos[colunas, 0], self.alelos[colunas, 1]
+        conhecidos = ((a1 == a) | (a1 == b)) & ((a2 == a) | (a2 == b))  # 3º alelo: sem chamada
+        codigos = np.where(conhecidos, 1 + (a1 == b) + (a2 == b), 0).astype(np.uint8)
+        return colunas, codigos
+
+    def _garantir_capacidade(self):
+        """Reescreve a matriz com linhas mais largas se o dicionário passou da capacidade."""
+        if self.colunas <= self.capacidade:
+            return
+        nova = -(-int(self.colunas * 1.25) // 4) * 4  # folga para as próximas amostras, múltiplo de 4
+        if self.amostras:
+            antiga = np.array(self.matriz)
+            self._mapa = None
+            larga = np.zeros((len(self.amostras), nova // 4), dtype=np.uint8)
+            larga[:, :antiga.shape[1]] = antiga  # colunas novas ficam 0 (sem chamada) nas linhas antigas
+            temporario = self.caminho_matriz.with_suffix(".tmp")
+            larga.tofile(temporario)
+            temporario.replace(self.caminho_matriz)
+        self.capacidade = nova
+
+    def _salvar_dicionario(self):
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        np.save(self.diretorio / "rsids.npy", self.rsids)
+        np.save(self.diretorio / "alelos.npy", self.alelos)
+        self.caminho_meta.write_text(json.dumps({
+            "colunas": self.colunas, "capacidade": self.capacidade, "alfabeto": ALFABETO,
+        }), encoding="utf-8")
+
+    def adicionar(self, nome: str, rsids: pd.Series, genotipos: pd.Series) -> dict:
+        """Codifica e grava uma amostra (substitui a linha se o nome já existe). Retorna contagens."""
+        colunas, codigos = self.codificar(rsids, genotipos)
+        self._garantir_capacidade()
+        linha = np.zeros(self.capacidade, dtype=np.uint8)
+        linha[colunas] = codigos
+        empacotada = empacotar(linha)
+
+        # Dicionário antes da linha: colunas sobrando no dicionário são inofensivas
+        self._salvar_dicionario()
+        if nome in self.amostras:
+            self._mapa = None
+            with open(self.caminho_matriz, "r+b") as f:
+                f.seek(self.amostras.index(nome) * self.largura)
+                f.write(empacotada.tobytes())
+        else:
+            with open(self.caminho_matriz, "ab") as f:
+                f.write(empacotada.tobytes())
+            with open(self.caminho_amostras, "a", encoding="utf-8") as f:
+                f.write(f"{nome}\n")
+            self.amostras.append(nome)
+        return {"chamadas": int((codigos > 0).sum()), "fora_do_dicionario": int((codigos == 0).sum())}
+
+    def adicionar_arquivo(self, caminho: Path | str, nome: str | None = None) -> dict:
+        """Lê um genoma (23andMe, Ancestry ou CSV) e o adiciona como uma linha."""
+        from tools.coorte import nome_amostra
+
+        blocos = list(ler_genoma_em_blocos(caminho))
+        if not blocos:
+            raise ValueError(f"Nenhuma chamada válida em {caminho}")
+        genoma = pd.concat(blocos, ignore_index=True)
+        return self.adicionar(nome or nome_amostra(Path(caminho)), genoma["RSID"], genoma["RESULT"])
+
+    # ---------- leitura ----------
+
+    def codigos(self, amostra: str | int) -> np.ndarray:
+        """Códigos 0..3 de uma amostra, um por coluna do dicionário."""
+        linha = self.amostras.index(amostra) if isinstance(amostra, str) else amostra
+        return desempacotar(self.matriz[linha])[:self.colunas]
+
+    def genotipos(self, amostra: str | int) -> pd.Series:
+        """Genótipos da amostra como texto ('AG'), indexados por rsID; sem chamada fica de fora."""
+        codigos = self.codigos(amostra)
+        letras = np.array([""] + list(ALFABETO), dtype=object)
+        a, b = letras[self.alelos[:, 0]], letras[self.alelos[:, 1]]
+        texto = np.select([codigos == 1, codigos == 2, codigos == 3], [a + a, a + b, b + b], "")
+        chamados = codigos > 0
+        return pd.Series(texto[chamados], index=np.char.add("rs", self.rsids[chamados].astype(str)), name="genotipo")
+
+    # ---------- similaridade ----------
+
+    def similaridade(self, amostras: list[str] | None = None, bloco: int = BLOCO_SIMILARIDADE) -> dict[str, np.ndarray]:
+        """
+        Contagens identity-by-state entre todos os pares, em blocos de SNPs.
+        Por bloco, com indicadores one-hot em float32 (linha = amostra):
+            M = chamado, H1 = heterozigoto, P = H0 + H2, Q = H0 - H2
+            comparaveis += M Mᵀ           IBS0 = (P Pᵀ - Q Qᵀ) / 2  (homozigotos opostos)
+            IBS2 = (P Pᵀ + Q Qᵀ) / 2 + H1 H1ᵀ                         (genótipo idêntico)
+        Os quatro produtos são X Xᵀ, que o BLAS resolve pela metade (syrk).
+        Retorna matrizes n x n: comparaveis, ibs0, ibs1, ibs2, ibs (média de
+        alelos compartilhados, 0..1) e hamming (fração de genótipos diferentes).
+        """
+        linhas = [self.amostras.index(a) for a in amostras] if amostras else list(range(len(self.amostras)))
+        n = len(linhas)
+        acumulados = {k: np.zeros((n, n), dtype=np.float64) for k in ("mm", "h1", "pp", "qq")}
+        matriz = self.matriz
+        usados = -(-self.colunas // 4)
+        passo = max(1, bloco // 4)
+        for inicio in range(0, usados, passo):
+            codigos = desempacotar(matriz[linhas, inicio:min(inicio + passo, usados)])
+            h0, h1, h2 = (codigos == 1), (codigos == 2), (codigos == 3)
+            for chave, x in (("mm", codigos > 0), ("h1", h1), ("pp", h0 | h2)):
+                x = np.ascontiguousarray(x, dtype=np.float32)
+                acumulados[chave] += x @ x.T
+            q = h0.astype(np.float32) - h2.astype(np.float32)
+            acumulados["qq"] += q @ q.T
+
+        comparaveis = acumulados["mm"]
+        ibs0 = (acumulados["pp"] - acumulados["qq"]) / 2
+        ibs2 = (acumulados["pp"] + acumulados["qq"]) / 2 + acumulados["h1"]
+        ibs1 = comparaveis - ibs0 - ibs2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ibs = (2 * ibs2 + ibs1) / (2 * comparaveis)
+            hamming = (comparaveis - ibs2) / comparaveis
+        return {"comparaveis": comparaveis, "ibs0": ibs0, "ibs1": ibs1, "ibs2": ibs2, "ibs": ibs, "hamming": hamming}
+
+    def pares(self, amostras: list[str] | None = None, **kwargs) -> pd.DataFrame:
+        """Tabela com um par de amostras por linha, do mais parecido para o menos."""
+        nomes = amostras or self.amostras
+        resultado = self.similaridade(amostras, **kwargs)
+        i, j = np.triu_indices(len(nomes), k=1)
+        tabela = pd.DataFrame({
+            "amostra_1": np.array(nomes, dtype=object)[i],
+            "amostra_2": np.array(nomes, dtype=object)[j],
+            **{k: v[i, j] for k, v in resultado.items()},
+        })
+        for k in ("comparaveis", "ibs0", "ibs1", "ibs2"):
+            tabela[k] = tabela[k].astype(np.int64)
+        return tabela.sort_values("ibs", ascending=False).reset_index(drop=True)
+
+
+def main(argv=None):
+    from tools.coorte import listar_amostras
+
+    parser = argparse.ArgumentParser(description="Genótipos da coorte em 2 bits por chamada e similaridade entre amostras.")
+    parser.add_argument("--matriz", default=MATRIZ_GENOTIPOS_DIR, help="pasta da matriz")
+    parser.add_argument("--adicionar", metavar="CAMINHO", help="arquivo de genoma, ou pasta com vários")
+    parser.add_argument("--similaridade", action="store_true", help="IBS e Hamming entre todos os pares")
+    parser.add_argument("--saida", help="CSV com a tabela de pares")
+    parser.add_argument("--top", type=int, default=20, help="pares mostrados")
+    args = parser.parse_args(argv)
+
+    matriz = MatrizGenotipos(args.matriz)
+    if args.adicionar:
+        caminho = Path(args.adicionar)
+        for arquivo in listar_amostras(caminho) if caminho.is_dir() else [caminho]:
+            inicio = time.perf_counter()
+            contagem = matriz.adicionar_arquivo(arquivo)
+            print(f"🧬 {arquivo.name}: {contagem['chamadas']} chamadas "
+                  f"({contagem['fora_do_dicionario']} fora do dicionário) em {time.perf_counter() - inicio:.1f}s")
+    print(f"🗄️ {len(matriz)} amostras x {matriz.colunas} SNPs em {args.matriz} "
+          f"({matriz.caminho_matriz.stat().st_size / 1e6 if len(matriz) else 0:.1f} MB)")
+
+    if args.similaridade and len(matriz) >= 2:
+        inicio = time.perf_counter()
+        pares = matriz.pares()
+        print(f"⏱️ {len(pares)} pares em {time.perf_counter() - inicio:.1f}s")
+        pd.set_option("display.width", 160)
+        print(pares.head(args.top).to_string(index=False))
+        if args.saida:
+            pares.to_csv(args.saida, index=False)
+            print(f"✅ Pares salvos em: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
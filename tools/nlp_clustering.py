@@ -1,20 +1,32 @@
+import argparse
 import os
-import json
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.decomposition import PCA
-from sklearn.cluster import KMeans
-from collections import Counter
+from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
+from utils.lotes import dividir_em_lotes
+from utils.record_store import iterar_registros
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # ============================ CONFIG ============================
 PASTA_MAPEADA = Path(os.getenv("SNP_DATA_DIR", "resultados/snps_filtrados"))
 NUM_CLUSTERS = int(os.getenv("NUM_CLUSTERS", 8))
 MAX_LABEL_LENGTH = 50  # máximo de caracteres por rótulo no gráfico
 SAVE_CLUSTER_REPORT = True
-SAVE_FIG_PATH = f"cluster_visualization_{pd.Timestamp.now().strftime('%Y-%m-%d_%H-%M-%S')}.png"
+PADRAO_FIGURA = "cluster_visualization_{data}.png"  # data da execução, preenchida ao plotar
+
+# Modo incremental: estado persistido entre execuções
+MODO_CLUSTER = os.getenv("MODO_CLUSTER", "completo")  # "completo" (TF-IDF + KMeans) ou "incremental"
+MODELO_CLUSTERS = Path(os.getenv("MODELO_CLUSTERS", "cache/modelo_clusters.joblib"))
+TAMANHO_BLOCO_CLUSTER = int(os.getenv("TAMANHO_BLOCO_CLUSTER", 10_000))
+N_FEATURES_HASH = 2 ** 18
+
+# Gráfico: acima deste número de pontos, desenha densidade em vez de um marcador por SNP
+LIMIAR_PLOT_GRANDE = int(os.getenv("LIMIAR_PLOT_GRANDE", 500))
+ROTULOS_POR_CLUSTER = int(os.getenv("ROTULOS_POR_CLUSTER", 5))
+RESOLUCAO_DENSIDADE = 400  # bins por eixo no modo de densidade
+TOKEN_PATTERN = r"\b[a-zA-Z][a-zA-Z\-]+\b"
 
 CUSTOM_STOPWORDS = set([
     "common", "normal", "aka", "clinvar", "pmid",
@@ -23,84 +35,380 @@ CUSTOM_STOPWORDS = set([
     "the", "a", "to", "of", "is", "and"
 ])
 
+# pandas, numpy, scikit-learn, matplotlib e joblib são importados dentro das funções
+# que os usam: `--help` e quem só precisa de textos_snps não pagam segundos de import
+
+
+def caminho_figura() -> str:
+    return PADRAO_FIGURA.format(data=datetime.now().strftime("%Y-%m-%d_%H-%M-%S"))
+
 # ============================ LOAD ============================
+def textos_snps(registros):
+    """Gera {"rsid", "texto"} dos registros com dados encontrados e algum texto."""
+    for snp in registros:
+        if not (snp.get("found_snpedia_data") or snp.get("found_myvariant_data")):
+            continue
+        if not (snp.get("trait") or snp.get("resumo") or snp.get("descricao_livre")):
+            continue
+        texto = " ".join([
+            snp.get("trait") or "",
+            snp.get("resumo") or "",
+            snp.get("descricao_livre") or ""
+        ]).strip()
+        if texto:
+            yield {"rsid": snp["rsid"], "texto": texto}
+
+def carregar_registros(registros):
+    """DataFrame de textos a partir de qualquer iterável de registros (ex.: uma etapa do orquestrador)."""
+    import pandas as pd
+
+    return pd.DataFrame(list(textos_snps(registros)), columns=["rsid", "texto"])
+
 def carregar_snps(diretorio):
-    dados = []
-    for arquivo in diretorio.glob("*.json"):
-        with open(arquivo, encoding="utf-8") as f:
-            snp = json.load(f)
-            if not (snp.get("found_snpedia_data") or snp.get("found_myvariant_data")):
-                continue
-            if not (snp.get("trait") or snp.get("resumo") or snp.get("descricao_livre")):
-                continue
-            texto = " ".join([
-                snp.get("trait", ""),
-                snp.get("resumo", ""),
-                snp.get("descricao_livre", "")
-            ]).strip()
-            if texto:
-                dados.append({"rsid": snp["rsid"], "texto": texto})
-    return pd.DataFrame(dados)
+    return carregar_registros(iterar_registros(diretorio))
 
 # ============================ NLP + CLUSTER ============================
 def clusterizar(df):
+    from sklearn.cluster import KMeans
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
     tfidf = TfidfVectorizer(
         stop_words=list(CUSTOM_STOPWORDS),
         max_features=1000,
-        token_pattern=r"\b[a-zA-Z][a-zA-Z\-]+\b"
+        token_pattern=TOKEN_PATTERN
     )
     X = tfidf.fit_transform(df["texto"])
 
     kmeans = KMeans(n_clusters=NUM_CLUSTERS, random_state=42)
     df["cluster"] = kmeans.fit_predict(X)
 
-    pca = PCA(n_components=2)
-    [coords] = [pca.fit_transform(X)]
+    # TruncatedSVD trabalha direto na matriz esparsa (o PCA exigiria densificá-la)
+    svd = TruncatedSVD(n_components=2, random_state=42)
+    coords = svd.fit_transform(X)
     df["x"] = coords[:, 0]
     df["y"] = coords[:, 1]
 
     return df, tfidf, kmeans
 
+# ============================ MODO INCREMENTAL ============================
+class ModeloClusters:
+    """
+    Estado do modo incremental: HashingVectorizer (sem vocabulário para ajustar),
+    MiniBatchKMeans treinado por partial_fit e TruncatedSVD para as coordenadas.
+    Salvo em disco com os rsIDs já usados no treino, permite atribuir SNPs novos
+    e treinar só com eles, sem reclusterizar o corpus.
+    """
+
+    def __init__(self, n_clusters: int = NUM_CLUSTERS):
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.decomposition import TruncatedSVD
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.vetorizador = HashingVectorizer(
+            n_features=N_FEATURES_HASH,
+            stop_words=list(CUSTOM_STOPWORDS),
+            token_pattern=TOKEN_PATTERN,
+            alternate_sign=False,
+        )
+        self.kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, n_init=3)
+        self.svd = TruncatedSVD(n_components=2, random_state=42)
+        self.rsids_treinados: set[str] = set()
+
+    @property
+    def n_treinados(self) -> int:
+        return len(self.rsids_treinados)
+
+    @property
+    def treinado(self) -> bool:
+        return self.n_treinados > 0
+
+    def vetorizar(self, textos):
+        return self.vetorizador.transform(textos)
+
+    def treinar(self, rsids: list[str], X):
+        if not self.treinado:
+            if X.shape[0] < self.kmeans.n_clusters:
+                raise ValueError(f"O primeiro bloco tem {X.shape[0]} SNPs, menos que {self.kmeans.n_clusters} clusters.")
+            # A projeção 2D é ajustada uma vez, no primeiro bloco, e fica fixa
+            self.svd.fit(X)
+        self.kmeans.partial_fit(X)
+        self.rsids_treinados.update(rsids)
+
+    def atribuir(self, X):
+        """Rótulos e coordenadas 2D de um bloco, sem alterar o modelo."""
+        return self.kmeans.predict(X), self.svd.transform(X)
+
+    @classmethod
+    def carregar(cls, caminho: Path | str = MODELO_CLUSTERS) -> "ModeloClusters | None":
+        caminho = Path(caminho)
+        if not caminho.exists():
+            return None
+        import joblib
+
+        # Só componentes do sklearn no arquivo: carrega mesmo rodando o módulo como script
+        estado = joblib.load(caminho)
+        modelo = cls(estado["kmeans"].n_clusters)
+        modelo.kmeans, modelo.svd = estado["kmeans"], estado["svd"]
+        # Modelos gravados antes da lista de rsIDs: o próximo treino revê o corpus uma vez
+        modelo.rsids_treinados = set(estado.get("rsids_treinados", ()))
+        return modelo
+
+    def salvar(self, caminho: Path | str = MODELO_CLUSTERS):
+        import joblib
+
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump({"kmeans": self.kmeans, "svd": self.svd, "rsids_treinados": self.rsids_treinados}, caminho)
+
+
+def treinar_incremental(registros: Iterable[dict], modelo: ModeloClusters,
+                        tamanho_bloco: int = TAMANHO_BLOCO_CLUSTER) -> int:
+    """partial_fit em blocos só com os SNPs que o modelo ainda não viu; retorna quantos."""
+    novos = (t for t in textos_snps(registros) if t["rsid"] not in modelo.rsids_treinados)
+    total = 0
+    for bloco in dividir_em_lotes(novos, tamanho_bloco):
+        bloco = list({t["rsid"]: t for t in bloco}.values())  # rsID repetido na entrada conta uma vez
+        modelo.treinar([t["rsid"] for t in bloco], modelo.vetorizar([t["texto"] for t in bloco]))
+        total += len(bloco)
+    return total
+
+
+def atribuir_em_blocos(registros: Iterable[dict], modelo: ModeloClusters,
+                       tamanho_bloco: int = TAMANHO_BLOCO_CLUSTER) -> Iterator["pd.DataFrame"]:
+    """Blocos (rsid, texto, cluster, x, y) rotulados pelo modelo à medida que os registros chegam."""
+    import pandas as pd
+
+    if not modelo.treinado:
+        raise ValueError("Modelo de clusters ainda não treinado.")
+    for bloco in dividir_em_lotes(textos_snps(registros), tamanho_bloco):
+        df = pd.DataFrame(bloco, columns=["rsid", "texto"])
+        rotulos, coords = modelo.atribuir(modelo.vetorizar(df["texto"]))
+        df["cluster"], df["x"], df["y"] = rotulos, coords[:, 0], coords[:, 1]
+        yield df
+
+
+def clusterizar_incremental(abrir_registros: Callable[[], Iterable[dict]], modelo: ModeloClusters | None = None,
+                            treinar: bool = True, tamanho_bloco: int = TAMANHO_BLOCO_CLUSTER):
+    """
+    Duas passadas em blocos sobre os registros, com memória limitada ao bloco:
+    treina o modelo só com os SNPs novos e depois rotula todos com o modelo
+    final. `abrir_registros` devolve um iterável novo a cada chamada (ex.:
+    lambda: iterar_registros(pasta)). Retorna (modelo, blocos rotulados).
+    """
+    modelo = modelo or ModeloClusters()
+    if treinar:
+        novos = treinar_incremental(abrir_registros(), modelo, tamanho_bloco)
+        print(f"🧠 {novos} SNPs novos treinados no modelo de clusters ({modelo.n_treinados} no total).")
+    return modelo, atribuir_em_blocos(abrir_registros(), modelo, tamanho_bloco)
+
+
+def clusterizar_conforme_modo(abrir_registros: Callable[[], Iterable[dict]], modo: str = MODO_CLUSTER,
+                              caminho_modelo: Path | str = MODELO_CLUSTERS,
+                              somente_atribuir: bool = False) -> Iterator["pd.DataFrame"]:
+    """
+    Blocos rotulados no modo configurado. O completo ajusta TF-IDF + KMeans em
+    todos os textos e entrega um único bloco; o incremental parte do modelo
+    salvo, o atualiza com os SNPs novos e rotula em fluxo.
+    """
+    if modo != "incremental":
+        df, _, _ = clusterizar(carregar_registros(abrir_registros()))
+        return iter([df])
+    modelo = ModeloClusters.carregar(caminho_modelo)
+    if modelo is not None:
+        print(f"🧠 Modelo de clusters carregado ({modelo.n_treinados} SNPs já vistos).")
+    modelo, blocos = clusterizar_incremental(abrir_registros, modelo, treinar=not somente_atribuir)
+    if not somente_atribuir:
+        modelo.salvar(caminho_modelo)
+    return blocos
+
+
+def relatar_em_fluxo(blocos: Iterable["pd.DataFrame"]) -> Iterator["pd.DataFrame"]:
+    """
+    Repassa os blocos rotulados e, quando acabam, gera o gráfico e os
+    relatórios. Só ficam em memória as colunas do gráfico (rótulo curto,
+    cluster e coordenadas) e as contagens de palavras por cluster.
+    """
+    import pandas as pd
+
+    pontos = []
+    relatorio = RelatorioClusters() if SAVE_CLUSTER_REPORT else None
+    for bloco in blocos:
+        pontos.append(pd.DataFrame({
+            "texto": bloco["texto"].map(_rotulo),
+            "cluster": bloco["cluster"].to_numpy(),
+            "x": bloco["x"].to_numpy(dtype="float32"),
+            "y": bloco["y"].to_numpy(dtype="float32"),
+        }))
+        if relatorio is not None:
+            relatorio.adicionar(bloco)
+        yield bloco
+
+    df = pd.concat(pontos, ignore_index=True) if pontos else pd.DataFrame(columns=["texto", "cluster", "x", "y"])
+    print(f"✅ {len(df)} SNPs clusterizados.")
+    if not len(df):
+        return
+    figura = plot_clusters(df)
+    if relatorio is not None:
+        relatorio.gravar()
+        print("📄 Relatórios por cluster gerados.")
+    print(f"📊 Clusterização concluída e salva em '{figura}'")
+
 # ============================ PLOT ============================
-def plot_clusters(df):
+def _rotulo(texto):
+    return texto[:MAX_LABEL_LENGTH].strip().replace("\n", " ")
+
+def plot_clusters(df, limiar: int = LIMIAR_PLOT_GRANDE, caminho: str | None = None) -> str:
+    """
+    Um marcador e um rótulo por SNP; acima de `limiar` pontos, usa o modo de
+    densidade. Retorna o caminho da imagem (padrão: PADRAO_FIGURA com a data).
+    """
+    caminho = caminho or caminho_figura()
+    if len(df) > limiar:
+        return plot_clusters_densidade(df, caminho=caminho)
+
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots(figsize=(10, 8))
-    colors = cm.get_cmap("tab10", NUM_CLUSTERS)
+    colors = plt.get_cmap("tab10", NUM_CLUSTERS)
 
-    for cluster_id in sorted(df["cluster"].unique()):
-        subset = df[df["cluster"] == cluster_id]
+    for cluster_id, subset in df.groupby("cluster"):
         ax.scatter(subset["x"], subset["y"], label=f"Cluster {cluster_id}", s=40, alpha=0.6, color=colors(cluster_id))
-        for _, row in subset.iterrows():
-            label = row["texto"][:MAX_LABEL_LENGTH].strip().replace("\n", " ")
-            ax.annotate(label, (row["x"], row["y"]), fontsize=6, alpha=0.7)
+        for texto, x, y in zip(subset["texto"], subset["x"], subset["y"]):
+            ax.annotate(_rotulo(texto), (x, y), fontsize=6, alpha=0.7)
 
     ax.set_title("Clusterização de SNPs com TF-IDF + KMeans", fontsize=14)
-    ax.set_xlabel("Dimensão Semântica X (PCA)")
-    ax.set_ylabel("Dimensão Semântica Y (PCA)")
+    ax.set_xlabel("Dimensão Semântica X (SVD)")
+    ax.set_ylabel("Dimensão Semântica Y (SVD)")
     ax.legend()
     plt.tight_layout()
-    plt.savefig(SAVE_FIG_PATH)
+    plt.savefig(caminho)
+    plt.close()
+    return caminho
+
+def _mais_centrais(x, y, n):
+    """Índices dos `n` pontos mais próximos da mediana 2D do cluster."""
+    import numpy as np
+
+    distancia = (x - np.median(x)) ** 2 + (y - np.median(y)) ** 2
+    if len(distancia) <= n:
+        return np.argsort(distancia)
+    proximos = np.argpartition(distancia, n)[:n]
+    return proximos[np.argsort(distancia[proximos])]
+
+def plot_clusters_densidade(df, bins: int = RESOLUCAO_DENSIDADE, rotulos_por_cluster: int = ROTULOS_POR_CLUSTER,
+                            caminho: str | None = None) -> str:
+    """
+    Modo para muitos pontos: a densidade de cada cluster é binada com
+    np.histogram2d e composta numa única imagem RGBA (cor = cluster dominante
+    no pixel, opacidade = log da contagem). Só os SNPs mais centrais de cada
+    cluster recebem rótulo, então o custo não depende do número de pontos.
+    """
+    import numpy as np
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Patch
+
+    caminho = caminho or caminho_figura()
+    x, y, cluster = df["x"].to_numpy(), df["y"].to_numpy(), df["cluster"].to_numpy()
+    # Percentis cortam os poucos pontos extremos que achatariam o resto do gráfico
+    limites = [np.percentile(x, [0.5, 99.5]), np.percentile(y, [0.5, 99.5])]
+    for lim in limites:
+        if lim[0] == lim[1]:
+            lim[1] = lim[0] + 1e-9
+
+    colors = plt.get_cmap("tab10", NUM_CLUSTERS)
+    cor = np.zeros((bins, bins, 3))
+    total = np.zeros((bins, bins))
+    ids = np.unique(cluster)
+    for cluster_id in ids:
+        mascara = cluster == cluster_id
+        contagem, _, _ = np.histogram2d(y[mascara], x[mascara], bins=bins, range=[limites[1], limites[0]])
+        cor += contagem[..., None] * np.array(colors(cluster_id)[:3])
+        total += contagem
+
+    imagem = np.zeros((bins, bins, 4))
+    ocupado = total > 0
+    imagem[ocupado, :3] = cor[ocupado] / total[ocupado, None]
+    imagem[..., 3] = np.log1p(total) / np.log1p(total.max())
+
+    fig, ax = plt.subplots(figsize=(10, 8))
+    ax.imshow(imagem, origin="lower", aspect="auto", interpolation="nearest",
+              extent=[limites[0][0], limites[0][1], limites[1][0], limites[1][1]])
+
+    # Rótulos distintos entre os SNPs mais centrais, empilhados a partir do centro do cluster
+    textos = df["texto"].to_numpy()
+    for cluster_id in ids:
+        posicoes = np.flatnonzero(cluster == cluster_id)
+        candidatos = posicoes[_mais_centrais(x[posicoes], y[posicoes], rotulos_por_cluster * 20)]
+        rotulos = list(dict.fromkeys(_rotulo(textos[i]) for i in candidatos))[:rotulos_por_cluster]
+        centro = (np.median(x[posicoes]), np.median(y[posicoes]))
+        for k, rotulo in enumerate(rotulos):
+            ax.annotate(rotulo, centro, xytext=(0, -9 * k), textcoords="offset points", fontsize=6,
+                        bbox={"boxstyle": "round,pad=0.15", "facecolor": "white", "alpha": 0.7, "linewidth": 0})
+
+    ax.set_title(f"Clusterização de SNPs com TF-IDF + KMeans ({len(df)} SNPs, densidade)", fontsize=14)
+    ax.set_xlabel("Dimensão Semântica X (SVD)")
+    ax.set_ylabel("Dimensão Semântica Y (SVD)")
+    ax.legend(handles=[Patch(color=colors(c), label=f"Cluster {c}") for c in ids])
+    plt.tight_layout()
+    plt.savefig(caminho)
     plt.close()
+    return caminho
 
 # ============================ RELATÓRIO ============================
-def gerar_relatorio_clusters(df):
-    base_dir = Path("resultados/relatorios") / pd.Timestamp.now().strftime("%Y-%m-%d_%H-%M-%S")
-    base_dir.mkdir(parents=True, exist_ok=True)
+class RelatorioClusters:
+    """Palavras mais comuns e exemplos de cada cluster, acumulados bloco a bloco."""
+
+    def __init__(self, exemplos_por_cluster: int = 10):
+        self.exemplos_por_cluster = exemplos_por_cluster
+        self.contagens = None  # Series (cluster, palavra) -> ocorrências
+        self.exemplos = None
+
+    def adicionar(self, df):
+        import pandas as pd
+
+        # Contagem de palavras de todos os clusters do bloco numa só passada
+        df = df.reset_index(drop=True)
+        palavras = df["texto"].str.split().explode().dropna()
+        palavras = palavras[~palavras.str.lower().isin(CUSTOM_STOPWORDS)]
+        contagens = pd.DataFrame({
+            "cluster": df["cluster"].to_numpy()[palavras.index],
+            "palavra": palavras.to_numpy(),
+        }).value_counts()
+        self.contagens = contagens if self.contagens is None else self.contagens.add(contagens, fill_value=0)
+
+        exemplos = df[["rsid", "texto", "cluster"]].groupby("cluster").head(self.exemplos_por_cluster)
+        if self.exemplos is not None:
+            exemplos = pd.concat([self.exemplos, exemplos]).groupby("cluster").head(self.exemplos_por_cluster)
+        self.exemplos = exemplos
 
-    for cluster_id in df["cluster"].unique():
-        subset = df[df["cluster"] == cluster_id]
-        all_words = [w for w in " ".join(subset["texto"]).split() if w.lower() not in CUSTOM_STOPWORDS]
-        top_words = Counter(all_words).most_common(10)
+    def gravar(self):
+        if self.exemplos is None:
+            return
+        base_dir = Path("resultados/relatorios") / datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        base_dir.mkdir(parents=True, exist_ok=True)
 
-        relatorio = [f"# Cluster {cluster_id}\n",
-                     f"## Palavras mais comuns:\n"]
-        relatorio += [f"- {w} ({c})" for w, c in top_words]
-        relatorio.append("\n## Exemplos:")
-        for _, row in subset.head(10).iterrows():
-            relatorio.append(f"- {row['rsid']}: {row['texto'][:150]}...")
+        contagens = self.contagens.astype("int64").sort_values(ascending=False, kind="stable")
+        top_por_cluster = contagens.groupby(level="cluster", sort=False).head(10)
 
-        caminho = base_dir / f"cluster_{cluster_id}.md"
-        with open(caminho, "w", encoding="utf-8") as f:
-            f.write("\n".join(relatorio))
+        for cluster_id, exemplos in self.exemplos.groupby("cluster"):
+            top_words = top_por_cluster.loc[cluster_id].items() if cluster_id in top_por_cluster.index else []
+
+            relatorio = [f"# Cluster {cluster_id}\n",
+                         f"## Palavras mais comuns:\n"]
+            relatorio += [f"- {w} ({c})" for w, c in top_words]
+            relatorio.append("\n## Exemplos:")
+            relatorio += [f"- {rsid}: {texto[:150]}..." for rsid, texto in zip(exemplos["rsid"], exemplos["texto"])]
+
+            caminho = base_dir / f"cluster_{cluster_id}.md"
+            with open(caminho, "w", encoding="utf-8") as f:
+                f.write("\n".join(relatorio))
+
+
+def gerar_relatorio_clusters(df):
+    relatorio = RelatorioClusters()
+    relatorio.adicionar(df)
+    relatorio.gravar()
 
 def gerar_frases_relevantes(snp, alelos_relevantes):
     if not alelos_relevantes:
@@ -109,15 +417,21 @@ def gerar_frases_relevantes(snp, alelos_relevantes):
     return f"{snp['rsid']}: " + " ".join(resumos)
 
 # ============================ MAIN ============================
-if __name__ == "__main__":
-    df = carregar_snps(PASTA_MAPEADA)
-    print(f"✅ {len(df)} SNPs carregados para clusterização.")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clusteriza os textos dos SNPs e gera gráfico e relatórios.")
+    parser.add_argument("--pasta", default=PASTA_MAPEADA, help="pasta de registros de entrada")
+    parser.add_argument("--modo", choices=["completo", "incremental"], default=MODO_CLUSTER)
+    parser.add_argument("--modelo", default=MODELO_CLUSTERS, help="estado persistido do modo incremental")
+    parser.add_argument("--somente-atribuir", action="store_true",
+                        help="no modo incremental, só atribui os SNPs ao modelo salvo, sem treiná-lo")
+    args = parser.parse_args(argv)
 
-    df_clusterizado, tfidf, modelo = clusterizar(df)
-    plot_clusters(df_clusterizado)
+    # A pasta é lida de novo a cada passada, em blocos, sem montar o corpus inteiro
+    blocos = clusterizar_conforme_modo(lambda: iterar_registros(args.pasta), args.modo, args.modelo,
+                                       args.somente_atribuir)
+    for _ in relatar_em_fluxo(blocos):
+        pass
 
-    if SAVE_CLUSTER_REPORT:
-        gerar_relatorio_clusters(df_clusterizado)
-        print("📄 Relatórios por cluster gerados.")
 
-    print(f"📊 Clusterização concluída e salva em '{SAVE_FIG_PATH}'")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+# ./tools/orquestrador.py
+import argparse
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+from config.env import CSV_ENTRADA, CONCORRENCIA_MAX, SNPEDIA_FONTE
+from utils.metricas import METRICAS, contar as contar_metrica, definir
+from utils.manifesto import ManifestoResultados, STATUS_OK, STATUS_FALHA, STATUS_RETENTAVEL
+from utils.record_store import iterar_registros, EscritorRegistros, LeitorRegistros
+
+# ====== ORQUESTRADOR DE ETAPAS EM FLUXO ======
+#
+# Cada etapa recebe um iterável de registros e devolve outro (gerador), então
+# mapear -> limpar -> casar -> clusterizar (-> interpretar) roda num só processo: os registros
+# passam de uma etapa para a seguinte em memória, e o disco só é usado nos
+# checkpoints pedidos.
+
+ORDEM_ETAPAS = ["mapear", "limpar", "embutir", "casar", "clusterizar", "interpretar"]
+ETAPAS_PADRAO = ["mapear", "limpar", "casar", "clusterizar"]  # "embutir" e "interpretar" são opcionais
+PASTA_ORQUESTRADOR = Path("resultados/orquestrador")
+TAMANHO_FILA_MAPEAMENTO = 1000
+
+_FIM = object()
+
+
+def _em_thread(executar: Callable[[Callable[[dict], None]], None], nome: str) -> Iterator[dict]:
+    """
+    Roda `executar(entregar)` numa thread e devolve, como gerador, tudo o que
+    for entregue. A fila limitada segura a thread se as etapas seguintes atrasarem.
+    """
+    fila: queue.Queue = queue.Queue(maxsize=TAMANHO_FILA_MAPEAMENTO)
+    erro_fatal: list[BaseException] = []
+
+    def produzir():
+        try:
+            executar(fila.put)
+        except BaseException as e:
+            erro_fatal.append(e)
+        finally:
+            fila.put(_FIM)
+
+    thread = threading.Thread(target=produzir, name=nome, daemon=True)
+    thread.start()
+    while (dados := fila.get()) is not _FIM:
+        yield dados
+    thread.join()
+    if erro_fatal:
+        raise erro_fatal[0]
+
+
+def etapa_mapear(entrada: Path | str, fonte: str = SNPEDIA_FONTE, modo_async: bool = False,
+                 concorrencia: int = CONCORRENCIA_MAX, manifesto: ManifestoResultados | None = None,
+                 retentar_falhas: bool = False) -> Iterator[dict]:
+    """
+    Lê o genoma, enriquece (rsid, chromosome, position, alelo) com SNPedia e
+    MyVariant e entrega os registros à medida que ficam prontos. Com
+    `manifesto`, retoma como o main_pipeline: cada resultado é gravado numa
+    pasta da execução e registrado, e os SNPs já concluídos em execuções
+    anteriores seguem no fluxo lidos de onde foram gravados, sem requisição.
+    """
+    from main_pipeline import linhas_pendentes, pasta_saida, processar
+    from utils.politica_rede import ErroTransitorio
+
+    def executar(entregar):
+        if manifesto is None:
+            def ao_falhar(rsid, erro):
+                print(f"⚠️ Erro ao processar {rsid}: {erro}")
+                resultado = STATUS_RETENTAVEL if isinstance(erro, ErroTransitorio) else STATUS_FALHA
+                contar_metrica("snps_total", resultado=resultado, tipo=type(erro).__name__)
+
+            linhas = linhas_pendentes(str(entrada), None)
+            processar(linhas, lambda rsid, dados: entregar(dados), ao_falhar, fonte, modo_async, concorrencia)
+            return
+
+        leitor = LeitorRegistros()
+        escritor = EscritorRegistros(pasta_saida())
+        retomados = 0
+
+        def retomar(rsid: str) -> bool:
+            nonlocal retomados
+            entrada = manifesto.entrada(rsid)
+            if entrada["status"] != STATUS_OK:
+                return True  # falha definitiva ou sem página: nada a entregar
+            registro = leitor.obter(rsid, entrada.get("arquivo"))
+            if registro is None:
+                return False
+            entregar(registro)
+            retomados += 1
+            return True
+
+        def ao_concluir(rsid, dados):
+            manifesto.registrar(rsid, STATUS_OK, dados, arquivo=escritor.salvar(dados))
+            contar_metrica("snps_total", resultado=STATUS_OK)
+            entregar(dados)
+
+        def ao_falhar(rsid, erro):
+            print(f"⚠️ Erro ao processar {rsid}: {erro}")
+            status = STATUS_RETENTAVEL if isinstance(erro, ErroTransitorio) else STATUS_FALHA
+            manifesto.registrar(rsid, status, erro=erro)
+            contar_metrica("snps_total", resultado=status, tipo=type(erro).__name__)
+
+        try:
+            linhas = linhas_pendentes(str(entrada), manifesto, retentar_falhas, retomar=retomar)
+            processar(linhas, ao_concluir, ao_falhar, fonte, modo_async, concorrencia)
+        finally:
+            escritor.fechar()
+            leitor.fechar()
+        if retomados:
+            print(f"✔ {retomados} SNPs já mapeados retomados do manifesto.")
+
+    return _em_thread(executar, "etapa-mapear")
+
+
+def etapa_limpar(registros: Iterable[dict]) -> Iterator[dict]:
+    from tools.snp_cleaner import filtrar_snps
+
+    return filtrar_snps(registros)
+
+
+def etapa_embutir(registros: Iterable[dict]) -> Iterator[dict]:
+    from embedding.embutir import embutir_registros
+
+    return embutir_registros(registros)
+
+
+def etapa_casar(registros: Iterable[dict]) -> Iterator[dict]:
+    from tools.genotype_matcher import casar_em_fluxo
+
+    return casar_em_fluxo(registros)
+
+
+def etapa_clusterizar(registros: Iterable[dict], modo: str | None = None) -> Iterator[dict]:
+    """Etapa terminal: precisa de todos os textos para o TF-IDF; entrega os registros com o cluster."""
+    from tools import nlp_clustering
+
+    por_rsid = {snp["rsid"]: snp for snp in registros}
+    n_textos = sum(1 for _ in nlp_clustering.textos_snps(por_rsid.values()))
+    print(f"✅ {n_textos} SNPs com texto para clusterização.")
+    if n_textos < nlp_clustering.NUM_CLUSTERS:
+        # Os registros seguem sem cluster: as etapas seguintes e a saída não os perdem
+        print(f"⚠️ Poucos SNPs para {nlp_clustering.NUM_CLUSTERS} clusters; clusterização ignorada.")
+        yield from por_rsid.values()
+        return
+
+    # Os registros já estão em por_rsid: cada passada do modo incremental os percorre de novo
+    blocos = nlp_clustering.clusterizar_conforme_modo(lambda: por_rsid.values(), modo or nlp_clustering.MODO_CLUSTER)
+    for bloco in nlp_clustering.relatar_em_fluxo(blocos):
+        for rsid, cluster in zip(bloco["rsid"], bloco["cluster"]):
+            yield {**por_rsid[rsid], "cluster": int(cluster)}
+
+
+def etapa_interpretar(registros: Iterable[dict]) -> Iterator[dict]:
+    """
+    Consulta o LLM para cada registro, em paralelo, e entrega o registro com
+    `interpretacao`. As respostas também vão para LLM_SAIDA; registros cuja
+    resposta já está lá (mesmo modelo, rsID, genótipo e prompt) seguem no
+    fluxo com ela, sem nova consulta.
+    """
+    from tools.prompt_builder import genotipo_do_registro, montar_prompt_registro
+    from tools.query_llm import interpretar, imprimir_estatisticas_cache, SaidaInterpretacoes
+
+    def executar(entregar):
+        retomados = 0
+        with SaidaInterpretacoes() as saida:
+
+            def ao_concluir(item, resposta, duracao):
+                saida.registrar(item, resposta, duracao)
+                entregar({**item["registro"], "interpretacao": resposta})
+
+            def ao_falhar(item, erro):
+                print(f"⚠️ Erro ao interpretar {item['rsid']}: {erro}")
+                saida.registrar_falha(item, erro)
+
+            def itens():
+                nonlocal retomados
+                for snp in registros:
+                    item = {"rsid": snp["rsid"], "genotipo": genotipo_do_registro(snp),
+                            "prompt": montar_prompt_registro(snp), "registro": snp}
+                    resposta = saida.interpretacao(item)
+                    if resposta is None:
+                        yield item
+                    else:
+                        retomados += 1
+                        entregar({**snp, "interpretacao": resposta})
+
+            interpretar(itens(), ao_concluir, ao_falhar)
+        if retomados:
+            print(f"✔ {retomados} SNPs com interpretação já gravada em execuções anteriores.")
+        imprimir_estatisticas_cache()
+
+    return _em_thread(executar, "etapa-interpretar")
+
+
+ETAPAS: dict[str, Callable[[Iterable[dict]], Iterator[dict]]] = {
+    "limpar": etapa_limpar,
+    "embutir": etapa_embutir,
+    "casar": etapa_casar,
+    "clusterizar": etapa_clusterizar,
+    "interpretar": etapa_interpretar,
+}
+
+
+def com_checkpoint(registros: Iterable[dict], destino: Path | str) -> Iterator[dict]:
+    """Grava cada registro em `destino` e o repassa adiante, sem parar o fluxo."""
+    with EscritorRegistros(destino) as escritor:
+        for dados in registros:
+            escritor.salvar(dados)
+            yield dados
+
+
+def contar(registros: Iterable[dict], contagem: dict, etapa: str) -> Iterator[dict]:
+    for dados in registros:
+        contagem[etapa] = contagem.get(etapa, 0) + 1
+        yield dados
+
+
+def cronometrar(registros: Iterable[dict], tempos: dict, etapa: str) -> Iterator[dict]:
+    """
+    Acumula em tempos[etapa] o tempo gasto esperando o próximo registro desta
+    etapa. Inclui as etapas anteriores; o tempo próprio é a diferença para a
+    anterior (ver `tempos_exclusivos`).
+    """
+    iterador = iter(registros)
+    while True:
+        inicio = time.perf_counter()
+        try:
+            dados = next(iterador)
+        except StopIteration:
+            return
+        finally:
+            tempos[etapa] = tempos.get(etapa, 0.0) + time.perf_counter() - inicio
+        yield dados
+
+
+def tempos_exclusivos(tempos: dict[str, float]) -> dict[str, float]:
+    """Tempos acumulados de `cronometrar` (na ordem do fluxo) -> tempo próprio de cada etapa."""
+    exclusivos, anterior = {}, 0.0
+    for etapa, acumulado in tempos.items():
+        exclusivos[etapa] = max(acumulado - anterior, 0.0)
+        anterior = acumulado
+    return exclusivos
+
+
+def montar_fluxo(etapas: list[str], entrada: Path | str, checkpoints: dict[str, Path] | None = None,
+                 contagem: dict | None = None, modo_cluster: str | None = None,
+                 tempos: dict | None = None, **opcoes_mapeamento) -> Iterator[dict]:
+    """
+    Encadeia as etapas na ordem canônica. Se "mapear" está entre elas, a entrada
+    é o genoma (CSV, 23andMe ou Ancestry); senão, uma pasta de registros.
+    `opcoes_mapeamento` vão para etapa_mapear (inclusive o manifesto de retomada).
+    """
+    checkpoints = checkpoints or {}
+    contagem = contagem if contagem is not None else {}
+    tempos = tempos if tempos is not None else {}
+    etapas = [e for e in ORDEM_ETAPAS if e in etapas]
+
+    if "mapear" in etapas:
+        fluxo = etapa_mapear(entrada, **opcoes_mapeamento)
+    else:
+        fluxo = cronometrar(iterar_registros(entrada), tempos, "ler_entrada")
+
+    for etapa in etapas:
+        if etapa == "clusterizar":
+            fluxo = etapa_clusterizar(fluxo, modo_cluster)
+        elif etapa != "mapear":
+            fluxo = ETAPAS[etapa](fluxo)
+        fluxo = contar(fluxo, contagem, etapa)
+        if etapa in checkpoints:
+            fluxo = com_checkpoint(fluxo, checkpoints[etapa])
+        fluxo = cronometrar(fluxo, tempos, etapa)
+    return fluxo
+
+
+def _ler_checkpoints(valores: list[str]) -> dict[str, Path]:
+    checkpoints = {}
+    for valor in valores:
+        etapa, sep, pasta = valor.partition("=")
+        if not sep or etapa not in ORDEM_ETAPAS:
+            raise argparse.ArgumentTypeError(f"Checkpoint inválido: {valor} (use etapa=pasta)")
+        checkpoints[etapa] = Path(pasta)
+    return checkpoints
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Executa as etapas do DNA Analyzer em fluxo, num só processo.")
+    parser.add_argument("--etapas", default=",".join(ETAPAS_PADRAO),
+                        help=f"etapas separadas por vírgula, em qualquer subconjunto de {','.join(ORDEM_ETAPAS)}")
+    parser.add_argument("--entrada",
+                        help="genoma de entrada (com 'mapear') ou pasta de registros (sem 'mapear')")
+    parser.add_argument("--checkpoint", action="append", default=[], metavar="ETAPA=PASTA",
+                        help="grava a saída de uma etapa em disco (pode repetir)")
+    parser.add_argument("--saida",
+                        help="pasta para a saída da última etapa (padrão: resultados/orquestrador/<data>)")
+    parser.add_argument("--async", dest="modo_async", action="store_true",
+                        help="mapeia em paralelo com o cliente httpx assíncrono")
+    parser.add_argument("--concorrencia", type=int, default=CONCORRENCIA_MAX)
+    parser.add_argument("--fonte", choices=["html", "wikitext"], default=SNPEDIA_FONTE)
+    parser.add_argument("--retentar-falhas", action="store_true",
+                        help="mapeia de novo os rsIDs que falharam em execuções anteriores")
+    parser.add_argument("--modo-cluster", choices=["completo", "incremental"],
+                        help="modo da clusterização (padrão: MODO_CLUSTER)")
+    args = parser.parse_args(argv)
+
+    etapas = [e.strip() for e in args.etapas.split(",") if e.strip()]
+    desconhecidas = [e for e in etapas if e not in ORDEM_ETAPAS]
+    if not etapas or desconhecidas:
+        parser.error(f"Etapas inválidas: {', '.join(desconhecidas) or '(nenhuma)'}")
+    try:
+        checkpoints = _ler_checkpoints(args.checkpoint)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    entrada = Path(args.entrada or (CSV_ENTRADA if "mapear" in etapas else "resultados/snps_filtrados"))
+    if not entrada.exists():
+        print(f"❌ Entrada não encontrada: {entrada}")
+        return 1
+
+    # A saída da última etapa vai para disco, a menos que já tenha checkpoint
+    ultima = [e for e in ORDEM_ETAPAS if e in etapas][-1]
+    if ultima not in checkpoints:
+        checkpoints[ultima] = Path(args.saida) if args.saida else \
+            PASTA_ORQUESTRADOR / datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+    contagem: dict[str, int] = {}
+    tempos: dict[str, float] = {}
+    # Mesmo manifesto do main_pipeline: SNPs já mapeados por qualquer um dos dois não voltam à rede
+    opcoes_mapeamento = {}
+    if "mapear" in etapas:
+        manifesto = ManifestoResultados()
+        if len(manifesto):
+            print(f"✔ {len(manifesto)} SNPs já no manifesto: {dict(manifesto.resumo())}")
+        opcoes_mapeamento = {"fonte": args.fonte, "modo_async": args.modo_async, "concorrencia": args.concorrencia,
+                             "manifesto": manifesto, "retentar_falhas": args.retentar_falhas}
+    fluxo = montar_fluxo(etapas, entrada, checkpoints, contagem, args.modo_cluster, tempos, **opcoes_mapeamento)
+    try:
+        for _ in fluxo:
+            pass
+    finally:
+        if "manifesto" in opcoes_mapeamento:
+            opcoes_mapeamento["manifesto"].fechar()
+
+    exclusivos = tempos_exclusivos(tempos)
+    for etapa, segundos in exclusivos.items():
+        definir("etapa_segundos", round(segundos, 3), etapa=etapa)
+        if etapa in contagem:
+            definir("etapa_registros", contagem[etapa], etapa=etapa)
+        print(f"🔗 {etapa}: {contagem[etapa]} registros em {segundos:.1f}s" if etapa in contagem
+              else f"🔗 {etapa}: {segundos:.1f}s")
+    METRICAS.imprimir_resumo()
+    print(f"📊 Métricas em {METRICAS.exportar()}")
+    print(f"\n✅ Fluxo finalizado. Saída em: {checkpoints[ultima].resolve()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
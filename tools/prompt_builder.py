@@ -0,0 +1,58 @@
+# ./tools/prompt_builder.py
+import hashlib
+from typing import Iterable, Iterator
+
+# ========== PROMPTS DE INTERPRETAÇÃO ==========
+
+TEMPLATE_PROMPT = (
+    "Explique de forma clara e objetiva o impacto médico ou genético "
+    "de ter o genótipo {genotipo} na variante rsID {rsid}.{contexto} "
+    "Se não houver informação suficiente, responda 'Sem dados confiáveis disponíveis.'"
+)
+MAX_CONTEXTO = 600  # caracteres da descrição livre levados ao prompt
+VERSAO_PROMPT = 1  # incrementar ao mudar a montagem do contexto (invalida o cache de respostas)
+
+
+def hash_template() -> str:
+    """Identifica o template e a montagem do contexto; muda a chave do cache quando eles mudam."""
+    base = f"{VERSAO_PROMPT}\0{MAX_CONTEXTO}\0{TEMPLATE_PROMPT}"
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()[:16]
+
+
+def genotipo_do_registro(snp: dict) -> str:
+    """Genótipo normalizado ('T;C' -> 'CT'), para que pessoas com o mesmo par gerem o mesmo prompt."""
+    from tools.genotype_matcher import normalizar_genotipo
+
+    bruto = snp.get("alelo_clean") or snp.get("alelo") or ""
+    return normalizar_genotipo(bruto) or bruto
+
+
+def montar_contexto(snp: dict) -> str:
+    """Resumo do que já se sabe da variante: genes, genótipos casados e descrição."""
+    partes = []
+    genes = snp.get("genes") or ([snp["gene"]] if snp.get("gene") else [])
+    if genes:
+        partes.append(f"Genes: {', '.join(genes)}.")
+    for alelo in snp.get("alelos_relevantes", []):
+        magnitude = alelo.get("magnitude")
+        sufixo = f" (magnitude {magnitude})" if magnitude not in (None, "") else ""
+        partes.append(f"SNPedia {alelo.get('genotipo', '')}{sufixo}: {alelo.get('resumo', '')}.")
+    descricao = (snp.get("descricao_livre") or "").strip()
+    if descricao:
+        partes.append(f"Descrição: {descricao[:MAX_CONTEXTO]}")
+    return (" Contexto: " + " ".join(partes)) if partes else ""
+
+
+def montar_prompt(rsid: str, genotipo: str, contexto: str = "") -> str:
+    return TEMPLATE_PROMPT.format(rsid=rsid, genotipo=genotipo, contexto=contexto)
+
+
+def montar_prompt_registro(snp: dict) -> str:
+    """Prompt a partir de um registro do genotype_matcher (ou de qualquer etapa anterior)."""
+    return montar_prompt(snp["rsid"], genotipo_do_registro(snp), montar_contexto(snp))
+
+
+def prompts_de_registros(registros: Iterable[dict]) -> Iterator[dict]:
+    """Gera {"rsid", "genotipo", "prompt"} para cada registro."""
+    for snp in registros:
+        yield {"rsid": snp["rsid"], "genotipo": genotipo_do_registro(snp), "prompt": montar_prompt_registro(snp)}
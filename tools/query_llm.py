@@ -0,0 +1,335 @@
+# ./tools/query_llm.py
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable
+
+import httpx
+from config.env import (
+    LLM_ENDPOINT,
+    LLM_MODELO,
+    LLM_API_KEY,
+    LLM_CONCORRENCIA,
+    LLM_TEMPERATURA,
+    LLM_MAX_TOKENS,
+    LLM_TIMEOUT,
+    LLM_STREAM,
+    LLM_SAIDA,
+)
+from utils.http_cache import CacheHTTP, obter_cache
+from utils.lotes import iterar_em_thread
+from utils.metricas import METRICAS, contar, requisicao
+
+# ========== CONSULTA ASSÍNCRONA AO LLM (API compatível com OpenAI) ==========
+
+# Origem de cada resposta nesta execução: "cache", "agrupada" (mesma chave em voo) ou "modelo"
+ORIGEM_RESPOSTAS: Counter = Counter()
+
+
+def criar_cliente_llm(concorrencia: int = LLM_CONCORRENCIA) -> httpx.AsyncClient:
+    """Cliente compartilhado: uma conexão keep-alive por trabalhador."""
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    cabecalhos = {"Authorization": f"Bearer {LLM_API_KEY}"} if LLM_API_KEY else {}
+    return httpx.AsyncClient(limits=limites, timeout=LLM_TIMEOUT, headers=cabecalhos)
+
+
+def montar_payload(prompt: str, modelo: str = LLM_MODELO, stream: bool = LLM_STREAM) -> dict:
+    return {
+        "model": modelo,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": LLM_TEMPERATURA,
+        "max_tokens": LLM_MAX_TOKENS,
+        "stream": stream,
+    }
+
+
+def _conteudo_resposta(corpo: dict) -> str:
+    return corpo["choices"][0]["message"]["content"].strip()
+
+
+async def consultar_llm_async(client: httpx.AsyncClient, prompt: str, modelo: str = LLM_MODELO,
+                              endpoint: str = LLM_ENDPOINT, stream: bool = LLM_STREAM) -> str:
+    """
+    Envia um prompt ao endpoint /chat/completions. Com stream=True lê os eventos
+    SSE à medida que os tokens chegam; servidores que ignoram o stream e
+    respondem JSON único também são aceitos.
+    """
+    payload = montar_payload(prompt, modelo, stream)
+    if not stream:
+        resp = await client.post(endpoint, json=payload)
+        resp.raise_for_status()
+        return _conteudo_resposta(resp.json())
+
+    partes = []
+    async with client.stream("POST", endpoint, json=payload) as resp:
+        resp.raise_for_status()
+        if resp.headers.get("content-type", "").startswith("application/json"):
+            return _conteudo_resposta(json.loads(await resp.aread()))
+        async for linha in resp.aiter_lines():
+            if not linha.startswith("data:"):
+                continue
+            dados = linha[5:].strip()
+            if dados == "[DONE]":
+                break
+            escolha = json.loads(dados)["choices"][0]
+            partes.append((escolha.get("delta") or {}).get("content") or "")
+    return "".join(partes).strip()
+
+
+def chave_interpretacao(item: dict, modelo: str = LLM_MODELO) -> str:
+    """
+    Chave do cache de respostas: modelo, hash do template, rsID, genótipo
+    normalizado, hash do prompt enviado e parâmetros de amostragem. Trocar o
+    modelo ou o template muda a chave, o que invalida as respostas antigas sem
+    apagar nada; o hash do prompt separa o mesmo genótipo com contextos
+    diferentes (sem contexto no dna_interpreter, com genes e descrição da
+    SNPedia no query_llm) e renova a resposta quando o texto da SNPedia muda.
+    """
+    from tools.genotype_matcher import normalizar_genotipo
+    from tools.prompt_builder import hash_template
+
+    genotipo = normalizar_genotipo(item.get("genotipo") or "") or (item.get("genotipo") or "")
+    hash_prompt = hashlib.sha256(item["prompt"].encode("utf-8")).hexdigest()[:16]
+    return json.dumps(
+        [modelo, hash_template(), item["rsid"].strip().lower(), genotipo, hash_prompt,
+         LLM_TEMPERATURA, LLM_MAX_TOKENS],
+        separators=(",", ":"),
+    )
+
+
+async def interpretar_async(
+    itens: Iterable[dict],
+    ao_concluir: Callable[[dict, str, float], None],
+    ao_falhar: Callable[[dict, Exception], None],
+    concorrencia: int = LLM_CONCORRENCIA,
+    modelo: str = LLM_MODELO,
+    stream: bool = LLM_STREAM,
+    endpoint: str = LLM_ENDPOINT,
+    cache: CacheHTTP | None = None,
+):
+    """
+    Consulta o LLM para cada item ({"rsid", "genotipo", "prompt", ...}) com um
+    pool fixo de `concorrencia` trabalhadores sobre um único cliente. A fila é
+    limitada, então a entrada pode ser um gerador de qualquer tamanho.
+
+    Respostas vêm primeiro do cache persistente (fonte "llm"); itens com a mesma
+    chave em voo ao mesmo tempo esperam a mesma requisição em vez de repeti-la.
+    """
+    cache = cache or obter_cache()
+    fila: asyncio.Queue = asyncio.Queue(maxsize=concorrencia * 2)
+    em_voo: dict[str, asyncio.Future] = {}
+
+    async with criar_cliente_llm(concorrencia) as client:
+
+        async def responder(item: dict) -> str:
+            chave = chave_interpretacao(item, modelo)
+            if chave in em_voo:
+                ORIGEM_RESPOSTAS["agrupada"] += 1
+                contar("llm_respostas_total", origem="agrupada")
+                return await asyncio.shield(em_voo[chave])
+
+            # Em voo desde antes da leitura do cache: a leitura cede o loop, e outro
+            # item com a mesma chave nesse intervalo espera esta em vez de repetir a consulta
+            futuro = asyncio.get_running_loop().create_future()
+            em_voo[chave] = futuro
+            try:
+                resposta = await cache.obter_async("llm", chave) if cache is not None else None
+                if resposta is not None:
+                    ORIGEM_RESPOSTAS["cache"] += 1
+                    contar("llm_respostas_total", origem="cache")
+                else:
+                    with requisicao(endpoint) as medicao:
+                        resposta = await consultar_llm_async(client, item["prompt"], modelo, endpoint, stream)
+                        medicao.status = 200
+                    ORIGEM_RESPOSTAS["modelo"] += 1
+                    contar("llm_respostas_total", origem="modelo")
+                    if cache is not None:
+                        await cache.guardar_async("llm", chave, resposta)
+            except Exception as e:
+                futuro.set_exception(e)
+                futuro.exception()  # marcada como lida mesmo se ninguém mais esperava
+                raise
+            finally:
+                del em_voo[chave]
+            futuro.set_result(resposta)
+            return resposta
+
+        async def trabalhador():
+            while True:
+                item = await fila.get()
+                if item is None:
+                    return
+                inicio = time.perf_counter()
+                try:
+                    resposta = await responder(item)
+                    ao_concluir(item, resposta, time.perf_counter() - inicio)
+                except Exception as e:
+                    ao_falhar(item, e)
+
+        trabalhadores = [asyncio.create_task(trabalhador()) for _ in range(concorrencia)]
+        # A entrada pode ser um gerador das etapas anteriores: é puxada fora do loop
+        async for item in iterar_em_thread(itens):
+            await fila.put(item)
+        for _ in trabalhadores:
+            await fila.put(None)
+        await asyncio.gather(*trabalhadores)
+
+
+def interpretar(itens, ao_concluir, ao_falhar, concorrencia: int = LLM_CONCORRENCIA,
+                modelo: str = LLM_MODELO, stream: bool = LLM_STREAM, endpoint: str = LLM_ENDPOINT):
+    """Ponto de entrada síncrono."""
+    asyncio.run(interpretar_async(itens, ao_concluir, ao_falhar, concorrencia, modelo, stream, endpoint))
+
+
+def estatisticas_cache() -> dict:
+    """Respostas por origem e a fração resolvida sem chamar o modelo."""
+    total = sum(ORIGEM_RESPOSTAS.values())
+    locais = ORIGEM_RESPOSTAS["cache"] + ORIGEM_RESPOSTAS["agrupada"]
+    return {**ORIGEM_RESPOSTAS, "total": total, "taxa_local": locais / total if total else 0.0}
+
+
+def imprimir_estatisticas_cache():
+    est = estatisticas_cache()
+    if est["total"]:
+        print(f"🗄️ LLM: {est.get('cache', 0)} do cache, {est.get('agrupada', 0)} agrupadas em voo, "
+              f"{est.get('modelo', 0)} consultas ao modelo ({est['taxa_local']:.0%} resolvidas localmente)")
+
+
+# ========== SAÍDA INCREMENTAL (JSON lines, retomável) ==========
+
+
+class SaidaInterpretacoes:
+    """
+    Respostas anexadas uma por linha assim que chegam. Na abertura, as
+    respostas já gravadas são indexadas pela mesma chave do cache
+    (chave_interpretacao: modelo, template, rsID, genótipo e prompt), para que
+    uma execução interrompida continue de onde parou sem confundir pessoas ou
+    contextos diferentes com o mesmo rsID; as que falharam são tentadas de novo.
+    O índice guarda só a posição de cada linha; a resposta é lida sob demanda.
+    """
+
+    def __init__(self, caminho: Path | str = LLM_SAIDA, modelo: str = LLM_MODELO):
+        self.caminho = Path(caminho)
+        self.modelo = modelo
+        self.concluidos: dict[str, int] = {}  # chave -> posição (bytes) da linha com a resposta
+        if self.caminho.exists():
+            with open(self.caminho, "rb") as f:
+                posicao = 0
+                for linha in f:
+                    inicio, posicao = posicao, posicao + len(linha)
+                    try:
+                        entrada = json.loads(linha)
+                    except json.JSONDecodeError:
+                        continue  # última linha truncada por uma interrupção
+                    if entrada.get("interpretacao") is not None:
+                        self.concluidos[self._chave_entrada(entrada)] = inicio
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._arquivo = open(self.caminho, "ab")
+        if self._arquivo.tell():
+            with open(self.caminho, "rb") as f:
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    self._arquivo.write(b"\n")
+
+    def _chave_entrada(self, entrada: dict) -> str:
+        # Linhas antigas, sem "chave", são reindexadas a partir do que foi gravado
+        return entrada.get("chave") or chave_interpretacao(entrada, entrada.get("modelo") or self.modelo)
+
+    def pendentes(self, itens: Iterable[dict]):
+        return (item for item in itens if chave_interpretacao(item, self.modelo) not in self.concluidos)
+
+    def interpretacao(self, item: dict) -> str | None:
+        """Resposta já gravada para este item (mesma chave), ou None."""
+        posicao = self.concluidos.get(chave_interpretacao(item, self.modelo))
+        if posicao is None:
+            return None
+        with open(self.caminho, "rb") as f:
+            f.seek(posicao)
+            return json.loads(f.readline())["interpretacao"]
+
+    def _anexar(self, entrada: dict) -> int:
+        posicao = self._arquivo.tell()
+        self._arquivo.write((json.dumps(entrada, ensure_ascii=False) + "\n").encode("utf-8"))
+        self._arquivo.flush()
+        return posicao
+
+    def registrar(self, item: dict, resposta: str, duracao: float):
+        chave = chave_interpretacao(item, self.modelo)
+        # Gravada antes de entrar no índice: quem a encontrar lá já consegue lê-la
+        self.concluidos[chave] = self._anexar({
+            "rsid": item["rsid"],
+            "genotipo": item.get("genotipo"),
+            "modelo": self.modelo,
+            "chave": chave,
+            "prompt": item["prompt"],
+            "interpretacao": resposta,
+            "duracao_s": round(duracao, 3),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    def registrar_falha(self, item: dict, erro: Exception):
+        self._anexar({
+            "rsid": item["rsid"],
+            "modelo": self.modelo,
+            "erro": str(erro) or type(erro).__name__,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    def fechar(self):
+        self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def main(argv=None):
+    from tqdm import tqdm
+    from tools.prompt_builder import prompts_de_registros
+    from utils.record_store import iterar_registros
+
+    parser = argparse.ArgumentParser(description="Interpreta os genótipos casados com um LLM local.")
+    parser.add_argument("--entrada", default="resultados/snps_com_alelos_relevantes",
+                        help="pasta de registros (saída do genotype_matcher)")
+    parser.add_argument("--saida", default=LLM_SAIDA, help="arquivo JSON lines de respostas")
+    parser.add_argument("--concorrencia", type=int, default=LLM_CONCORRENCIA)
+    parser.add_argument("--modelo", default=LLM_MODELO)
+    parser.add_argument("--endpoint", default=LLM_ENDPOINT)
+    parser.add_argument("--sem-stream", action="store_true", help="pede a resposta inteira de uma vez")
+    args = parser.parse_args(argv)
+
+    if not Path(args.entrada).exists():
+        print(f"❌ Entrada não encontrada: {args.entrada}")
+        return 1
+
+    with SaidaInterpretacoes(args.saida, args.modelo) as saida, tqdm(desc="Interpretando", unit="SNP") as barra:
+        if saida.concluidos:
+            print(f"✔ {len(saida.concluidos)} SNPs já interpretados.")
+
+        def ao_concluir(item, resposta, duracao):
+            saida.registrar(item, resposta, duracao)
+            barra.update(1)
+
+        def ao_falhar(item, erro):
+            tqdm.write(f"⚠️ Erro ao interpretar {item['rsid']}: {erro}")
+            saida.registrar_falha(item, erro)
+            barra.update(1)
+
+        itens = saida.pendentes(prompts_de_registros(iterar_registros(args.entrada)))
+        interpretar(itens, ao_concluir, ao_falhar, args.concorrencia, args.modelo, not args.sem_stream, args.endpoint)
+
+    imprimir_estatisticas_cache()
+    print(f"📊 Métricas em {METRICAS.exportar()}")
+    print(f"\n🏁 Interpretações salvas em {Path(args.saida).resolve()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,61 +1,65 @@
+import argparse
 from pathlib import Path
-import json
+from typing import Iterable, Iterator
+from utils.record_store import iterar_registros, EscritorRegistros
 
-def carregar_snps_filtrados(pasta: Path):
-    snps_filtrados = []
-    for arquivo in pasta.glob("*.json"):
-        with open(arquivo, encoding="utf-8") as f:
-            dados = json.load(f)
-            print(f"Carregando SNP: {dados.get('rsid', 'desconhecido')}")
-            # Verifica se o arquivo contém dados relevantes
-            if not dados:
-                print(f"Arquivo {arquivo.name} está vazio ou não contém dados relevantes.")
-                continue
-            # Filtra por flags e texto relevante
-            if (dados.get("found_snpedia_data") or dados.get("found_myvariant_data")):
-                texto = dados.get("descricao_livre", "") + dados.get("resumo", "") + dados.get("trait", "")
-                if texto.strip():
-                    snps_filtrados.append(dados)
-    return snps_filtrados
 
+def __getattr__(nome):
+    # Mantido aqui por compatibilidade, sem importar o matcher (e o pandas) a cada uso do cleaner
+    if nome == "extrair_alelos_relevantes":
+        from tools.genotype_matcher import extrair_alelos_relevantes
+        return extrair_alelos_relevantes
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
 
-def extrair_alelos_relevantes(snp):
-    alelo = snp["alelo"]
-    alelos_relevantes = []
 
-    for g in snp.get("genotipos", []):
-        genotipo = g.get("genotipo", "")
-        resumo = g.get("resumo", "").lower()
-        if alelo in genotipo and "common" not in resumo and "normal" not in resumo:
-            alelos_relevantes.append({
-                "genotipo": genotipo,
-                "resumo": resumo,
-                "magnitude": g.get("magnitude")
-            })
-    return alelos_relevantes
+def snp_relevante(dados: dict) -> bool:
+    """Registro com dados da SNPedia ou do MyVariant e algum texto descritivo."""
+    if not dados:
+        return False
+    if (dados.get("found_snpedia_data") or dados.get("found_myvariant_data")):
+        texto = (dados.get("descricao_livre") or "") + (dados.get("resumo") or "") + (dados.get("trait") or "")
+        return bool(texto.strip())
+    return False
 
 
+def filtrar_snps(registros: Iterable[dict]) -> Iterator[dict]:
+    """Etapa em fluxo: entrega só os registros relevantes, sem materializar a lista."""
+    return (dados for dados in registros if snp_relevante(dados))
+
+
+def carregar_snps_filtrados(pasta: Path):
+    snps_filtrados = []
+    for dados in iterar_registros(pasta):
+        print(f"Carregando SNP: {dados.get('rsid', 'desconhecido')}")
+        # Filtra por flags e texto relevante
+        if snp_relevante(dados):
+            snps_filtrados.append(dados)
+    return snps_filtrados
 
 
-__main__ = "__main__"
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Filtra os registros com dados e texto descritivo.")
+    parser.add_argument("--pasta", default="nlp_test_data", help="pasta de registros de entrada")
+    parser.add_argument("--saida", help="pasta dos registros filtrados (padrão: <pasta>/snps_filtrados)")
+    args = parser.parse_args(argv)
 
-if __name__ == "__main__":
-    pasta = Path("nlp_test_data")
+    pasta = Path(args.pasta)
     if not pasta.exists():
        print(f"A pasta {pasta} não existe.")
-       exit(1)
+       return 1
     print(f"Carregando SNPs filtrados da pasta: {pasta}")
 
     snps_filtrados = carregar_snps_filtrados(pasta)
     print(f"Total SNPs filtrados: {len(snps_filtrados)}") # save the filtered snps jsons in the filtered_snps folder
     if snps_filtrados:
-        pasta_filtrada = pasta / "snps_filtrados"
-        pasta_filtrada.mkdir(exist_ok=True)
-        for snp in snps_filtrados:
-            rsid = snp.get("rsid", "desconhecido")
-            arquivo_filtrado = pasta_filtrada / f"{rsid}.json"
-            with open(arquivo_filtrado, "w", encoding="utf-8") as f:
-                json.dump(snp, f, ensure_ascii=False, indent=4)
+        pasta_filtrada = Path(args.saida) if args.saida else pasta / "snps_filtrados"
+        with EscritorRegistros(pasta_filtrada) as escritor:
+            escritor.salvar_todos(snps_filtrados)
         print(f"SNPs filtrados salvos na pasta: {pasta_filtrada}")
     else:
-        print("Nenhum SNP filtrado encontrado.")
\ No newline at end of file
+        print("Nenhum SNP filtrado encontrado.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,32 +1,30 @@
 # ./tools/snp_mapper.py
-from bs4 import BeautifulSoup, Tag
 from tools.load_map_variants import consultar_myvariant
+from tools.snpedia_extractor import obter_extrator
 from tools.snpedia_handler import SNPediaHandler
+from tools.snpedia_wikitext import parse_rsnum, parse_genotipo, titulos_genotipos
+from utils.metricas import cronometrado, cronometro
 
 # ========== ETAPA 2: ENRIQUECIMENTO COM SNPEDIA ==========
 
-def consultar_snpedia_completa(rsid: str, chromosome: str, position: int, alelo: str) -> dict:
-    """
-    Consulta a página HTML da SNPedia e extrai:
-      - genótipos (geno, magnitude, resumo)
-      - genes listados
-      - GMAF
-      - descrição livre
-    Combina com dados de MyVariant e marca origem dos dados.
-    """
+def normalizar_rsid(rsid: str) -> str:
+    """Normaliza o rsID para o formato de título da SNPedia (ex.: 'Rs5400')."""
     rsid = rsid.strip()
-    rsid = rsid[0].upper() + rsid[1:].lower() if rsid.lower().startswith("rs") else rsid
-    
-    handler = SNPediaHandler()
-    html = handler.fetch_html(rsid)
-    soup = BeautifulSoup(html, "html.parser")
+    return rsid[0].upper() + rsid[1:].lower() if rsid.lower().startswith("rs") else rsid
+
+
+def campos_genotipo(alelo: str) -> dict:
+    """Únicos campos do registro que dependem da pessoa (o resto é anotação da variante)."""
+    return {"alelo": f"{alelo[0]};{alelo[1]}" if len(alelo) == 2 else alelo, "alelo_clean": alelo}
 
-    data = {
+
+def montar_registro_base(rsid: str, chromosome: str, position: int, alelo: str) -> dict:
+    """Cria o registro de saída vazio, com as flags de origem desligadas."""
+    return {
         "rsid": rsid,
         "chromosome": chromosome,
         "position": position,
-        "alelo": f"{alelo[0]};{alelo[1]}" if len(alelo) == 2 else alelo,
-        "alelo_clean": alelo,
+        **campos_genotipo(alelo),
         "genotipos": [],
         "gmaf": None,
         "genes": [],
@@ -39,63 +37,109 @@ def consultar_snpedia_completa(rsid: str, chromosome: str, position: int, alelo:
         "found_myvariant_data": False
     }
 
-    # 1) Extrai genótipos da tabela principal
-    rows = soup.select('table.sortable.smwtable tbody tr')
-    for tr in rows:
-        if isinstance(tr, Tag):
-            cols = tr.find_all('td')
-            if len(cols) >= 3:
-                geno = cols[0].get_text(strip=True)
-                mag = cols[1].get_text(strip=True)
-                desc = cols[2].get_text(strip=True)
-                if geno or mag or desc:
-                    data['genotipos'].append({
-                        'genotipo': geno,
-                        'magnitude': mag,
-                        'resumo': desc
-                    })
-    if data['genotipos']:
-        data['found_snpedia_data'] = True
-
-    # 2) Extrai GMAF via célula <td>GMAF</nobr>
-    gmaf_td = soup.find('td', string='GMAF')
-    if isinstance(gmaf_td, Tag):
-        gmaf_val_td = gmaf_td.find_next_sibling('td')
-        if isinstance(gmaf_val_td, Tag):
-            data['gmaf'] = gmaf_val_td.get_text(strip=True)
-            data['found_snpedia_data'] = True
-
-    # 3) Extrai Genes via célula <td>Gene</nobr>
-    gene_td = soup.find('td', string='Gene')
-    if isinstance(gene_td, Tag):
-        gene_val_td = gene_td.find_next_sibling('td')
-        if isinstance(gene_val_td, Tag):
-            genes = [a.get_text(strip=True) for a in gene_val_td.find_all('a')]
-            data['genes'] = genes
-            if genes:
-                data['found_snpedia_data'] = True
-
-    # 4) Descrição livre: primeiro parágrafo com texto
-    container = soup.select_one('div#mw-content-text div.mw-parser-output')
-    if isinstance(container, Tag):
-        paragraphs = container.find_all('p')
-        for p in paragraphs:
-            text = p.get_text(strip=True)
-            if text:
-                data['descricao_livre'] = text
-                data['found_snpedia_data'] = True
-                break
+
+@cronometrado("extrair_snpedia")
+def extrair_dados_snpedia(html: str, data: dict, extrator=None) -> dict:
+    """
+    Extrai da página HTML da SNPedia genótipos, GMAF, genes e descrição livre,
+    preenchendo o registro `data` recebido. O backend de extração vem de
+    SNPEDIA_EXTRATOR (ver tools/snpedia_extractor.py).
+    """
+    return aplicar_campos_snpedia(data, (extrator or obter_extrator())(html))
+
+
+def aplicar_campos_snpedia(data: dict, extraido: dict) -> dict:
+    """Copia para o registro os campos extraídos da SNPedia (HTML ou wikitexto) e marca a origem."""
+    data['genotipos'].extend(extraido['genotipos'])
+    if extraido['gmaf'] is not None:
+        data['gmaf'] = extraido['gmaf']
+    data['genes'] = extraido['genes']
+    data['descricao_livre'] = extraido['descricao_livre']
+    data['found_snpedia_data'] = bool(
+        extraido['genotipos'] or extraido['gmaf'] is not None or extraido['genes'] or extraido['descricao_livre']
+    )
 
     # Preenche trait e resumo
     if data['genotipos']:
         data['trait'] = data['genotipos'][0]['resumo']
     data['resumo'] = data['descricao_livre']
+    return data
 
-    # 5) MyVariant info
-    gene, clin = consultar_myvariant(rsid)
+
+def aplicar_myvariant(data: dict, gene: str, clin: str) -> dict:
+    """Anexa ao registro os campos vindos do MyVariant."""
     data['gene'] = gene
     data['significado_clinico'] = clin
     if gene or clin:
         data['found_myvariant_data'] = True
-
     return data
+
+
+def consultar_snpedia_completa(
+    rsid: str, chromosome: str, position: int, alelo: str, myvariant: tuple[str, str] | None = None
+) -> dict:
+    """
+    Consulta a página HTML da SNPedia e extrai:
+      - genótipos (geno, magnitude, resumo)
+      - genes listados
+      - GMAF
+      - descrição livre
+    Combina com dados de MyVariant e marca origem dos dados.
+    Se `myvariant` (gene, clin) já vier de uma consulta em lote, não consulta de novo.
+    """
+    rsid = normalizar_rsid(rsid)
+
+    handler = SNPediaHandler()
+    html = handler.fetch_html(rsid)
+
+    data = montar_registro_base(rsid, chromosome, position, alelo)
+    extrair_dados_snpedia(html, data)
+
+    # 5) MyVariant info
+    gene, clin = myvariant if myvariant is not None else consultar_myvariant(rsid)
+    return aplicar_myvariant(data, gene, clin)
+
+
+def consultar_snpedia_lote_wikitext(
+    linhas: list[tuple], anotacoes: dict[str, tuple[str, str]], handler: SNPediaHandler | None = None
+) -> dict[str, dict | Exception]:
+    """
+    Versão em lote de `consultar_snpedia_completa` usando o wikitexto da API
+    MediaWiki: uma consulta para até 50 páginas de SNP e outra(s) para as
+    páginas de genótipo. `anotacoes` é o resultado de `consultar_myvariant_lote`.
+    Retorna {rsid de entrada: registro}, ou a exceção quando o SNP não tem
+    página ou sua consulta ao MyVariant falhou.
+    """
+    from tools.load_map_variants import anotacao_myvariant
+    from utils.politica_rede import ErroTransitorio
+
+    handler = handler or SNPediaHandler()
+    titulos = {rsid: normalizar_rsid(rsid) for rsid, *_ in linhas}
+    paginas = handler.fetch_wikitext_lote(list(titulos.values()))
+
+    with cronometro("extrair_wikitext"):
+        campos = {titulo: parse_rsnum(texto) for titulo, texto in paginas.items()}
+    genotipos_por_snp = {titulo: titulos_genotipos(c["rsnum"], titulo) for titulo, c in campos.items()}
+    paginas_genotipos = handler.fetch_wikitext_lote(
+        [g for lista in genotipos_por_snp.values() for g in lista]
+    )
+
+    resultados = {}
+    for rsid, chrom, pos, alelo in linhas:
+        titulo = titulos[rsid]
+        if titulo not in campos:
+            resultados[rsid] = LookupError(f"Página não encontrada na SNPedia: {titulo}")
+            continue
+        extraido = campos[titulo]
+        extraido["genotipos"] = [
+            parse_genotipo(g, paginas_genotipos[g]) for g in genotipos_por_snp[titulo] if g in paginas_genotipos
+        ]
+        data = montar_registro_base(titulo, chrom, pos, alelo)
+        aplicar_campos_snpedia(data, extraido)
+        try:
+            gene, clin = anotacao_myvariant(anotacoes, rsid)
+        except ErroTransitorio as e:
+            resultados[rsid] = e  # lote do MyVariant falhou: o SNP fica para nova tentativa
+            continue
+        resultados[rsid] = aplicar_myvariant(data, gene, clin)
+    return resultados
@@ -0,0 +1,160 @@
+# ./tools/snpedia_extractor.py
+from typing import Callable
+from config.env import SNPEDIA_EXTRATOR
+
+# ========== EXTRATORES DA PÁGINA HTML DA SNPEDIA ==========
+#
+# Todo extrator recebe o HTML e devolve o mesmo dicionário parcial:
+#   {"genotipos": [...], "gmaf": str | None, "genes": [...], "descricao_livre": str}
+# `gmaf` é None quando a célula GMAF não existe e "" quando existe vazia.
+
+
+def _vazio() -> dict:
+    return {"genotipos": [], "gmaf": None, "genes": [], "descricao_livre": ""}
+
+
+def extrair_bs4(html: str) -> dict:
+    """Extrator de referência: árvore completa do BeautifulSoup (html.parser)."""
+    from bs4 import BeautifulSoup, Tag
+
+    soup = BeautifulSoup(html, "html.parser")
+    resultado = _vazio()
+
+    # 1) Genótipos da tabela principal
+    for tr in soup.select('table.sortable.smwtable tbody tr'):
+        if isinstance(tr, Tag):
+            cols = tr.find_all('td')
+            if len(cols) >= 3:
+                geno = cols[0].get_text(strip=True)
+                mag = cols[1].get_text(strip=True)
+                desc = cols[2].get_text(strip=True)
+                if geno or mag or desc:
+                    resultado['genotipos'].append({'genotipo': geno, 'magnitude': mag, 'resumo': desc})
+
+    # 2) GMAF via célula <td>GMAF</nobr>
+    gmaf_td = soup.find('td', string='GMAF')
+    if isinstance(gmaf_td, Tag):
+        gmaf_val_td = gmaf_td.find_next_sibling('td')
+        if isinstance(gmaf_val_td, Tag):
+            resultado['gmaf'] = gmaf_val_td.get_text(strip=True)
+
+    # 3) Genes via célula <td>Gene</nobr>
+    gene_td = soup.find('td', string='Gene')
+    if isinstance(gene_td, Tag):
+        gene_val_td = gene_td.find_next_sibling('td')
+        if isinstance(gene_val_td, Tag):
+            resultado['genes'] = [a.get_text(strip=True) for a in gene_val_td.find_all('a')]
+
+    # 4) Descrição livre: primeiro parágrafo com texto
+    container = soup.select_one('div#mw-content-text div.mw-parser-output')
+    if isinstance(container, Tag):
+        for p in container.find_all('p'):
+            text = p.get_text(strip=True)
+            if text:
+                resultado['descricao_livre'] = text
+                break
+
+    return resultado
+
+
+# ---------- lxml + XPath: só visita as regiões necessárias ----------
+
+_XPATHS = {}
+
+def _xpath(expressao: str):
+    from lxml import etree
+
+    if expressao not in _XPATHS:
+        _XPATHS[expressao] = etree.XPath(expressao)
+    return _XPATHS[expressao]
+
+
+def _classe(nome: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {nome} ')"
+
+
+XP_LINHAS_GENOTIPOS = f"//table[{_classe('sortable')} and {_classe('smwtable')}]//tbody//tr"
+XP_CONTAINER = f"(//div[@id='mw-content-text']//div[{_classe('mw-parser-output')}])[1]"
+XP_TEXTO = ".//text()[not(ancestor::script) and not(ancestor::style)]"
+
+
+def _texto(elemento) -> str:
+    """Equivalente ao get_text(strip=True) do BeautifulSoup."""
+    return "".join(t.strip() for t in _xpath(XP_TEXTO)(elemento))
+
+
+def _string_unica(elemento) -> str | None:
+    """Equivalente ao Tag.string do BeautifulSoup: o texto de um único filho, descendo pela cadeia."""
+    filhos = list(elemento)
+    if not filhos:
+        return elemento.text
+    if len(filhos) == 1 and not elemento.text and not filhos[0].tail:
+        filho = filhos[0]
+        if not isinstance(filho.tag, str):  # comentário
+            return filho.text
+        return _string_unica(filho)
+    return None
+
+
+def _celula_seguinte(doc, rotulo: str):
+    """Primeira <td> cuja string é exatamente `rotulo`, e a <td> irmã seguinte."""
+    for td in _xpath(f"//td[contains(., '{rotulo}')]")(doc):
+        if _string_unica(td) == rotulo:
+            return next(td.itersiblings("td"), None)
+    return None
+
+
+def extrair_lxml(html: str) -> dict:
+    """Extrator rápido: parser em C do lxml e XPath direto nas células usadas."""
+    from lxml import etree, html as lxml_html
+
+    resultado = _vazio()
+    try:
+        doc = lxml_html.document_fromstring(html)
+    except ValueError:
+        # Strings com declaração de encoding precisam ir como bytes
+        doc = lxml_html.document_fromstring(html.encode("utf-8"))
+    except etree.ParserError:
+        return resultado  # documento vazio
+
+    for tr in _xpath(XP_LINHAS_GENOTIPOS)(doc):
+        cols = _xpath(".//td")(tr)
+        if len(cols) >= 3:
+            geno, mag, desc = _texto(cols[0]), _texto(cols[1]), _texto(cols[2])
+            if geno or mag or desc:
+                resultado['genotipos'].append({'genotipo': geno, 'magnitude': mag, 'resumo': desc})
+
+    gmaf_val_td = _celula_seguinte(doc, 'GMAF')
+    if gmaf_val_td is not None:
+        resultado['gmaf'] = _texto(gmaf_val_td)
+
+    gene_val_td = _celula_seguinte(doc, 'Gene')
+    if gene_val_td is not None:
+        resultado['genes'] = [_texto(a) for a in gene_val_td.iter('a')]
+
+    for container in _xpath(XP_CONTAINER)(doc):
+        for p in container.iter('p'):
+            text = _texto(p)
+            if text:
+                resultado['descricao_livre'] = text
+                break
+
+    return resultado
+
+
+EXTRATORES: dict[str, Callable[[str], dict]] = {
+    "bs4": extrair_bs4,
+    "lxml": extrair_lxml,
+}
+
+
+def obter_extrator(nome: str = SNPEDIA_EXTRATOR) -> Callable[[str], dict]:
+    """Extrator configurado; cai para o BeautifulSoup se o lxml não estiver instalado."""
+    if nome not in EXTRATORES:
+        raise ValueError(f"Extrator desconhecido: {nome} (opções: {', '.join(EXTRATORES)})")
+    if nome == "lxml":
+        try:
+            import lxml.html  # noqa: F401
+        except ImportError:
+            return extrair_bs4
+    return EXTRATORES[nome]
@@ -1,13 +1,34 @@
 # ./tools/snpedia_handler.py
 import mwclient
-import httpx
-from bs4 import BeautifulSoup
 from typing import List
+from config.env import URL_SNEDIA, TAMANHO_LOTE_WIKITEXTO, TIMEOUT_CONEXAO, TIMEOUT_LEITURA
+from utils.http_cache import obter_cache
+from utils.lotes import dividir_em_lotes
+from utils.metricas import cronometrado
+from utils.politica_rede import ErroTransitorio, obter_politica
 
 
 class SNPediaHandler:
     def __init__(self, api_url: str = 'bots.snpedia.com', path: str = '/'):
-        self.site = mwclient.Site(api_url, path=path)
+        self.api_url = api_url
+        self.path = path
+        self._site = None
+
+    @property
+    def site(self) -> mwclient.Site:
+        # Conecta à API só quando for usada: fetch_html não precisa dela.
+        # Sem as novas tentativas do próprio mwclient: quem retenta é a política de rede.
+        if self._site is None:
+            self._site = mwclient.Site(self.api_url, path=self.path, max_retries=0,
+                                       reqs={"timeout": (TIMEOUT_CONEXAO, TIMEOUT_LEITURA)})
+        return self._site
+
+    def _consultar_api(self, **parametros) -> dict:
+        try:
+            return self.site.api("query", **parametros)
+        except mwclient.errors.MaximumRetriesExceeded as e:
+            # maxlag: o banco do wiki está atrasado e pediu para esperar
+            raise ErroTransitorio(f"API da SNPedia pediu espera: {e}", self.api_url) from e
 
     def list_all_snps(self) -> List[str]:
         """
@@ -27,12 +48,64 @@ class SNPediaHandler:
         except Exception:
             return False
 
+    @cronometrado("buscar_snpedia")
     def fetch_html(self, rsid: str) -> str:
         """
         Roda request HTTP direto para obter HTML renderizado.
+        Páginas já baixadas vêm do cache em disco. Falhas transitórias são
+        retentadas pela política de rede e, esgotadas, viram ErroTransitorio.
         """
-        url = f'https://www.snpedia.com/index.php/{rsid}'
-        # recomendamos usar requests para HTML completo
-        resp = httpx.get(url, timeout=50)
+        cache = obter_cache()
+        if cache is not None:
+            html = cache.obter("snpedia", rsid)
+            if html is not None:
+                return html
+
+        url = f'{URL_SNEDIA}{rsid}'
+        resp = obter_politica().get(url)
         resp.raise_for_status()
+        if cache is not None:
+            cache.guardar("snpedia", rsid, resp.text)
         return resp.text
+
+    @cronometrado("buscar_wikitext_lote")
+    def fetch_wikitext_lote(self, titulos: List[str]) -> dict[str, str]:
+        """
+        Baixa o wikitexto de vários títulos com uma consulta à API por lote de
+        até TAMANHO_LOTE_WIKITEXTO. Retorna {titulo: wikitexto}; páginas
+        inexistentes ficam de fora (e são lembradas no cache como vazias).
+        """
+        cache = obter_cache()
+        textos, faltantes = {}, []
+        for titulo in dict.fromkeys(titulos):
+            texto = cache.obter("snpedia_wikitext", titulo) if cache is not None else None
+            if texto is None:
+                faltantes.append(titulo)
+            elif texto:
+                textos[titulo] = texto
+
+        url_api = f"https://{self.api_url}{self.path}api.php"
+        for lote in dividir_em_lotes(faltantes, TAMANHO_LOTE_WIKITEXTO):
+            # O mwclient levanta exceção para qualquer status que não seja 200
+            resposta = obter_politica().executar(url_api, lambda: self._consultar_api(
+                prop="revisions", rvprop="content", rvslots="main", titles="|".join(lote), redirects=1,
+            ))
+            consulta = resposta.get("query", {})
+            # Títulos normalizados/redirecionados voltam com outro nome
+            origem = {t: t for t in lote}
+            for mapa in consulta.get("normalized", []) + consulta.get("redirects", []):
+                origem[mapa["to"]] = origem.get(mapa["from"], mapa["from"])
+            encontrados = {}
+            for pagina in consulta.get("pages", {}).values():
+                if "missing" in pagina or not pagina.get("revisions"):
+                    continue
+                revisao = pagina["revisions"][0]
+                texto = revisao.get("slots", {}).get("main", revisao).get("*", "")
+                encontrados[origem.get(pagina["title"], pagina["title"])] = texto
+            for titulo in lote:
+                texto = encontrados.get(titulo, "")
+                if cache is not None:
+                    cache.guardar("snpedia_wikitext", titulo, texto)
+                if texto:
+                    textos[titulo] = texto
+        return textos
@@ -0,0 +1,103 @@
+# ./tools/snpedia_index.py
+import argparse
+from pathlib import Path
+from typing import Iterable
+import numpy as np
+from config.env import INDICE_SNPEDIA
+
+# ========== ÍNDICE LOCAL DAS PÁGINAS EXISTENTES NA SNPEDIA ==========
+#
+# A maioria dos rsIDs de um chip de genotipagem não tem página na SNPedia.
+# Guardamos a categoria 'Is_a_snp' como dois vetores ordenados de inteiros
+# (números 'rs' e números 'i' da 23andMe) e testamos a existência por busca
+# binária, antes de qualquer requisição.
+
+
+def _separar_id(rsid: str) -> tuple[str, int] | None:
+    """'Rs5400' -> ('rs', 5400); 'i3000001' -> ('i', 3000001); outros -> None."""
+    rsid = rsid.strip().lower()
+    for prefixo in ("rs", "i"):
+        if rsid.startswith(prefixo) and rsid[len(prefixo):].isdigit():
+            return prefixo, int(rsid[len(prefixo):])
+    return None
+
+
+def _contem(ordenado: np.ndarray, valores: np.ndarray) -> np.ndarray:
+    if not len(ordenado):
+        return np.zeros(len(valores), dtype=bool)
+    pos = np.searchsorted(ordenado, valores)
+    pos[pos == len(ordenado)] = 0
+    return ordenado[pos] == valores
+
+
+class IndiceSNPedia:
+    def __init__(self, rs: np.ndarray, i: np.ndarray):
+        self.rs = np.unique(rs.astype(np.uint32))
+        self.i = np.unique(i.astype(np.uint32))
+
+    def __len__(self):
+        return len(self.rs) + len(self.i)
+
+    @classmethod
+    def de_titulos(cls, titulos: Iterable[str]) -> "IndiceSNPedia":
+        numeros = {"rs": [], "i": []}
+        for titulo in titulos:
+            separado = _separar_id(titulo)
+            if separado:
+                numeros[separado[0]].append(separado[1])
+        return cls(np.array(numeros["rs"], dtype=np.uint32), np.array(numeros["i"], dtype=np.uint32))
+
+    @classmethod
+    def carregar(cls, caminho: str = INDICE_SNPEDIA) -> "IndiceSNPedia | None":
+        """Lê o índice salvo; None se ainda não foi gerado (o pipeline então não filtra)."""
+        if not Path(caminho).exists():
+            return None
+        with np.load(caminho) as dados:
+            return cls(dados["rs"], dados["i"])
+
+    def salvar(self, caminho: str = INDICE_SNPEDIA):
+        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(caminho, rs=self.rs, i=self.i)
+
+    def contem(self, rsid: str) -> bool:
+        return bool(self.contem_lote([rsid])[0])
+
+    def contem_lote(self, rsids: Iterable[str]) -> np.ndarray:
+        """Máscara booleana: True para os rsIDs que têm página na SNPedia."""
+        separados = [_separar_id(r) for r in rsids]
+        resultado = np.zeros(len(separados), dtype=bool)
+        for prefixo, ordenado in (("rs", self.rs), ("i", self.i)):
+            posicoes = [k for k, s in enumerate(separados) if s and s[0] == prefixo]
+            if posicoes:
+                valores = np.array([separados[k][1] for k in posicoes], dtype=np.int64)
+                resultado[posicoes] = _contem(ordenado, valores)
+        return resultado
+
+
+def atualizar_indice(caminho: str = INDICE_SNPEDIA) -> IndiceSNPedia:
+    """Baixa a lista da categoria 'Is_a_snp' via API MediaWiki e salva o índice."""
+    from tools.snpedia_handler import SNPediaHandler
+
+    indice = IndiceSNPedia.de_titulos(SNPediaHandler().list_all_snps())
+    indice.salvar(caminho)
+    return indice
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice local das páginas de SNP existentes na SNPedia.")
+    parser.add_argument("--atualizar", action="store_true", help="baixa de novo a categoria Is_a_snp")
+    parser.add_argument("--caminho", default=INDICE_SNPEDIA)
+    parser.add_argument("rsids", nargs="*", help="rsIDs a consultar no índice")
+    args = parser.parse_args()
+
+    if args.atualizar:
+        indice = atualizar_indice(args.caminho)
+        print(f"✅ Índice atualizado: {len(indice.rs)} rsIDs e {len(indice.i)} IDs 'i' em {args.caminho}")
+    else:
+        indice = IndiceSNPedia.carregar(args.caminho)
+        if indice is None:
+            print(f"❌ Índice não encontrado: {args.caminho} (rode com --atualizar)")
+            exit(1)
+
+    for rsid, existe in zip(args.rsids, indice.contem_lote(args.rsids)):
+        print(f"{rsid}: {'✔ tem página' if existe else '✘ sem página'}")
@@ -0,0 +1,135 @@
+# ./tools/snpedia_wikitext.py
+import re
+
+# ========== PARSER DO WIKITEXTO DA SNPEDIA ==========
+#
+# Lê os templates {{Rsnum ...}} (página do SNP) e {{Genotype ...}} (páginas
+# "Rs5400(C;C)") direto do wikitexto, sem renderizar nem parsear HTML.
+
+
+def _fim_do_bloco(texto: str, inicio: int, abre: str, fecha: str) -> int:
+    """Índice logo após o `fecha` que casa com o `abre` em `inicio` (respeita aninhamento)."""
+    nivel, i = 0, inicio
+    while i < len(texto):
+        if texto.startswith(abre, i):
+            nivel += 1
+            i += len(abre)
+        elif texto.startswith(fecha, i):
+            nivel -= 1
+            i += len(fecha)
+            if nivel == 0:
+                return i
+        else:
+            i += 1
+    return len(texto)
+
+
+def _dividir_parametros(corpo: str) -> list[str]:
+    """Divide o corpo do template nos '|' de nível zero (fora de {{ }} e [[ ]])."""
+    partes, nivel, atual, i = [], 0, [], 0
+    while i < len(corpo):
+        dois = corpo[i:i + 2]
+        if dois in ("{{", "[["):
+            nivel += 1
+            atual.append(dois)
+            i += 2
+        elif dois in ("}}", "]]"):
+            nivel -= 1
+            atual.append(dois)
+            i += 2
+        elif corpo[i] == "|" and nivel == 0:
+            partes.append("".join(atual))
+            atual = []
+            i += 1
+        else:
+            atual.append(corpo[i])
+            i += 1
+    partes.append("".join(atual))
+    return partes
+
+
+def extrair_templates(texto: str, nome: str) -> list[dict[str, str]]:
+    """Parâmetros nomeados de cada ocorrência de {{nome ...}}, com chaves em minúsculas."""
+    templates = []
+    for m in re.finditer(r"\{\{\s*" + re.escape(nome) + r"\s*(?=[|}])", texto, flags=re.IGNORECASE):
+        fim = _fim_do_bloco(texto, m.start(), "{{", "}}")
+        parametros = {}
+        for parte in _dividir_parametros(texto[m.end():fim - 2])[1:]:
+            if "=" in parte:
+                chave, valor = parte.split("=", 1)
+                parametros[chave.strip().lower()] = valor.strip()
+        templates.append(parametros)
+    return templates
+
+
+def _remover_templates(texto: str) -> str:
+    """Remove {{...}} de nível zero, mantendo citações {{PMID|n}} como '[PMID n]'."""
+    saida, i = [], 0
+    while (inicio := texto.find("{{", i)) != -1:
+        saida.append(texto[i:inicio])
+        fim = _fim_do_bloco(texto, inicio, "{{", "}}")
+        partes = _dividir_parametros(texto[inicio + 2:fim - 2])
+        nome = partes[0].strip().lower()
+        if nome in ("pmid", "pmid auto"):
+            numero = next((p.split("=", 1)[-1].strip() for p in partes[1:] if p.strip()), "")
+            saida.append(f"[PMID {numero}]")
+        i = fim
+    saida.append(texto[i:])
+    return "".join(saida)
+
+
+def limpar_wikitexto(texto: str) -> str:
+    """Converte um trecho de wikitexto em texto corrido (links, negrito, tags e tabelas)."""
+    texto = _remover_templates(texto)
+    texto = re.sub(r"\{\|.*?\|\}", "", texto, flags=re.DOTALL)                # tabelas
+    texto = re.sub(r"<ref[^>]*/>|<ref[^>]*>.*?</ref>", "", texto, flags=re.DOTALL)
+    texto = re.sub(r"<[^>]+>", "", texto)                                     # demais tags HTML
+    texto = re.sub(r"\[\[(?:[^|\]]*\|)?([^\]]*)\]\]", r"\1", texto)           # [[alvo|rótulo]]
+    texto = re.sub(r"\[(?:https?|ftp)://\S+\s+([^\]]*)\]", r"\1", texto)      # [url rótulo]
+    texto = texto.replace("'''", "").replace("''", "")
+    return texto.strip()
+
+
+def primeiro_paragrafo(wikitexto: str) -> str:
+    """Primeiro parágrafo com texto, fora de templates, tabelas e títulos."""
+    for bloco in re.split(r"\n\s*\n", _remover_templates(wikitexto)):
+        linhas = [l for l in bloco.splitlines() if l.strip() and not l.lstrip().startswith(("=", "{|", "|", "!", "[[Category"))]
+        texto = limpar_wikitexto(" ".join(l.strip() for l in linhas))
+        if texto:
+            return texto
+    return ""
+
+
+def titulos_genotipos(rsnum: dict[str, str], titulo_snp: str) -> list[str]:
+    """Títulos das páginas de genótipo listadas no Rsnum (geno1, geno2, ...), ex.: 'Rs5400(C;C)'."""
+    chaves = sorted((k for k in rsnum if re.fullmatch(r"geno\d+", k)), key=lambda k: int(k[4:]))
+    return [f"{titulo_snp}{rsnum[k]}" for k in chaves if rsnum[k]]
+
+
+def parse_rsnum(wikitexto: str) -> dict:
+    """
+    Campos da página do SNP no mesmo formato do extrator HTML:
+    {"genotipos": [], "gmaf": str | None, "genes": [...], "descricao_livre": str, "rsnum": {...}}
+    """
+    templates = extrair_templates(wikitexto, "Rsnum")
+    rsnum = templates[0] if templates else {}
+    genes_brutos = rsnum.get("gene_s") or rsnum.get("gene") or ""
+    return {
+        "genotipos": [],
+        "gmaf": rsnum.get("gmaf") or None,
+        "genes": [g.strip() for g in re.split(r"[,;]", genes_brutos) if g.strip()],
+        "descricao_livre": primeiro_paragrafo(wikitexto),
+        "rsnum": rsnum,
+    }
+
+
+def parse_genotipo(titulo: str, wikitexto: str) -> dict:
+    """Linha da tabela de genótipos a partir da página 'RsX(A;B)'."""
+    templates = extrair_templates(wikitexto, "Genotype")
+    genotipo = templates[0] if templates else {}
+    alelos = re.search(r"\([^)]*\)$", titulo)
+    return {
+        "genotipo": alelos.group(0) if alelos else titulo,
+        "magnitude": genotipo.get("magnitude", ""),
+        "resumo": limpar_wikitexto(genotipo.get("summary", "")),
+    }
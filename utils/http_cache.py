@@ -0,0 +1,181 @@
+# ./utils/http_cache.py
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Iterable
+from config.env import CACHE_FILE, CACHE_ATIVO, CACHE_TAMANHO_MAX_MB, CACHE_TTLS
+
+# ====== CACHE PERSISTENTE DE RESPOSTAS (SQLite + zlib) ======
+
+
+class CacheHTTP:
+    """
+    Cache em disco de respostas HTTP brutas (HTML da SNPedia, JSON do MyVariant).
+    Cada entrada é endereçada pelo hash de (fonte, identificador), tem TTL por
+    fonte e o total é limitado a `tamanho_max` bytes com despejo LRU.
+    """
+
+    def __init__(self, caminho: str = CACHE_FILE, ttls: dict[str, int] = CACHE_TTLS,
+                 tamanho_max: int = CACHE_TAMANHO_MAX_MB * 1024 * 1024):
+        Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        self.caminho = caminho
+        self.ttls = ttls
+        self.tamanho_max = tamanho_max
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.expirados: Counter = Counter()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS respostas (
+                   chave TEXT PRIMARY KEY,
+                   fonte TEXT NOT NULL,
+                   corpo BLOB NOT NULL,
+                   tamanho INTEGER NOT NULL,
+                   criado REAL NOT NULL,
+                   acessado REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_respostas_acessado ON respostas(acessado)")
+        self._tamanho_total = self._conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+
+    @staticmethod
+    def chave(fonte: str, identificador: str) -> str:
+        return hashlib.sha256(f"{fonte}\0{identificador}".encode("utf-8")).hexdigest()
+
+    def obter(self, fonte: str, identificador: str) -> str | None:
+        """Retorna o corpo guardado ou None (ausente ou expirado)."""
+        chave = self.chave(fonte, identificador)
+        agora = time.time()
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT corpo, criado, tamanho FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None:
+                self.misses[fonte] += 1
+                return None
+            corpo, criado, tamanho = linha
+            ttl = self.ttls.get(fonte, 0)
+            if ttl and agora - criado > ttl:
+                self._conn.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+                self._tamanho_total -= tamanho
+                self.expirados[fonte] += 1
+                self.misses[fonte] += 1
+                return None
+            self._conn.execute("UPDATE respostas SET acessado = ? WHERE chave = ?", (agora, chave))
+            self.hits[fonte] += 1
+        return zlib.decompress(corpo).decode("utf-8")
+
+    def obter_varios(self, fonte: str, identificadores: Iterable[str]) -> dict[str, str]:
+        """{identificador: corpo} dos que estão guardados e válidos (os outros ficam de fora)."""
+        resultado = {}
+        for identificador in identificadores:
+            corpo = self.obter(fonte, identificador)
+            if corpo is not None:
+                resultado[identificador] = corpo
+        return resultado
+
+    def guardar(self, fonte: str, identificador: str, corpo: str):
+        self.guardar_varios(fonte, [(identificador, corpo)])
+
+    def guardar_varios(self, fonte: str, itens: Iterable[tuple[str, str]]):
+        """Grava vários (identificador, corpo) numa só transação; a compressão fica fora do lock."""
+        linhas = [(self.chave(fonte, identificador), zlib.compress(corpo.encode("utf-8"), 6))
+                  for identificador, corpo in itens]
+        agora = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for chave, comprimido in linhas:
+                    anterior = self._conn.execute("SELECT tamanho FROM respostas WHERE chave = ?", (chave,)).fetchone()
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?)",
+                        (chave, fonte, comprimido, len(comprimido), agora, agora),
+                    )
+                    self._tamanho_total += len(comprimido) - (anterior[0] if anterior else 0)
+                if self._tamanho_total > self.tamanho_max:
+                    self._despejar()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self._tamanho_total = self._conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+                raise
+
+    # SQLite e zlib bloqueiam: dentro de um loop asyncio, as versões abaixo rodam
+    # numa thread para não segurar as requisições em voo (o lock serializa o acesso)
+
+    async def obter_async(self, fonte: str, identificador: str) -> str | None:
+        return await asyncio.to_thread(self.obter, fonte, identificador)
+
+    async def guardar_async(self, fonte: str, identificador: str, corpo: str):
+        await asyncio.to_thread(self.guardar, fonte, identificador, corpo)
+
+    def obter_json(self, fonte: str, identificador: str):
+        corpo = self.obter(fonte, identificador)
+        return json.loads(corpo) if corpo is not None else None
+
+    def guardar_json(self, fonte: str, identificador: str, dados):
+        self.guardar(fonte, identificador, json.dumps(dados, ensure_ascii=False, separators=(",", ":")))
+
+    def _despejar(self):
+        """Remove as entradas menos usadas até ficar em 90% do limite (chamar com o lock)."""
+        alvo = self.tamanho_max * 0.9
+        remover = []
+        for chave, tamanho in self._conn.execute("SELECT chave, tamanho FROM respostas ORDER BY acessado"):
+            if self._tamanho_total <= alvo:
+                break
+            remover.append((chave,))
+            self._tamanho_total -= tamanho
+        self._conn.executemany("DELETE FROM respostas WHERE chave = ?", remover)
+
+    def iterar(self, fonte: str):
+        """Percorre os corpos guardados de uma fonte (sem contar hits nem atualizar o LRU)."""
+        cursor = self._conn.execute("SELECT corpo FROM respostas WHERE fonte = ?", (fonte,))
+        for (corpo,) in cursor:
+            yield zlib.decompress(corpo).decode("utf-8")
+
+    def estatisticas(self) -> dict:
+        """Hits, misses e taxa de acerto por fonte, mais o tamanho ocupado."""
+        fontes = sorted(set(self.hits) | set(self.misses))
+        por_fonte = {}
+        for fonte in fontes:
+            total = self.hits[fonte] + self.misses[fonte]
+            por_fonte[fonte] = {
+                "hits": self.hits[fonte],
+                "misses": self.misses[fonte],
+                "expirados": self.expirados[fonte],
+                "taxa_acerto": self.hits[fonte] / total if total else 0.0,
+            }
+        return {"fontes": por_fonte, "tamanho_bytes": self._tamanho_total}
+
+    def limpar(self, fonte: str | None = None):
+        with self._lock:
+            if fonte is None:
+                self._conn.execute("DELETE FROM respostas")
+            else:
+                self._conn.execute("DELETE FROM respostas WHERE fonte = ?", (fonte,))
+            self._tamanho_total = self._conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+
+    def fechar(self):
+        self._conn.close()
+
+
+_cache: CacheHTTP | None = None
+
+def obter_cache() -> CacheHTTP | None:
+    """Instância compartilhada do cache (aberta sob demanda), ou None se CACHE_ATIVO=0."""
+    global _cache
+    if not CACHE_ATIVO:
+        return None
+    if _cache is None:
+        _cache = CacheHTTP()
+    return _cache
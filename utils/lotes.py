@@ -0,0 +1,26 @@
+# ./utils/lotes.py
+
+import asyncio
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+def dividir_em_lotes(itens: Iterable[T], tamanho: int) -> Iterator[list[T]]:
+    """Agrupa qualquer iterável em listas de até `tamanho` itens, sem materializá-lo."""
+    iterador = iter(itens)
+    while lote := list(islice(iterador, tamanho)):
+        yield lote
+
+
+async def iterar_em_thread(itens: Iterable[T]) -> AsyncIterator[T]:
+    """
+    Percorre um iterável síncrono dentro de um loop asyncio sem bloqueá-lo:
+    cada next() roda numa thread. Geradores que fazem trabalho pesado (etapas
+    anteriores do orquestrador, leitura do genoma em blocos) não seguram as
+    requisições em voo enquanto produzem o próximo item.
+    """
+    iterador = iter(itens)
+    fim = object()
+    while (item := await asyncio.to_thread(next, iterador, fim)) is not fim:
+        yield item
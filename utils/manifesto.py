@@ -0,0 +1,107 @@
+# ./utils/manifesto.py
+
+import json
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from config.env import MANIFESTO_RESULTADOS
+
+# ====== MANIFESTO DE SNPs PROCESSADOS (entre execuções) ======
+
+STATUS_OK = "ok"
+STATUS_FALHA = "falha"
+STATUS_SEM_SNPEDIA = "sem_snpedia"
+STATUS_RETENTAVEL = "retentavel"  # fonte fora do ar ou limitando: volta na próxima execução
+
+
+def _chave(rsid: str) -> str:
+    return rsid.strip().lower()
+
+
+class ManifestoResultados:
+    """
+    Índice persistente (JSON lines, só anexa) de todos os rsIDs já processados,
+    em qualquer execução: status, flags de origem, data e onde o resultado está.
+    É lido uma vez na abertura; as consultas seguintes são buscas em dicionário.
+    """
+
+    def __init__(self, caminho: str = MANIFESTO_RESULTADOS):
+        self.caminho = Path(caminho)
+        self.entradas: dict[str, dict] = {}
+        if self.caminho.exists():
+            with open(self.caminho, encoding="utf-8") as f:
+                for linha in f:
+                    try:
+                        entrada = json.loads(linha)
+                    except json.JSONDecodeError:
+                        continue  # última linha truncada por uma interrupção
+                    self.entradas[_chave(entrada["rsid"])] = entrada
+        self._arquivo = None
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def entrada(self, rsid: str) -> dict | None:
+        return self.entradas.get(_chave(rsid))
+
+    def status(self, rsid: str) -> str | None:
+        entrada = self.entrada(rsid)
+        return entrada["status"] if entrada else None
+
+    def ja_processado(self, rsid: str, retentar_falhas: bool = False, reverificar_sem_snpedia: bool = False) -> bool:
+        """
+        True se o rsID já tem resultado (ou falhou e não se pediu para retentar).
+        Falhas transitórias (STATUS_RETENTAVEL) são sempre processadas de novo.
+        Com `reverificar_sem_snpedia`, STATUS_SEM_SNPEDIA também volta: quem
+        chama confere o rsID no índice atual, que pode ter ganhado a página.
+        """
+        status = self.status(rsid)
+        if status is None or status == STATUS_RETENTAVEL:
+            return False
+        if status == STATUS_SEM_SNPEDIA and reverificar_sem_snpedia:
+            return False
+        return not (retentar_falhas and status != STATUS_OK)
+
+    def registrar(self, rsid: str, status: str, dados: dict | None = None,
+                  arquivo: Path | str | None = None, erro: Exception | str | None = None):
+        entrada = {
+            "rsid": rsid,
+            "status": status,
+            "found_snpedia_data": bool(dados and dados.get("found_snpedia_data")),
+            "found_myvariant_data": bool(dados and dados.get("found_myvariant_data")),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "arquivo": str(arquivo) if arquivo is not None else None,
+            "erro": str(erro) if erro is not None else None,
+        }
+        self.entradas[_chave(rsid)] = entrada
+        if self._arquivo is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            self._arquivo = open(self.caminho, "a", encoding="utf-8", buffering=1)
+            if self._arquivo.tell() and not self._termina_em_nova_linha():
+                self._arquivo.write("\n")
+        self._arquivo.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+
+    def _termina_em_nova_linha(self) -> bool:
+        with open(self.caminho, "rb") as f:
+            f.seek(-1, 2)
+            return f.read(1) == b"\n"
+
+    def falhas(self) -> list[str]:
+        return [e["rsid"] for e in self.entradas.values() if e["status"] != STATUS_OK]
+
+    def resumo(self) -> Counter:
+        return Counter(e["status"] for e in self.entradas.values())
+
+    def compactar(self):
+        """Reescreve o arquivo mantendo só a entrada mais recente de cada rsID."""
+        self.fechar()
+        temporario = self.caminho.with_suffix(".tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            for entrada in self.entradas.values():
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        temporario.replace(self.caminho)
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
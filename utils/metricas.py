@@ -0,0 +1,259 @@
+# ./utils/metricas.py
+
+import inspect
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from urllib.parse import urlsplit
+from config.env import METRICAS_DIR
+
+# ====== MÉTRICAS DA EXECUÇÃO (relatório JSON + formato texto do Prometheus) ======
+#
+# Um registro por processo, seguro entre threads (o orquestrador roda etapas em
+# threads). Três tipos, todos com rótulos livres:
+#   contadores  - respostas por host/status, erros engolidos, tentativas extras
+#   medidores   - valores pontuais (tempo exclusivo de cada etapa, registros)
+#   histogramas - durações em baldes fixos: latência por host, tempo por função
+# Guardar baldes em vez de cada amostra mantém a memória constante numa
+# execução de 600k SNPs; os quantis do relatório são interpolados nos baldes.
+
+PREFIXO = "dna_"
+LIMITES_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _chave(nome: str, rotulos: dict) -> tuple:
+    return nome, tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+
+def _rotulos_prometheus(pares) -> str:
+    if not pares:
+        return ""
+    escapar = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escapar(v)}"' for k, v in pares) + "}"
+
+
+class Histograma:
+    __slots__ = ("contagens", "soma", "n", "maximo")
+
+    def __init__(self):
+        self.contagens = [0] * (len(LIMITES_SEGUNDOS) + 1)  # o último é +Inf
+        self.soma = 0.0
+        self.n = 0
+        self.maximo = 0.0
+
+    def observar(self, valor: float):
+        self.contagens[bisect_left(LIMITES_SEGUNDOS, valor)] += 1
+        self.soma += valor
+        self.n += 1
+        self.maximo = max(self.maximo, valor)
+
+    def quantil(self, q: float) -> float:
+        """Interpolação linear dentro do balde que contém o q-ésimo valor."""
+        if not self.n:
+            return 0.0
+        alvo, acumulado = q * self.n, 0
+        for i, contagem in enumerate(self.contagens):
+            if contagem and acumulado + contagem >= alvo:
+                inferior = LIMITES_SEGUNDOS[i - 1] if i else 0.0
+                superior = LIMITES_SEGUNDOS[i] if i < len(LIMITES_SEGUNDOS) else self.maximo
+                return min(inferior + (superior - inferior) * (alvo - acumulado) / contagem, self.maximo)
+            acumulado += contagem
+        return self.maximo
+
+    def resumo(self) -> dict:
+        return {
+            "n": self.n,
+            "total_s": round(self.soma, 6),
+            "media_s": round(self.soma / self.n, 6) if self.n else 0.0,
+            "p50_s": round(self.quantil(0.5), 6),
+            "p95_s": round(self.quantil(0.95), 6),
+            "p99_s": round(self.quantil(0.99), 6),
+            "max_s": round(self.maximo, 6),
+        }
+
+
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.inicio = time.time()
+        self.contadores: dict[tuple, float] = {}
+        self.medidores: dict[tuple, float] = {}
+        self.histogramas: dict[tuple, Histograma] = {}
+
+    def contar(self, nome: str, n: float = 1, **rotulos):
+        chave = _chave(nome, rotulos)
+        with self._lock:
+            self.contadores[chave] = self.contadores.get(chave, 0) + n
+
+    def definir(self, nome: str, valor: float, **rotulos):
+        with self._lock:
+            self.medidores[_chave(nome, rotulos)] = valor
+
+    def observar(self, nome: str, valor: float, **rotulos):
+        chave = _chave(nome, rotulos)
+        with self._lock:
+            if chave not in self.histogramas:
+                self.histogramas[chave] = Histograma()
+            self.histogramas[chave].observar(valor)
+
+    @contextmanager
+    def cronometro(self, funcao: str):
+        """Tempo de parede de um trecho, em `funcao_segundos{funcao=...}` (também se ele falhar)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar("funcao_segundos", time.perf_counter() - inicio, funcao=funcao)
+
+    def cronometrado(self, funcao: str):
+        """Decorador equivalente a `cronometro`, para funções síncronas e assíncronas."""
+        def decorador(f):
+            if inspect.iscoroutinefunction(f):
+                @wraps(f)
+                async def envolvida_async(*args, **kwargs):
+                    with self.cronometro(funcao):
+                        return await f(*args, **kwargs)
+                return envolvida_async
+
+            @wraps(f)
+            def envolvida(*args, **kwargs):
+                with self.cronometro(funcao):
+                    return f(*args, **kwargs)
+            return envolvida
+        return decorador
+
+    @contextmanager
+    def requisicao(self, url: str):
+        """
+        Mede uma requisição HTTP. Quem chama informa `medicao.status` com o
+        código da resposta; se o bloco levantar uma exceção, o status vira o
+        código que ela carrega (raise_for_status) ou o nome dela (ex.:
+        'ConnectTimeout'), e a exceção segue adiante.
+        """
+        host = urlsplit(url).netloc or url  # com a porta, se houver: servidores locais distintos não se misturam
+        medicao = _Medicao()
+        inicio = time.perf_counter()
+        try:
+            yield medicao
+        except Exception as e:
+            resposta = getattr(e, "response", None)
+            medicao.status = getattr(resposta, "status_code", None) or type(e).__name__
+            raise
+        finally:
+            self.observar("http_requisicao_segundos", time.perf_counter() - inicio, host=host)
+            self.contar("http_respostas_total", host=host, status=medicao.status)
+
+    def erro_silenciado(self, funcao: str, erro: Exception):
+        """Para os `except Exception` que devolvem um valor vazio em vez de propagar."""
+        self.contar("erros_silenciados_total", funcao=funcao, tipo=type(erro).__name__)
+
+    def zerar(self):
+        with self._lock:
+            self.inicio = time.time()
+            self.contadores.clear()
+            self.medidores.clear()
+            self.histogramas.clear()
+
+    # ---------- exportação ----------
+
+    def _com_cache(self):
+        """Hits e misses do cache HTTP entram como medidores no momento da exportação."""
+        from utils import http_cache
+
+        cache = http_cache._cache  # só se alguém já o abriu nesta execução
+        if cache is None:
+            return
+        for fonte, est in cache.estatisticas()["fontes"].items():
+            self.definir("cache_hits", est["hits"], fonte=fonte)
+            self.definir("cache_misses", est["misses"], fonte=fonte)
+            self.definir("cache_taxa_acerto", round(est["taxa_acerto"], 4), fonte=fonte)
+
+    def relatorio(self) -> dict:
+        self._com_cache()
+        with self._lock:
+            def agrupar(itens, valor):
+                saida: dict[str, list] = {}
+                for (nome, rotulos), v in sorted(itens, key=lambda i: (i[0][0], i[0][1])):
+                    saida.setdefault(nome, []).append({**dict(rotulos), **valor(v)})
+                return saida
+
+            return {
+                "inicio": datetime.fromtimestamp(self.inicio).isoformat(timespec="seconds"),
+                "duracao_s": round(time.time() - self.inicio, 3),
+                "contadores": agrupar(self.contadores.items(), lambda v: {"valor": v}),
+                "medidores": agrupar(self.medidores.items(), lambda v: {"valor": v}),
+                "histogramas": agrupar(self.histogramas.items(), Histograma.resumo),
+            }
+
+    def prometheus(self) -> str:
+        """Formato de exposição em texto do Prometheus (para o textfile collector ou um pushgateway)."""
+        self._com_cache()
+
+        linhas = []
+        with self._lock:
+            for tipo, itens in (("counter", self.contadores), ("gauge", self.medidores)):
+                vistos = set()
+                for (nome, rotulos), valor in sorted(itens.items()):
+                    if nome not in vistos:
+                        vistos.add(nome)
+                        linhas.append(f"# TYPE {PREFIXO}{nome} {tipo}")
+                    linhas.append(f"{PREFIXO}{nome}{_rotulos_prometheus(rotulos)} {valor}")
+            vistos = set()
+            for (nome, rotulos), hist in sorted(self.histogramas.items(), key=lambda i: i[0]):
+                if nome not in vistos:
+                    vistos.add(nome)
+                    linhas.append(f"# TYPE {PREFIXO}{nome} histogram")
+                acumulado = 0
+                for limite, contagem in zip([*LIMITES_SEGUNDOS, "+Inf"], hist.contagens):
+                    acumulado += contagem
+                    linhas.append(f"{PREFIXO}{nome}_bucket{_rotulos_prometheus([*rotulos, ('le', limite)])} {acumulado}")
+                linhas.append(f"{PREFIXO}{nome}_sum{_rotulos_prometheus(rotulos)} {hist.soma}")
+                linhas.append(f"{PREFIXO}{nome}_count{_rotulos_prometheus(rotulos)} {hist.n}")
+        return "\n".join(linhas) + "\n"
+
+    def exportar(self, pasta: Path | str = METRICAS_DIR, nome: str | None = None) -> Path:
+        """Grava <nome>.json e <nome>.prom em `pasta` e retorna o caminho do JSON."""
+        pasta = Path(pasta)
+        pasta.mkdir(parents=True, exist_ok=True)
+        nome = nome or datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        caminho = pasta / f"{nome}.json"
+        caminho.write_text(json.dumps(self.relatorio(), ensure_ascii=False, indent=2), encoding="utf-8")
+        (pasta / f"{nome}.prom").write_text(self.prometheus(), encoding="utf-8")
+        return caminho
+
+    def imprimir_resumo(self, limite: int = 8):
+        """As funções com mais tempo acumulado e a latência de cada host."""
+        with self._lock:
+            funcoes = sorted(((dict(r).get("funcao", ""), h) for (n, r), h in self.histogramas.items()
+                              if n == "funcao_segundos"), key=lambda i: -i[1].soma)
+            hosts = [(dict(r).get("host", ""), h) for (n, r), h in self.histogramas.items()
+                     if n == "http_requisicao_segundos"]
+        for funcao, h in funcoes[:limite]:
+            print(f"⏱️ {funcao}: {h.soma:.1f}s em {h.n} chamadas (p50 {h.quantil(0.5) * 1000:.0f} ms)")
+        for host, h in sorted(hosts, key=lambda i: -i[1].n):
+            print(f"🌐 {host}: {h.n} requisições, p50 {h.quantil(0.5) * 1000:.0f} ms, "
+                  f"p95 {h.quantil(0.95) * 1000:.0f} ms, máx {h.maximo * 1000:.0f} ms")
+
+
+class _Medicao:
+    __slots__ = ("status",)
+
+    def __init__(self):
+        self.status = "sem_resposta"
+
+
+METRICAS = Metricas()
+
+# Atalhos para os pontos instrumentados
+contar = METRICAS.contar
+definir = METRICAS.definir
+observar = METRICAS.observar
+cronometro = METRICAS.cronometro
+cronometrado = METRICAS.cronometrado
+requisicao = METRICAS.requisicao
+erro_silenciado = METRICAS.erro_silenciado
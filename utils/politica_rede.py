@@ -0,0 +1,270 @@
+# ./utils/politica_rede.py
+
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable
+from urllib.parse import urlsplit
+import httpx
+from config.env import (
+    TIMEOUT_CONEXAO,
+    TIMEOUT_LEITURA,
+    TAXA_POR_HOST,
+    TAXA_PADRAO,
+    TAXA_APOS_LIMITE,
+    MAX_TENTATIVAS,
+    BACKOFF_BASE,
+    BACKOFF_MAX,
+    DISJUNTOR_FALHAS,
+    DISJUNTOR_PAUSA,
+)
+from utils.metricas import contar, requisicao
+
+# ====== POLÍTICA DE REDE PARA AS FONTES REMOTAS ======
+#
+# Toda requisição à SNPedia e ao MyVariant passa por aqui, por host:
+#   balde de tokens  - limita requisições/s; 429 (ou 503 com Retry-After) pausa o
+#                      host e cortam a taxa pela metade, e cada sucesso a
+#                      recupera aos poucos (+1 req/s por segundo de sucessos)
+#   novas tentativas - em falhas transitórias (timeout, conexão, 429, 5xx), com
+#                      espera exponencial e jitter completo, ou o Retry-After
+#   disjuntor        - após DISJUNTOR_FALHAS falhas seguidas o host fica
+#                      DISJUNTOR_PAUSA segundos sem receber requisições; as
+#                      chamadas falham na hora e, depois da pausa, uma só testa
+#                      se ele voltou
+# Falhas transitórias esgotadas viram ErroTransitorio: o registro fica marcado
+# para nova tentativa, em vez de sair como "sem dados".
+
+STATUS_TRANSITORIOS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class ErroTransitorio(Exception):
+    """Falha temporária de uma fonte remota: o SNP deve ser tentado de novo depois."""
+
+    def __init__(self, mensagem: str, host: str = ""):
+        super().__init__(mensagem)
+        self.host = host
+
+
+class HostIndisponivel(ErroTransitorio):
+    """Disjuntor aberto: o host falhou seguidamente e está em pausa."""
+
+
+def eh_transitorio(erro: Exception) -> bool:
+    resposta = getattr(erro, "response", None)
+    status = getattr(resposta, "status_code", None)
+    if status is not None:
+        return status in STATUS_TRANSITORIOS
+    # httpx: timeouts e falhas de conexão/protocolo; requests (mwclient) herda de OSError
+    return isinstance(erro, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError,
+                             ErroTransitorio, OSError))
+
+
+def _retry_after(resposta) -> float | None:
+    valor = getattr(resposta, "headers", {}).get("retry-after")
+    try:
+        return max(0.0, float(valor)) if valor is not None else None
+    except ValueError:
+        return None  # formato de data HTTP: cai no backoff exponencial
+
+
+class BaldeTokens:
+    """Taxa por host com aumento aditivo e redução multiplicativa (AIMD). taxa=0: sem limite até o primeiro 429."""
+
+    def __init__(self, taxa: float):
+        self.teto = taxa or float("inf")
+        self.taxa = taxa
+        self.tokens = max(1.0, taxa)
+        self.ultimo = time.monotonic()
+        self.pausado_ate = 0.0
+
+    def reservar(self) -> float:
+        """Consome um token e retorna quantos segundos esperar antes de usar o host."""
+        agora = time.monotonic()
+        espera = max(0.0, self.pausado_ate - agora)
+        if self.taxa <= 0:
+            return espera
+        self.tokens = min(max(1.0, self.taxa), self.tokens + (agora - self.ultimo) * self.taxa)
+        self.ultimo = agora
+        self.tokens -= 1
+        if self.tokens < 0:
+            espera = max(espera, -self.tokens / self.taxa)
+        return espera
+
+    def desacelerar(self, retry_after: float | None):
+        if retry_after:
+            self.pausado_ate = max(self.pausado_ate, time.monotonic() + retry_after)
+        self.taxa = max(0.5, self.taxa / 2) if self.taxa else TAXA_APOS_LIMITE
+        self.tokens = min(self.tokens, 1.0)
+
+    def acelerar(self):
+        if 0 < self.taxa < self.teto:
+            self.taxa = min(self.teto, self.taxa + 1 / self.taxa)
+
+
+class Disjuntor:
+    def __init__(self, limite_falhas: int = DISJUNTOR_FALHAS, pausa: float = DISJUNTOR_PAUSA):
+        self.limite_falhas = limite_falhas
+        self.pausa = pausa
+        self.falhas = 0
+        self.aberto_ate = 0.0
+        self.testando = False
+
+    def permitir(self) -> bool:
+        if self.falhas < self.limite_falhas:
+            return True
+        if time.monotonic() < self.aberto_ate or self.testando:
+            return False
+        self.testando = True  # meio-aberto: uma requisição de teste por vez
+        return True
+
+    def sucesso(self):
+        self.falhas = 0
+        self.testando = False
+
+    def falha(self) -> bool:
+        """Registra a falha; True se o disjuntor abriu agora."""
+        self.falhas += 1
+        self.testando = False
+        if self.falhas >= self.limite_falhas:
+            self.aberto_ate = time.monotonic() + self.pausa
+            return self.falhas == self.limite_falhas
+        return False
+
+
+class PoliticaRede:
+    def __init__(self, taxas: dict[str, float] = TAXA_POR_HOST, taxa_padrao: float = TAXA_PADRAO,
+                 max_tentativas: int = MAX_TENTATIVAS, backoff_base: float = BACKOFF_BASE,
+                 backoff_max: float = BACKOFF_MAX):
+        self.taxas = taxas
+        self.taxa_padrao = taxa_padrao
+        self.max_tentativas = max(1, max_tentativas)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = httpx.Timeout(TIMEOUT_LEITURA, connect=TIMEOUT_CONEXAO)
+        self._hosts: dict[str, tuple[BaldeTokens, Disjuntor]] = {}
+        self._lock = threading.Lock()
+        self._cliente: httpx.Client | None = None
+
+    @property
+    def cliente(self) -> httpx.Client:
+        """Cliente síncrono compartilhado: reaproveita conexões e o contexto TLS entre chamadas."""
+        if self._cliente is None:
+            self._cliente = httpx.Client(timeout=self.timeout, follow_redirects=True)
+        return self._cliente
+
+    def _estado(self, host: str) -> tuple[BaldeTokens, Disjuntor]:
+        if host not in self._hosts:
+            nome = host.split(":")[0]
+            self._hosts[host] = (BaldeTokens(self.taxas.get(nome, self.taxa_padrao)), Disjuntor())
+        return self._hosts[host]
+
+    # ---------- decisões (comuns às versões síncrona e assíncrona) ----------
+
+    def _antes(self, host: str) -> float:
+        """Segundos a esperar antes da tentativa; HostIndisponivel se o disjuntor está aberto."""
+        with self._lock:
+            balde, disjuntor = self._estado(host)
+            if not disjuntor.permitir():
+                contar("http_rejeitadas_disjuntor_total", host=host)
+                raise HostIndisponivel(f"{host} em pausa após falhas seguidas", host)
+            return balde.reservar()
+
+    def _avaliar(self, host: str, resposta=None, erro: Exception | None = None) -> tuple[bool, float | None]:
+        """(transitória?, Retry-After) da tentativa, atualizando o balde e o disjuntor do host."""
+        if resposta is None:
+            resposta = getattr(erro, "response", None)  # raise_for_status (httpx ou requests)
+        status = getattr(resposta, "status_code", None)
+        transitoria = eh_transitorio(erro) if erro is not None else status in STATUS_TRANSITORIOS
+        retry_after = _retry_after(resposta) if resposta is not None else None
+        with self._lock:
+            balde, disjuntor = self._estado(host)
+            if not transitoria:
+                balde.acelerar()
+                disjuntor.sucesso()
+            elif status == 429 or (status == 503 and retry_after is not None):
+                # Limite de taxa não é host fora do ar: desacelera sem contar para o disjuntor
+                balde.desacelerar(retry_after)
+                contar("http_limitadas_total", host=host, status=status)
+            elif disjuntor.falha():
+                contar("disjuntor_aberto_total", host=host)
+        return transitoria, retry_after
+
+    def _espera(self, tentativa: int, retry_after: float | None) -> float:
+        """Backoff exponencial com jitter completo; o Retry-After do servidor, se maior, prevalece."""
+        espera = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** tentativa))
+        return max(espera, min(retry_after or 0.0, self.backoff_max))
+
+    def _esgotado(self, host: str, url: str, ultimo) -> ErroTransitorio:
+        descricao = f"HTTP {ultimo.status_code}" if isinstance(ultimo, httpx.Response) else repr(ultimo)
+        erro = ErroTransitorio(f"{url}: {descricao} após {self.max_tentativas} tentativas", host)
+        if isinstance(ultimo, Exception):
+            erro.__cause__ = ultimo
+        return erro
+
+    # ---------- execução ----------
+
+    def executar(self, url: str, chamada: Callable[[], object]):
+        """
+        Executa `chamada()` (uma requisição a `url`) sob a política do host.
+        Devolve a resposta quando ela não é transitória (200, 404...); levanta
+        ErroTransitorio se as tentativas se esgotarem e repassa erros definitivos.
+        """
+        host = urlsplit(url).netloc or url
+        for tentativa in range(self.max_tentativas):
+            time.sleep(self._antes(host))
+            resposta = erro = None
+            try:
+                with requisicao(url) as medicao:
+                    resposta = chamada()
+                    medicao.status = getattr(resposta, "status_code", 200)
+            except Exception as e:
+                erro = e
+            transitoria, retry_after = self._avaliar(host, resposta, erro)
+            if not transitoria:
+                if erro is not None:
+                    raise erro
+                return resposta
+            if tentativa + 1 < self.max_tentativas:
+                contar("http_tentativas_extras_total", host=host)
+                time.sleep(self._espera(tentativa, retry_after))
+        raise self._esgotado(host, url, erro or resposta)
+
+    async def executar_async(self, url: str, chamada: Callable[[], Awaitable[object]]):
+        """Versão assíncrona de `executar` (as esperas não bloqueiam o loop de eventos)."""
+        host = urlsplit(url).netloc or url
+        for tentativa in range(self.max_tentativas):
+            await asyncio.sleep(self._antes(host))
+            resposta = erro = None
+            try:
+                with requisicao(url) as medicao:
+                    resposta = await chamada()
+                    medicao.status = getattr(resposta, "status_code", 200)
+            except Exception as e:
+                erro = e
+            transitoria, retry_after = self._avaliar(host, resposta, erro)
+            if not transitoria:
+                if erro is not None:
+                    raise erro
+                return resposta
+            if tentativa + 1 < self.max_tentativas:
+                contar("http_tentativas_extras_total", host=host)
+                await asyncio.sleep(self._espera(tentativa, retry_after))
+        raise self._esgotado(host, url, erro or resposta)
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.executar(url, lambda: self.cliente.get(url, **kwargs))
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.executar(url, lambda: self.cliente.post(url, **kwargs))
+
+
+_politica: PoliticaRede | None = None
+
+def obter_politica() -> PoliticaRede:
+    """Instância compartilhada (os limites e disjuntores valem para o processo todo)."""
+    global _politica
+    if _politica is None:
+        _politica = PoliticaRede()
+    return _politica
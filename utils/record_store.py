@@ -0,0 +1,212 @@
+# ./utils/record_store.py
+
+import json
+from pathlib import Path
+from typing import Iterable, Iterator
+from config.env import FORMATO_SAIDA, REGISTROS_POR_SHARD
+from utils.json_tools import salvar_json_snp
+
+# ====== ARMAZENAMENTO EM SHARDS JSON LINES ======
+
+ARQUIVO_INDICE = "indice.tsv"
+
+
+def _chave(rsid: str) -> str:
+    return rsid.strip().lower()
+
+
+class RegistroSNPStore:
+    """
+    Registros de SNP em shards JSON lines compactos (`registros-00000.jsonl`),
+    só com anexação, mais um índice `indice.tsv` (rsid, shard, offset, tamanho)
+    que permite ler qualquer rsID direto do disco. Se um rsID for gravado de
+    novo, vale a versão mais recente.
+    """
+
+    def __init__(self, diretorio: Path | str, registros_por_shard: int = REGISTROS_POR_SHARD):
+        self.diretorio = Path(diretorio)
+        self.registros_por_shard = registros_por_shard
+        self.indice: dict[str, tuple[int, int, int]] = {}
+        self._por_shard: dict[int, int] = {}
+        caminho_indice = self.diretorio / ARQUIVO_INDICE
+        if caminho_indice.exists():
+            with open(caminho_indice, encoding="utf-8") as f:
+                for linha in f:
+                    partes = linha.rstrip("\n").split("\t")
+                    if len(partes) != 4:
+                        continue  # linha truncada por uma interrupção
+                    rsid, shard, offset, tamanho = partes
+                    self.indice[_chave(rsid)] = (int(shard), int(offset), int(tamanho))
+                    self._por_shard[int(shard)] = self._por_shard.get(int(shard), 0) + 1
+        self._shard_atual = max(self._por_shard, default=0)
+        self._arquivo_shard = None
+        self._arquivo_indice = None
+        self._leitores: dict[int, object] = {}
+
+    @staticmethod
+    def eh_store(diretorio: Path | str) -> bool:
+        return (Path(diretorio) / ARQUIVO_INDICE).exists()
+
+    def caminho_shard(self, shard: int) -> Path:
+        return self.diretorio / f"registros-{shard:05d}.jsonl"
+
+    def __len__(self):
+        return len(self.indice)
+
+    def __contains__(self, rsid: str) -> bool:
+        return _chave(rsid) in self.indice
+
+    # ---------- escrita ----------
+
+    def _abrir_para_escrita(self):
+        if self._arquivo_indice is None:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            self._arquivo_indice = open(self.diretorio / ARQUIVO_INDICE, "a", encoding="utf-8")
+        if self._por_shard.get(self._shard_atual, 0) >= self.registros_por_shard:
+            self._shard_atual += 1
+            if self._arquivo_shard is not None:
+                self._arquivo_shard.close()
+                self._arquivo_shard = None
+        if self._arquivo_shard is None:
+            self._arquivo_shard = open(self.caminho_shard(self._shard_atual), "ab")
+
+    def adicionar(self, registro: dict) -> Path:
+        """Anexa o registro ao shard atual e retorna o caminho do shard."""
+        self._abrir_para_escrita()
+        linha = (json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        offset = self._arquivo_shard.tell()
+        self._arquivo_shard.write(linha)
+        self._arquivo_shard.flush()
+        rsid = registro["rsid"]
+        self._arquivo_indice.write(f"{rsid}\t{self._shard_atual}\t{offset}\t{len(linha)}\n")
+        self._arquivo_indice.flush()
+        self.indice[_chave(rsid)] = (self._shard_atual, offset, len(linha))
+        self._por_shard[self._shard_atual] = self._por_shard.get(self._shard_atual, 0) + 1
+        return self.caminho_shard(self._shard_atual)
+
+    # ---------- leitura ----------
+
+    def obter(self, rsid: str) -> dict | None:
+        """Leitura direta de um rsID pelo índice (um seek + um read)."""
+        posicao = self.indice.get(_chave(rsid))
+        if posicao is None:
+            return None
+        shard, offset, tamanho = posicao
+        if self._arquivo_shard is not None:
+            self._arquivo_shard.flush()
+        if shard not in self._leitores:
+            self._leitores[shard] = open(self.caminho_shard(shard), "rb")
+        leitor = self._leitores[shard]
+        leitor.seek(offset)
+        return json.loads(leitor.read(tamanho))
+
+    def iterar(self) -> Iterator[dict]:
+        """Lê todos os shards em sequência, entregando só a versão vigente de cada rsID."""
+        if self._arquivo_shard is not None:
+            self._arquivo_shard.flush()
+        for shard in sorted(self._por_shard):
+            with open(self.caminho_shard(shard), "rb") as f:
+                offset = 0
+                for linha in f:
+                    inicio, offset = offset, offset + len(linha)
+                    registro = json.loads(linha)
+                    if self.indice.get(_chave(registro["rsid"]), (None, None))[:2] == (shard, inicio):
+                        yield registro
+
+    def fechar(self):
+        for arquivo in [self._arquivo_shard, self._arquivo_indice, *self._leitores.values()]:
+            if arquivo is not None:
+                arquivo.close()
+        self._arquivo_shard = self._arquivo_indice = None
+        self._leitores = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+# ====== LEITURA E ESCRITA PARA AS ETAPAS ======
+
+
+def iterar_registros(origem: Path | str) -> Iterator[dict]:
+    """
+    Leitor em streaming usado por todas as etapas: aceita um diretório de
+    shards (RegistroSNPStore) ou o formato antigo, com um JSON por SNP.
+    """
+    origem = Path(origem)
+    if RegistroSNPStore.eh_store(origem):
+        with RegistroSNPStore(origem) as store:
+            yield from store.iterar()
+        return
+    for arquivo in origem.glob("*.json"):
+        with open(arquivo, encoding="utf-8") as f:
+            yield json.load(f)
+
+
+class EscritorRegistros:
+    """Destino de registros no formato configurado em FORMATO_SAIDA ('jsonl' ou 'json')."""
+
+    def __init__(self, destino: Path | str, formato: str = FORMATO_SAIDA):
+        self.destino = Path(destino)
+        self.formato = formato
+        self._store = RegistroSNPStore(self.destino) if formato == "jsonl" else None
+
+    def salvar(self, registro: dict) -> Path:
+        """Grava o registro e retorna o arquivo onde ele ficou."""
+        if self._store is not None:
+            return self._store.adicionar(registro)
+        self.destino.mkdir(parents=True, exist_ok=True)
+        rsid = registro.get("rsid", "desconhecido")
+        salvar_json_snp(rsid, registro, self.destino)
+        return self.destino / f"{rsid}.json"
+
+    def salvar_todos(self, registros: Iterable[dict]) -> int:
+        total = 0
+        for registro in registros:
+            self.salvar(registro)
+            total += 1
+        return total
+
+    def fechar(self):
+        if self._store is not None:
+            self._store.fechar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+class LeitorRegistros:
+    """
+    Leitura avulsa de registros já gravados, a partir do arquivo anotado no
+    manifesto: um shard de RegistroSNPStore ou um JSON por SNP. Os stores
+    abertos ficam em cache, um por diretório.
+    """
+
+    def __init__(self):
+        self._stores: dict[Path, RegistroSNPStore] = {}
+
+    def obter(self, rsid: str, arquivo: Path | str | None) -> dict | None:
+        """O registro de `rsid`, ou None se o arquivo não existe mais."""
+        if not arquivo:
+            return None
+        arquivo = Path(arquivo)
+        if arquivo.suffix == ".json":
+            if not arquivo.exists():
+                return None
+            with open(arquivo, encoding="utf-8") as f:
+                return json.load(f)
+        if arquivo.parent not in self._stores:
+            if not RegistroSNPStore.eh_store(arquivo.parent):
+                return None
+            self._stores[arquivo.parent] = RegistroSNPStore(arquivo.parent)
+        return self._stores[arquivo.parent].obter(rsid)
+
+    def fechar(self):
+        for store in self._stores.values():
+            store.fechar()
+        self._stores = {}